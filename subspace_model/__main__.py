@@ -5,6 +5,7 @@ import glob
 
 # logging.basicConfig(filename='cadcad.log', level=logging.INFO)
 import os
+import sys
 from datetime import datetime
 
 import click
@@ -19,9 +20,14 @@ from subspace_model.experiments.charts import (  # mc_total_supply,
     ab_block_utilization
 )
 from subspace_model.experiments.experiment import (
+    ENGINES,
     sanity_check_run,
     psuu,
+    psuu_successive_halving,
 )
+from subspace_model.experiments.designs import DESIGNS
+from subspace_model.experiments.sinks import SINKS
+from subspace_model.experiments.spool import work
 from subspace_model.experiments.metrics import (
     profit1_mean,
     total_supply_max,
@@ -40,6 +46,7 @@ log_levels = {
 experiments = {
     "sanity_check_run": sanity_check_run,
     "psuu": psuu,
+    "psuu_halving": psuu_successive_halving,
 }
 
 experiment_ids = {
@@ -201,7 +208,11 @@ def run_calculate_metrics(sim_df: pd.DataFrame, experiment: str):
 
 
 def run_experiment(
-    experiment: str, samples: int | None = None, days: int | None = None, sweep_samples: int | None = None, RETURN_SIM_DF: bool = False
+    experiment: str, samples: int | None = None, days: int | None = None, sweep_samples: int | None = None, RETURN_SIM_DF: bool = False, engine: str | None = None, seed: int | None = None,
+    record: tuple[str, ...] = (), record_stride: int | None = None, sink: str | None = None, resume: str | None = None,
+    kpi_only: bool = False, sample_trajectories: float | None = None, design: str | None = None,
+    queue: str | None = None, upload_to: str | None = None, normalized: bool = False,
+    kpi_cache: str | None = None
 ):
     """
     Run an experiment with for a given number of days and samples.
@@ -213,6 +224,19 @@ def run_experiment(
                   SIMULATION_DAYS=days,
                   N_SWEEP_SAMPLES=sweep_samples,
                   RETURN_SIM_DF=RETURN_SIM_DF,
+                  ENGINE=engine,
+                  SEED=seed,
+                  RECORDED_VARIABLES=list(record) or None,
+                  RECORD_STRIDE=record_stride,
+                  SINK=sink,
+                  RESUME=resume,
+                  KPI_ONLY=kpi_only or None,
+                  SAMPLE_TRAJECTORIES=sample_trajectories,
+                  DESIGN=design,
+                  QUEUE=queue,
+                  UPLOAD_TO=upload_to,
+                  NORMALIZED=normalized or None,
+                  KPI_CACHE=kpi_cache,
                   )
     
     kwargs = {k: v for k, v in kwargs.items() if v is not None}
@@ -232,7 +256,20 @@ def process_experiment(
     generate_template: bool = False,
     samples: int | None = None,
     days: int | None = None,
-    sweep_samples: int | None = None
+    sweep_samples: int | None = None,
+    engine: str | None = None,
+    seed: int | None = None,
+    record: tuple[str, ...] = (),
+    record_stride: int | None = None,
+    sink: str | None = None,
+    resume: str | None = None,
+    kpi_only: bool = False,
+    sample_trajectories: float | None = None,
+    design: str | None = None,
+    queue: str | None = None,
+    upload_to: str | None = None,
+    normalized: bool = False,
+    kpi_cache: str | None = None
 ):
     if generate_notebooks:
         generate_notebooks_from_templates(experiment)
@@ -244,7 +281,7 @@ def process_experiment(
         save_charts(experiment)
         return
     else:
-        sim_df = run_experiment(experiment, samples, days, sweep_samples, RETURN_SIM_DF=pickle)
+        sim_df = run_experiment(experiment, samples, days, sweep_samples, RETURN_SIM_DF=pickle, engine=engine, seed=seed, record=record, record_stride=record_stride, sink=sink, resume=resume, kpi_only=kpi_only, sample_trajectories=sample_trajectories, design=design, queue=queue, upload_to=upload_to, normalized=normalized, kpi_cache=kpi_cache)
         if calculate_metrics:
             timestep_metrics_df, trajectory_metrics_df = run_calculate_metrics(
                 sim_df,
@@ -402,6 +439,97 @@ def generate_template_from_notebook(experiment: str):
     type=int,
     help="Number of sweep combinations to sample (if applicable for the experiment)",
 )
+@click.option(
+    "-en",
+    "--engine",
+    "engine",
+    type=click.Choice(ENGINES, case_sensitive=False),
+    default=None,
+    help="Simulation engine: cadCAD, the vectorized NumPy engine, or the vectorized engine with Numba kernels; "
+    "each experiment's own default if not set.",
+)
+@click.option(
+    "--seed",
+    "seed",
+    default=None,
+    type=int,
+    help="Seed for reproducible stochastic runs; unseeded if not set.",
+)
+@click.option(
+    "-r",
+    "--record",
+    "record",
+    multiple=True,
+    help="State variable to record; repeat for several. Records all if not set.",
+)
+@click.option(
+    "--record-stride",
+    "record_stride",
+    default=None,
+    type=int,
+    help="Record every N-th timestep plus the final one.",
+)
+@click.option(
+    "--sink",
+    "sink",
+    type=click.Choice(SINKS.keys(), case_sensitive=False),
+    default=None,
+    help="Stream each chunk's results to a file of this format as it runs.",
+)
+@click.option(
+    "--resume",
+    "resume",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="Resume an interrupted PSuU run from its run folder, rerunning only missing or failed chunks.",
+)
+@click.option(
+    "--kpi-only",
+    "kpi_only",
+    default=False,
+    is_flag=True,
+    help="Reduce PSuU trajectories to their KPIs as they finish instead of writing timestep tensors.",
+)
+@click.option(
+    "--sample-trajectories",
+    "sample_trajectories",
+    default=None,
+    type=click.FloatRange(0, 1),
+    help="Fraction of trajectories to keep in full with --kpi-only.",
+)
+@click.option(
+    "--design",
+    "design",
+    type=click.Choice(DESIGNS, case_sensitive=False),
+    default=None,
+    help="How PSuU samples the sweep space: random, Latin hypercube, scrambled Sobol, or stratified by environmental scenario.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Spool PSuU chunks to this shared folder for `python -m subspace_model worker` processes on any host.",
+)
+@click.option(
+    "--upload-to",
+    "upload_to",
+    default=None,
+    help="Upload PSuU chunk outputs in the background to an s3://bucket/prefix URL or a folder.",
+)
+@click.option(
+    "--normalized",
+    "normalized",
+    default=False,
+    is_flag=True,
+    help="Write PSuU subset parameters once to a parameter table instead of on every timestep row.",
+)
+@click.option(
+    "--kpi-cache",
+    "kpi_cache",
+    default=None,
+    help="Folder of a KPI cache that seeded PSuU runs reuse the KPIs of already simulated subsets from.",
+)
 def main(
     experiment: str,
     pickle: bool,
@@ -414,7 +542,20 @@ def main(
     calculate_metrics: bool,
     generate_notebooks: bool,
     generate_template: bool,
-    sweep_samples: int
+    sweep_samples: int,
+    engine: str | None,
+    seed: int | None,
+    record: tuple[str, ...],
+    record_stride: int | None,
+    sink: str | None,
+    resume: str | None,
+    kpi_only: bool,
+    sample_trajectories: float | None,
+    design: str | None,
+    queue: str | None,
+    upload_to: str | None,
+    normalized: bool,
+    kpi_cache: str | None
 ) -> None:
     # Initialize logging
 
@@ -434,7 +575,20 @@ def main(
                 generate_template,
                 samples,
                 days,
-                sweep_samples
+                sweep_samples,
+                engine,
+                seed,
+                record,
+                record_stride,
+                sink,
+                resume,
+                kpi_only,
+                sample_trajectories,
+                design,
+                queue,
+                upload_to,
+                normalized,
+                kpi_cache
             )
 
     # Single experiment selected
@@ -448,7 +602,20 @@ def main(
             generate_template,
             samples,
             days,
-            sweep_samples
+            sweep_samples,
+            engine,
+            seed,
+            record,
+            record_stride,
+            sink,
+            resume,
+            kpi_only,
+            sample_trajectories,
+            design,
+            queue,
+            upload_to,
+            normalized,
+            kpi_cache
         )
 
     # Conditionally drop into an IPython shell
@@ -456,5 +623,50 @@ def main(
         IPython.embed()
 
 
+@click.command()
+@click.option(
+    "-q",
+    "--queue",
+    "queue",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Shared queue folder that a PSuU run was started with --queue on.",
+)
+@click.option(
+    "--idle-timeout",
+    "idle_timeout",
+    default=None,
+    type=float,
+    help="Exit after the queue has been empty for this many seconds; runs until stopped if not set.",
+)
+@click.option(
+    "--poll-interval",
+    "poll_interval",
+    default=5.0,
+    type=float,
+    help="Seconds between checks of an empty queue.",
+)
+@click.option(
+    "-l",
+    "--log-level",
+    "log_level",
+    type=click.Choice(log_levels.keys(), case_sensitive=False),
+    default="info",
+    hidden=True,
+    help="Set the logging level.",
+)
+def worker(queue: str, idle_timeout: float | None, poll_interval: float, log_level: str) -> None:
+    """
+    Run PSuU chunks from a shared queue folder, so that one sweep can be
+    spread over several hosts.
+    """
+    logger.setLevel(log_levels[log_level])
+    n_chunks = work(queue, poll_interval=poll_interval, idle_timeout=idle_timeout)
+    logger.info(f"Worker ran {n_chunks} chunks")
+
+
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["worker"]:
+        worker(sys.argv[2:], prog_name="python -m subspace_model worker")
+    else:
+        main()
@@ -0,0 +1,101 @@
+"""
+Sampling designs over a sweep space.
+
+"random" draws combinations independently per parameter, as PSuU always
+has. The other designs fill the space evenly instead: every axis with more
+than one value, or every factor of a factored axis, is a dimension of the
+unit hypercube, a design places its points in that cube, and each coordinate
+picks the value whose share of the interval it falls in. With a Latin
+hypercube every value of every dimension is then drawn about equally often,
+so fewer trajectories are needed to cover the governance surface.
+"""
+import warnings
+from itertools import product
+from random import Random
+from typing import Iterable
+
+import numpy as np
+from scipy.stats import qmc
+
+from subspace_model.experiments.sweep import SweepSpace
+
+DESIGNS = ("random", "lhs", "sobol", "stratified")
+
+
+def design_dimensions(space: SweepSpace) -> list[tuple[str, int, int]]:
+    """The (axis, factor position, size) of every dimension that varies."""
+    return [(k, j, size)
+            for k, sizes in space.factors.items()
+            for j, size in enumerate(sizes) if size > 1]
+
+
+def unit_points(design: str, d: int, n: int, seed: int | None) -> np.ndarray:
+    """`n` points of a design in the `d`-dimensional unit hypercube."""
+    if d == 0:
+        return np.empty((n, 0))
+    if design == "lhs":
+        return qmc.LatinHypercube(d, seed=seed).random(n)
+    if design == "sobol":
+        with warnings.catch_warnings():
+            # Sample sizes that are not powers of 2 lose some balance, which
+            # still leaves them better spread than random draws
+            warnings.simplefilter("ignore", UserWarning)
+            return qmc.Sobol(d, scramble=True, seed=seed).random(n)
+    raise ValueError(f"Unknown unit design '{design}'")
+
+
+def combination_indices(space: SweepSpace, dimensions: list[tuple[str, int, int]],
+                        digits: np.ndarray) -> list[int]:
+    """Combination indices from one digit per dimension and point."""
+    axis_digits = {k: np.zeros((len(digits), len(sizes)), dtype=np.int64)
+                   for k, sizes in space.factors.items()}
+    for column, (k, j, _) in enumerate(dimensions):
+        axis_digits[k][:, j] = digits[:, column]
+    indices = np.zeros(len(digits), dtype=np.int64)
+    for k, sizes in space.factors.items():
+        axis_index = np.ravel_multi_index(tuple(axis_digits[k].T), sizes)
+        indices += axis_index * space.strides[k]
+    return indices.tolist()
+
+
+def sample_design(space: SweepSpace, n: int, design: str = "random", seed: int | None = None,
+                  strata: Iterable[str] = ()) -> dict[str, list[int]]:
+    """
+    Draw `n` combinations of `space` with a sampling design, as combination
+    indices per parameter like `SweepSpace.sample` returns.
+
+    "stratified" splits the sample equally between the combinations of the
+    `strata` axes, such as the environmental scenarios, and fills the other
+    dimensions of each stratum with a Latin hypercube.
+    """
+    if design not in DESIGNS:
+        raise ValueError(f"Unknown design '{design}', expected one of {DESIGNS}")
+    if design == "random":
+        return space.sample(n, Random(seed))
+
+    dimensions = design_dimensions(space)
+    if design == "stratified":
+        strata = set(strata)
+        stratum_columns = [c for c, (k, _, _) in enumerate(dimensions) if k in strata]
+        fill_columns = [c for c, (k, _, _) in enumerate(dimensions) if k not in strata]
+        cells = list(product(*(range(dimensions[c][2]) for c in stratum_columns)))
+        # Strata that get one more point than the others when `n` does not split evenly
+        extra = set(Random(seed).sample(range(len(cells)), n % len(cells)))
+        rng = np.random.default_rng(seed)
+        blocks = []
+        for c, cell in enumerate(cells):
+            count = n // len(cells) + (c in extra)
+            if count == 0:
+                continue
+            block = np.empty((count, len(dimensions)), dtype=np.int64)
+            block[:, stratum_columns] = cell
+            points = unit_points("lhs", len(fill_columns), count, rng)
+            block[:, fill_columns] = (points * [dimensions[c][2] for c in fill_columns]).astype(np.int64)
+            blocks.append(block)
+        digits = np.concatenate(blocks)[rng.permutation(n)]
+    else:
+        points = unit_points(design, len(dimensions), n, seed)
+        digits = (points * [size for _, _, size in dimensions]).astype(np.int64)
+
+    indices = combination_indices(space, dimensions, digits)
+    return {k: list(indices) for k in space.keys()}
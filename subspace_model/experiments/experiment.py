@@ -2,28 +2,42 @@ from copy import deepcopy
 
 import numpy as np
 import pandas as pd
-from cadCAD.tools import easy_run  # type: ignore
-from cadCAD.tools.preparation import sweep_cartesian_product  # type: ignore
+from cadCAD.configuration import Experiment  # type: ignore
+from cadCAD.configuration.utils import config_sim  # type: ignore
+from cadCAD.engine import ExecutionContext, ExecutionMode, Executor  # type: ignore
+from cadCAD.tools.execution.easy_run import select_M_dict  # type: ignore
 from pandas import DataFrame
-from random import sample
 from datetime import datetime
 from joblib import Parallel, delayed  # type: ignore
 from glob import glob
 import re
 from tqdm.auto import tqdm # type: ignore
+import json
 import logging
+from math import ceil
 from pathlib import Path
 import os
 from multiprocessing import cpu_count
-from subspace_model.psuu import timestep_tensor_to_trajectory_tensor
-import boto3 # type: ignore
+from numbers import Number
+from typing import Any, Callable, Collection, Iterable
+from subspace_model.psuu import (
+    GOVERNANCE_PARAM_COLUMNS,
+    expand_governance_columns,
+    join_parameters,
+    kpi_input_columns,
+    timestep_tensor_to_trajectory_tensor,
+)
+from subspace_model.psuu.kpis import KPI_STATE_VARIABLES, KPI_functions, KPIAccumulator, calculate_goal_score
 
 logger = logging.getLogger('subspace-digital-twin')
 CLOUD_BUCKET_NAME = 'subspace-simulations'
 
 
 from subspace_model.const import *
+from subspace_model.experiments.designs import DESIGNS, sample_design
+from subspace_model.experiments.kpi_cache import KPICache, canonical_value, content_hash, model_fingerprint
 from subspace_model.experiments.logic import (
+    MAINNET_REFERENCE_SUBSIDY_GRID,
     REFERENCE_SUBSIDY_CONSTANT_SINGLE_COMPONENT,
     REFERENCE_SUBSIDY_HYBRID_SINGLE_COMPONENT,
     REFERENCE_SUBSIDY_HYBRID_TWO_COMPONENTS,
@@ -33,6 +47,25 @@ from subspace_model.experiments.logic import (
     TRANSACTION_COUNT_PER_DAY_FUNCTION_CONSTANT_UTILIZATION_50,
     TRANSACTION_COUNT_PER_DAY_FUNCTION_GROWING_UTILIZATION_TWO_YEARS,
 )
+from subspace_model.experiments.manifest import DONE, FAILED, ChunkRecord, RunManifest
+from subspace_model.experiments.recording import derived_param_values, parameter_table, records_to_dataframe
+from subspace_model.experiments.scheduler import (
+    CostModel,
+    dispatch_order,
+    plan_chunks,
+    sample_subsets,
+    utilization_report,
+)
+from subspace_model.experiments.sinks import (
+    SINKS,
+    KPISink,
+    ParquetDatasetSink,
+    TrajectorySink,
+    read_sink,
+)
+from subspace_model.experiments.spool import coordinate
+from subspace_model.experiments.sweep import SweepSpace
+from subspace_model.experiments.upload import Uploader, upload_backend
 from subspace_model.params import (
     DEFAULT_PARAMS,
     ENVIRONMENTAL_SCENARIOS,
@@ -41,10 +74,169 @@ from subspace_model.params import (
 )
 from subspace_model.state import INITIAL_STATE
 from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
+from subspace_model.vectorized import run_vectorized
+from subspace_model.vectorized.kernels import numba_model_blocks
+from subspace_model.vectorized.types import Checkpoint
+from subspace_model.vectorized.structure import VECTORIZED_MODEL_BLOCKS
+
+ENGINES = ("cadcad", "vectorized", "numba")
+
+
+def seed_sweep(sweep_params: dict[str, list], seed: int, offset: int = 0) -> dict[str, list]:
+    """
+    Seed every subset of a sweep, tagging each one with its index in the
+    sweep so that its random draws do not depend on how the sweep is later
+    chunked. A chunk starting at subset `offset` of a larger sweep is tagged
+    with the indices it has in that sweep.
+    """
+    n_subsets = max(len(v) for v in sweep_params.values())
+    return {**sweep_params, "rng_seed": [seed] * n_subsets, "rng_subset": list(range(offset, offset + n_subsets))}
+
+
+def run_cadcad(
+    initial_state: dict,
+    sweep_params: dict[str, list],
+    blocks: list[dict],
+    N_timesteps: int,
+    N_samples: int,
+    assign_params: set | bool = True,
+    record: Collection[str] | None = None,
+    stride: int = 1,
+    sink: TrajectorySink | None = None,
+) -> DataFrame | None:
+    """
+    Equivalent of `easy_run` in single mode with `drop_substeps=True`, except
+    that the raw cadCAD records are reduced to the recorded variables and
+    timesteps before any dataframe is built.
+
+    Given a `sink`, subsets are run one at a time and each one's
+    trajectories are pushed into the sink as soon as they are done, and
+    nothing is returned.
+    """
+    if sink is not None:
+        n_subsets = max(len(v) for v in sweep_params.values())
+        for i in range(n_subsets):
+            subset_params = {k: [v[i]] if len(v) > 1 else v for k, v in sweep_params.items()}
+            df = run_cadcad(initial_state, subset_params, blocks, N_timesteps, N_samples,
+                            assign_params=assign_params, record=record, stride=stride)
+            df["subset"] = i
+            sink.write(df)
+        return None
+
+    experiment = Experiment()
+    experiment.append_configs(
+        sim_configs=config_sim({"N": N_samples, "T": range(N_timesteps), "M": sweep_params}),
+        initial_state=initial_state,
+        partial_state_update_blocks=blocks,
+    )
+    configs = experiment.configs
+    exec_context = ExecutionContext(ExecutionMode().single_mode, additional_objs={"deepcopy_off": True})
+    records, _, _ = Executor(exec_context=exec_context, configs=configs, supress_print=True).execute()
+
+    df = records_to_dataframe(records, N_timesteps, record, stride)
+    if assign_params is False or df.empty:
+        return df
+
+    selected = set(configs[0].sim_config["M"])
+    if assign_params is not True:
+        selected &= set(assign_params)
+    # cadCAD holds one config per (subset, run), in trajectory order
+    config_index = df.groupby(["simulation", "subset", "run"], sort=True).ngroup().to_numpy()
+    described = [select_M_dict(config.sim_config["M"], selected) for config in configs]
+    for k in described[0]:
+        values = [params[k] for params in described]
+        if all(isinstance(v, Number) for v in values):
+            per_config = np.asarray(values)
+        else:
+            per_config = np.empty(len(values), dtype=object)
+            per_config[:] = values
+        df[k] = per_config[config_index]
+    for k, per_config in derived_param_values(assign_params, [config.sim_config["M"] for config in configs]).items():
+        df[k] = per_config[config_index]
+    return df
+
+
+def simulate(
+    initial_state: dict,
+    sweep_params: dict[str, list],
+    blocks: list[dict],
+    timesteps: int,
+    samples: int,
+    assign_params: set | bool = True,
+    engine: str = "cadcad",
+    seed: int | None = None,
+    record: Collection[str] | None = None,
+    stride: int = 1,
+    sink: TrajectorySink | None = None,
+    resume: Checkpoint | None = None,
+    checkpoint: Callable[[Checkpoint], None] | None = None,
+    kpis: KPIAccumulator | None = None,
+) -> DataFrame | None:
+    """
+    Run a simulation through the selected engine.
+
+    `cadcad` runs every trajectory through cadCAD, while `vectorized`
+    steps all (subset, run) trajectories together as NumPy arrays. `numba`
+    is the vectorized engine with the deterministic policies compiled by
+    Numba, which must be installed. Given a `seed`, each (subset, run)
+    trajectory gets the same random draws on every engine.
+
+    Only the state variables in `record` (all if None) are kept, at every
+    `stride`-th timestep plus the final one. The trajectory id columns are
+    always kept.
+
+    Given a `sink`, results are pushed into it in batches while the
+    simulation runs instead of being returned.
+
+    The vectorized engines can `resume` trajectories from a checkpoint of
+    their state and hand a `checkpoint` of it on after the last timestep.
+    They also reduce the online `kpis` of every trajectory as it runs.
+
+    Returns:
+        DataFrame: A dataframe of simulation data, or None with a sink
+    """
+    if seed is not None:
+        sweep_params = seed_sweep(sweep_params, seed)
+    if engine == "cadcad":
+        if resume is not None or checkpoint is not None:
+            raise ValueError("Checkpoints need the vectorized or numba engine")
+        if kpis is not None:
+            raise ValueError("Online KPIs need the vectorized or numba engine")
+        return run_cadcad(
+            initial_state,
+            sweep_params,
+            blocks,
+            timesteps,
+            samples,
+            assign_params=assign_params,
+            record=record,
+            stride=stride,
+            sink=sink,
+        )
+    elif engine in ("vectorized", "numba"):
+        # Compared by label, as joblib workers receive copies of the blocks
+        if [b.get("label") for b in blocks] != [b.get("label") for b in SUBSPACE_MODEL_BLOCKS]:
+            raise ValueError(f"The {engine} engine only implements SUBSPACE_MODEL_BLOCKS")
+        return run_vectorized(
+            initial_state,
+            sweep_params,
+            timesteps,
+            samples,
+            assign_params=assign_params,
+            blocks=numba_model_blocks() if engine == "numba" else VECTORIZED_MODEL_BLOCKS,
+            record=record,
+            stride=stride,
+            sink=sink,
+            resume=resume,
+            checkpoint=checkpoint,
+            kpis=kpis,
+        )
+    else:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
 
 
 def sanity_check_run(
-    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 1, **kwargs
+    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 1, ENGINE: str = "cadcad", SEED: int | None = None, RECORDED_VARIABLES: Collection[str] | None = None, RECORD_STRIDE: int = 1, **kwargs
 ) -> DataFrame:
     """
     This experiment tests the model with default parameters and with deterministic parameters.
@@ -61,7 +253,7 @@ def sanity_check_run(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -70,15 +262,16 @@ def sanity_check_run(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
     )
     return sim_df
 
 
 def standard_stochastic_run(
-    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 5
+    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 5, ENGINE: str = "cadcad", SEED: int | None = None, RECORDED_VARIABLES: Collection[str] | None = None, RECORD_STRIDE: int = 1
 ) -> DataFrame:
     """Function which runs the cadCAD simulations
 
@@ -99,7 +292,7 @@ def standard_stochastic_run(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -108,9 +301,10 @@ def standard_stochastic_run(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
     )
     return sim_df
 
@@ -119,6 +313,10 @@ def reward_split_sweep(
     SIMULATION_DAYS: int = 183,
     TIMESTEP_IN_DAYS: int = 1,
     SAMPLES: int = 1,
+    ENGINE: str = "cadcad",
+    SEED: int | None = None,
+    RECORDED_VARIABLES: Collection[str] | None = None,
+    RECORD_STRIDE: int = 1,
 ) -> DataFrame:
     """Function which runs the cadCAD simulations
 
@@ -144,7 +342,7 @@ def reward_split_sweep(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -153,9 +351,10 @@ def reward_split_sweep(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
     )
     return sim_df
 
@@ -164,6 +363,10 @@ def sweep_credit_supply(
     SIMULATION_DAYS: int = 183,
     TIMESTEP_IN_DAYS: int = 1,
     SAMPLES: int = 1,
+    ENGINE: str = "cadcad",
+    SEED: int | None = None,
+    RECORDED_VARIABLES: Collection[str] | None = None,
+    RECORD_STRIDE: int = 1,
 ) -> DataFrame:
     """ """
     TIMESTEPS = int(SIMULATION_DAYS / TIMESTEP_IN_DAYS) + 1
@@ -235,7 +438,7 @@ def sweep_credit_supply(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -244,15 +447,16 @@ def sweep_credit_supply(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
     )
     return sim_df
 
 
 def initial_conditions(
-    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 30
+    SIMULATION_DAYS: int = 183, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 30, ENGINE: str = "cadcad", SEED: int | None = None, RECORDED_VARIABLES: Collection[str] | None = None, RECORD_STRIDE: int = 1
 ) -> DataFrame:
     """Function which runs the cadCAD simulations
 
@@ -273,7 +477,7 @@ def initial_conditions(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -282,15 +486,16 @@ def initial_conditions(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
     )
     return sim_df
 
 
 def reference_subsidy_sweep(
-    SIMULATION_DAYS: int = 360, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 1
+    SIMULATION_DAYS: int = 360, TIMESTEP_IN_DAYS: int = 1, SAMPLES: int = 1, ENGINE: str = "cadcad", SEED: int | None = None, RECORDED_VARIABLES: Collection[str] | None = None, RECORD_STRIDE: int = 1
 ) -> DataFrame:
     """Sweeps issuance functions.
 
@@ -329,7 +534,7 @@ def reference_subsidy_sweep(
     sim_args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, TIMESTEPS, SAMPLES)
 
     # Run simulation
-    sim_df = easy_run(
+    sim_df = simulate(
         *sim_args,
         assign_params={
             "label",
@@ -338,10 +543,354 @@ def reference_subsidy_sweep(
             "block_time_in_seconds",
             "max_credit_supply",
         },
-        exec_mode="single",
-        deepcopy_off=True,
-        supress_print=True
+        engine=ENGINE,
+        seed=SEED,
+        record=RECORDED_VARIABLES,
+        stride=RECORD_STRIDE,
+    )
+    return sim_df
+
+
+# Parameters attached as columns to PSuU timestep tensors
+PSUU_ASSIGN_PARAMS = {
+    "label",
+    "environmental_label",
+    "timestep_in_days",
+    "block_time_in_seconds",
+    "max_credit_supply",
+    *(GOVERNANCE_SURFACE.keys() - {"reference_subsidy_components"}),
+    # The subsidy components as flat numeric columns rather than objects
+    *GOVERNANCE_PARAM_COLUMNS.keys(),
+}
+
+
+def psuu_sweep_space() -> SweepSpace:
+    """
+    The PSuU sweep over the environmental scenarios and the governance
+    surface, with the reference subsidy grid factored for sampling designs.
+    """
+    return SweepSpace(
+        {
+            **{k: [v] for k, v in deepcopy(DEFAULT_PARAMS).items()},
+            **ENVIRONMENTAL_SCENARIOS,
+            **GOVERNANCE_SURFACE,
+        },
+        factors={"reference_subsidy_components": [
+            len(v) for v in MAINNET_REFERENCE_SUBSIDY_GRID.values()]},
+    )
+
+
+def new_run_folder(sim_folder_path: Path, prefix: str) -> Path:
+    """Create a run folder named after the current time."""
+    base_folder = f"{prefix}-{datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')}"
+    # Runs started within the same second get a suffix
+    folder, suffix = base_folder, 0
+    while (sim_folder_path / folder).exists():
+        suffix += 1
+        folder = f"{base_folder}-{suffix}"
+    output_folder_path = sim_folder_path / folder
+    output_folder_path.mkdir(parents=True, exist_ok=True)
+    return output_folder_path
+
+
+# Settings of a PSuU run that are recorded in its manifest and restored on resume
+PSUU_RUN_CONFIG_KEYS = (
+    "SIMULATION_DAYS",
+    "TIMESTEP_IN_DAYS",
+    "SAMPLES",
+    "N_SWEEP_SAMPLES",
+    "SWEEPS_PER_PROCESS",
+    "ENGINE",
+    "SEED",
+    "RECORDED_VARIABLES",
+    "RECORD_STRIDE",
+    "SINK",
+    "KPI_ONLY",
+    "SAMPLE_TRAJECTORIES",
+    "DESIGN",
+    "NORMALIZED",
+    "KPI_CACHE",
+)
+
+
+def psuu_parameter_hashes(sweep_space: SweepSpace, sample: dict[str, list[int]] | None,
+                          start: int, stop: int) -> list[str]:
+    """
+    Content hashes of the parameter sets of the sampled subsets `start` to
+    `stop`, from the canonical form of each of their values. Functions,
+    which have none, are taken by their position on their sweep axis.
+    """
+    if sample is None:
+        indices = {k: range(start, stop) for k in sweep_space.keys()}
+    else:
+        indices = {k: sample[k][start:stop] for k in sweep_space.keys()}
+    canonical: dict[tuple[str, int], Any] = {}
+
+    def parameter(k: str, i: int):
+        position = sweep_space.position(k, i)
+        if (k, position) not in canonical:
+            try:
+                canonical[k, position] = canonical_value(sweep_space.axes[k][position])
+            except TypeError:
+                canonical[k, position] = {"position": position}
+        return canonical[k, position]
+
+    return [content_hash({k: parameter(k, i) for k, i in zip(indices, combination)})
+            for combination in zip(*indices.values())]
+
+
+def parameter_seed(parameter_hash: str) -> int:
+    """A subset tag for seeding from a parameter hash, exact as a float64."""
+    return int(parameter_hash[:13], 16)
+
+
+def psuu_sweep_params(sweep_space: SweepSpace, sample: dict[str, list[int]] | None,
+                      start: int, stop: int, seed: int | None = None,
+                      content_seeded: bool = False) -> dict[str, list]:
+    """
+    Sweep parameters of the sampled subsets `start` to `stop` of a PSuU run.
+    A `content_seeded` subset is seeded by its parameter set rather than by
+    its position, so that its draws are the same in any sample.
+    """
+    if sample is None:
+        params = sweep_space.take(range(start, stop))
+    else:
+        params = sweep_space.take({k: indices[start:stop] for k, indices in sample.items()})
+    if seed is not None:
+        params = seed_sweep(params, seed, offset=start)
+        if content_seeded:
+            params["rng_subset"] = [parameter_seed(h)
+                                    for h in psuu_parameter_hashes(sweep_space, sample, start, stop)]
+    return params
+
+
+def run_psuu_chunk(run_dir: str | Path, i_chunk: int):
+    """
+    Run one chunk of a PSuU run with the settings and sweep sample recorded
+    in its manifest, and write the chunk's outputs to the run folder.
+    """
+    logger.debug(f"{i_chunk}, {datetime.now()}")
+    output_folder_path = Path(run_dir)
+    manifest = RunManifest.load(output_folder_path)
+    (SIMULATION_DAYS, TIMESTEP_IN_DAYS, SAMPLES, _, _, ENGINE, SEED, RECORDED_VARIABLES, RECORD_STRIDE,
+     SINK, KPI_ONLY, SAMPLE_TRAJECTORIES, _, NORMALIZED, KPI_CACHE) = (
+        manifest.config.get(k) for k in PSUU_RUN_CONFIG_KEYS)
+    TIMESTEPS = int(SIMULATION_DAYS / TIMESTEP_IN_DAYS) + 1
+    chunk = manifest.chunks[i_chunk]
+    subset_offset = chunk.start
+
+    sweep_params = psuu_sweep_params(psuu_sweep_space(), manifest.sample, chunk.start, chunk.stop, SEED,
+                                     content_seeded=KPI_CACHE is not None)
+    sim_args = (
+        INITIAL_STATE,
+        sweep_params,
+        SUBSPACE_MODEL_BLOCKS,
+        TIMESTEPS,
+        SAMPLES,
     )
+    # Normalized runs keep the parameters out of the timestep rows, and
+    # group trajectories by their ids before joining the chunk's parameters
+    parameters = parameter_table(sweep_params, PSUU_ASSIGN_PARAMS, subset_offset) if NORMALIZED else None
+    # The vectorized engines reduce the KPIs of KPI-only runs as they go
+    kpis = KPIAccumulator() if KPI_ONLY and ENGINE in ("vectorized", "numba") else None
+    record = RECORDED_VARIABLES
+    stride = RECORD_STRIDE
+    if KPI_ONLY and record is None and not SAMPLE_TRAJECTORIES:
+        if kpis is None:
+            record = KPI_STATE_VARIABLES
+        else:
+            # Nothing but the first and final trajectory ids
+            record, stride = [], TIMESTEPS
+    sim_kwargs = dict(
+        assign_params=False if NORMALIZED else PSUU_ASSIGN_PARAMS,
+        engine=ENGINE,
+        record=record,
+        stride=stride,
+    )
+
+    def prepare(batch: DataFrame) -> DataFrame:
+        batch["subset"] = subset_offset + batch["subset"]
+        return batch
+
+    output_filename = str(manifest.timestep_output_path(i_chunk))
+    if KPI_ONLY:
+        # Reduce each trajectory to its KPIs as soon as it finishes,
+        # keeping only a sample of the timestep tensor
+        kpi_sink = KPISink(TIMESTEPS, SAMPLE_TRAJECTORIES, seed=SEED, transform=prepare, kpis=kpis,
+                           parameters=parameters)
+        simulate(*sim_args, **sim_kwargs, sink=kpi_sink, kpis=kpis)
+        kpi_sink.sample_dataframe().to_pickle(output_filename)
+    elif SINK is None:
+        # Run simulationz
+        sim_df = simulate(*sim_args, **sim_kwargs)
+        sim_df["subset"] = subset_offset + sim_df["subset"]
+        sim_df.to_pickle(output_filename)
+    else:
+        # Stream the timestep tensor to disk as the chunk runs
+        with SINKS[SINK](output_filename, transform=prepare) as sink:
+            simulate(*sim_args, **sim_kwargs, sink=sink)
+
+    if KPI_ONLY:
+        agg_df = kpi_sink.to_dataframe().reset_index()
+    else:
+        if SINK is not None:
+            # Read back only what the KPIs need
+            columns = kpi_input_columns(sink.schema.names)
+            sim_df = read_sink(output_filename, columns=columns)
+        agg_df = timestep_tensor_to_trajectory_tensor(sim_df, parameters).reset_index()
+    write_chunk_trajectory_tensor(manifest, i_chunk, agg_df)
+
+
+def write_chunk_trajectory_tensor(manifest: RunManifest, i_chunk: int, agg_df: DataFrame):
+    agg_output_filename = manifest.output_path(i_chunk)
+    if manifest.config.get("SINK") == "dataset":
+        with ParquetDatasetSink(agg_output_filename, partition_cols=()) as agg_sink:
+            agg_sink.write(agg_df)
+    else:
+        agg_df.to_pickle(agg_output_filename)
+
+
+def read_chunk_trajectory_tensor(manifest: RunManifest, i_chunk: int) -> DataFrame:
+    if manifest.config.get("SINK") == "dataset":
+        return read_sink(manifest.output_path(i_chunk))
+    return pd.read_pickle(manifest.output_path(i_chunk))
+
+
+def try_psuu_chunk(run_dir: str | Path, i_chunk: int) -> tuple:
+    """
+    Run a PSuU chunk, returning rather than raising its error along with
+    when and where it ran.
+    """
+    started_at = datetime.now().isoformat()
+    try:
+        run_psuu_chunk(run_dir, i_chunk)
+        error = None
+    except Exception as e:
+        logger.exception(f"PSuU chunk {i_chunk} failed")
+        error = f"{type(e).__name__}: {e}"
+    return i_chunk, error, started_at, datetime.now().isoformat(), os.getpid()
+
+
+def psuu_sample(sweep_space: SweepSpace, N_SWEEP_SAMPLES: int, DESIGN: str, SEED: int | None,
+                manifest: RunManifest | None = None) -> dict[str, list[int]] | None:
+    """
+    The subsets of a PSuU run, as the combination indices of their values
+    on every axis: those recorded in the `manifest` of a resumed run, a
+    `DESIGN` sample of `N_SWEEP_SAMPLES`, or None for the whole space.
+    """
+    if manifest is not None:
+        if manifest.n_combinations != len(sweep_space):
+            raise ValueError(
+                f"The sweep space has changed since {manifest.run_dir} was created "
+                f"({len(sweep_space):,} combinations instead of {manifest.n_combinations:,})")
+        return manifest.sample
+    if N_SWEEP_SAMPLES > 0:
+        return sample_design(sweep_space, N_SWEEP_SAMPLES, DESIGN, SEED, strata=ENVIRONMENTAL_SCENARIOS)
+    return None
+
+
+def psuu_trajectory_keys(sweep_space: SweepSpace, sample: dict[str, list[int]] | None, n_sweeps: int,
+                         samples: int, context: dict) -> list[list[str]]:
+    """
+    The KPI cache keys of every run of every subset, hashing its parameter
+    set along with the `context` that its KPIs also depend on.
+    """
+    return [[content_hash({**context, "parameters": h, "run": run}) for run in range(1, samples + 1)]
+            for h in psuu_parameter_hashes(sweep_space, sample, 0, n_sweeps)]
+
+
+def partition_cached_subsets(kpi_cache: KPICache, sweep_space: SweepSpace, sample: dict[str, list[int]] | None,
+                             trajectory_keys: list[list[str]]) -> tuple[dict[str, list[int]], list[list[str]],
+                                                                        dict[str, dict], int]:
+    """
+    Move the subsets whose trajectories are all in `kpi_cache` to the end
+    of the sample, to be written as one finished chunk. Returns the sample
+    and trajectory keys in that order, the cached rows, and the number of
+    subsets left to simulate.
+    """
+    n_sweeps = len(trajectory_keys)
+    cached_rows = kpi_cache.get_many(key for keys in trajectory_keys for key in keys)
+    is_cached = [all(key in cached_rows for key in keys) for keys in trajectory_keys]
+    order = sorted(range(n_sweeps), key=is_cached.__getitem__)
+    if sample is None:
+        sample = {k: list(range(n_sweeps)) for k in sweep_space.keys()}
+    sample = {k: [indices[i] for i in order] for k, indices in sample.items()}
+    return sample, [trajectory_keys[i] for i in order], cached_rows, is_cached.count(False)
+
+
+def psuu_chunk_bounds(subset_costs: list[float], n_simulated: int, processes: int, chunk_size: int,
+                      balanced: bool) -> list[tuple[int, int]]:
+    """
+    The (start, stop) subsets of every chunk of a new run. The first
+    `n_simulated` subsets are split into chunks of about equal cost for
+    `processes` workers when `balanced`, or of `chunk_size` subsets
+    otherwise, and the cached subsets after them make one more chunk.
+    """
+    if balanced:
+        bounds = plan_chunks(subset_costs[:n_simulated], max(processes, 1), chunk_size)
+    else:
+        bounds = [(i, min(i + chunk_size, n_simulated)) for i in range(0, n_simulated, chunk_size)]
+    if n_simulated < len(subset_costs):
+        bounds.append((n_simulated, len(subset_costs)))
+    return bounds
+
+
+def write_cached_chunk(manifest: RunManifest, cached_rows: dict[str, dict], trajectory_keys: list[list[str]]):
+    """Write the last chunk of a new run, whose subsets are all cached, as finished."""
+    i_chunk = len(manifest.chunks) - 1
+    chunk = manifest.chunks[i_chunk]
+    write_chunk_trajectory_tensor(manifest, i_chunk, pd.DataFrame(
+        [{"simulation": 0, "subset": subset, "run": run, **cached_rows[key]}
+         for subset in range(chunk.start, chunk.stop)
+         for run, key in enumerate(trajectory_keys[subset], start=1)]))
+    manifest.mark(i_chunk, DONE)
+
+
+def cache_chunk_trajectory_tensor(kpi_cache: KPICache, trajectory_keys: list[list[str]], agg_df: DataFrame):
+    """Cache the trajectory tensor rows of a finished chunk."""
+    rows = agg_df.drop(columns=['simulation', 'subset', 'run']).to_dict("records")
+    kpi_cache.put_many({trajectory_keys[subset][run - 1]: row
+                        for subset, run, row in zip(agg_df.subset, agg_df.run, rows)})
+
+
+def run_psuu_chunks(run_dir: Path, chunks: list[int], processes: int, use_joblib: bool = True,
+                    queue: str | None = None) -> Iterable[tuple]:
+    """
+    Run the `chunks` of a PSuU run in order and yield the `try_psuu_chunk`
+    result of each as it finishes. Chunks are spooled to the `queue` folder
+    for its workers, handed to a joblib pool of `processes`, or run one
+    after another in this process.
+    """
+    if queue is not None:
+        return coordinate(queue, run_dir, chunks, local_workers=processes)
+    if use_joblib:
+        return Parallel(n_jobs=processes, return_as="generator_unordered", batch_size=1, pre_dispatch="n_jobs")(
+            delayed(try_psuu_chunk)(run_dir, i_chunk) for i_chunk in chunks)
+    return (try_psuu_chunk(run_dir, i_chunk) for i_chunk in chunks)
+
+
+def write_trajectory_tensor(manifest: RunManifest) -> Path:
+    """Combine the trajectory tensors of a run's chunks into its trajectory_tensor.pkl.gz."""
+    path = Path(manifest.run_dir) / "trajectory_tensor.pkl.gz"
+    pd.concat(pd.read_pickle(manifest.output_path(i_chunk)).reset_index()
+              for i_chunk in range(len(manifest.chunks))).to_pickle(str(path))
+    return path
+
+
+def read_psuu_timestep_tensor(manifest: RunManifest) -> DataFrame:
+    """
+    The timestep tensor of a finished PSuU run, or the sampled trajectories
+    of a KPI-only run, with the parameters of a normalized run joined.
+    """
+    run_dir = Path(manifest.run_dir)
+    if manifest.config.get("KPI_ONLY"):
+        sim_df = pd.concat([pd.read_pickle(part, compression="gzip")
+                            for part in glob(str(run_dir / "timestep_sample-*"))])
+    else:
+        sim_df = pd.concat([pd.read_pickle(part, compression="gzip") if manifest.config.get("SINK") is None
+                            else read_sink(part) for part in glob(str(run_dir / "timestep_tensor") + "*")])
+    if manifest.config.get("NORMALIZED") and len(sim_df):
+        sim_df = join_parameters(sim_df, pd.read_pickle(manifest.parameters_path))
     return sim_df
 
 
@@ -356,52 +905,125 @@ def psuu(
     USE_JOBLIB: bool = True,
     RETURN_SIM_DF: bool = False,
     UPLOAD_TO_S3: bool = False,
+    UPLOAD_TO: str | None = None,
+    ENGINE: str = "cadcad",
+    SEED: int | None = None,
+    RECORDED_VARIABLES: Collection[str] | None = None,
+    RECORD_STRIDE: int = 1,
+    SINK: str | None = None,
+    KPI_ONLY: bool = False,
+    SAMPLE_TRAJECTORIES: float = 0.0,
+    DESIGN: str = "random",
+    RESUME: str | None = None,
+    QUEUE: str | None = None,
+    NORMALIZED: bool = False,
+    KPI_CACHE: str | None = None,
 ):
     """Function which runs the cadCAD simulations
 
+    Pass `RECORDED_VARIABLES=KPI_STATE_VARIABLES` to record only what the
+    PSuU KPIs need. A `RECORD_STRIDE` above 1 changes KPIs that sum or
+    difference over timesteps.
+
+    With `SINK` set to "parquet" or "arrow", each chunk's timestep tensor is
+    streamed to a file of that format while it runs instead of being pickled
+    from a single DataFrame. With "dataset", the timestep and trajectory
+    tensors are written as zstd Parquet datasets partitioned by chunk (and
+    subset), with typed columns and the subsidy components as flat numeric
+    columns, which `read_sink` can read by column and partition.
+
+    Chunked runs keep a manifest of the sweep sample and of each chunk's
+    status in their run folder. Passing that folder as `RESUME` reruns only
+    the chunks that are missing or failed, with the settings recorded in the
+    manifest, and then writes the combined trajectory tensor.
+
+    With joblib, the sampled subsets are split into chunks of about equal
+    cost, estimated from the chunk timings of earlier runs, with at most
+    `SWEEPS_PER_PROCESS` subsets each. The most expensive chunks are handed
+    out first and per-worker utilization is logged at the end.
+
+    With `KPI_ONLY`, each trajectory is reduced to its row of the trajectory
+    tensor as it finishes, and no timestep tensor is written except for a
+    random `SAMPLE_TRAJECTORIES` fraction of the trajectories, which is kept
+    in each chunk's timestep_sample file.
+
+    `DESIGN` picks how the `N_SWEEP_SAMPLES` subsets are drawn: "random",
+    a Latin hypercube ("lhs") or scrambled Sobol sequence ("sobol") over the
+    environmental scenarios and the governance surface, with every factor
+    of the reference subsidy grid as its own dimension, or "stratified",
+    an equal share per environmental scenario with a Latin hypercube over
+    the governance surface within each.
+
+    With a `QUEUE` folder, chunks are spooled there instead of being run by
+    joblib, for `python -m subspace_model worker --queue QUEUE` processes on
+    any host that shares the folder and the run folders at the same paths.
+    `PROCESSES` of those workers are started here as well. Chunks of
+    workers whose heartbeat stops are handed to another worker.
+
+    With `NORMALIZED`, timestep tensors hold no parameter columns: the
+    parameters of every subset are written once to the run's
+    parameters.pkl.gz, indexed by (simulation, subset), which
+    `join_parameters` attaches to rows on demand.
+
+    Chunk outputs are uploaded to `UPLOAD_TO`, an `s3://bucket/prefix` URL
+    or a folder, from background threads as each chunk finishes, so the
+    simulation never waits on the network. Uploaded timestep tensors are
+    removed locally. `UPLOAD_TO_S3` uploads to the simulations bucket.
+
+    With a `KPI_CACHE` folder, the trajectory tensor rows of every finished
+    chunk are cached there under a hash of their parameter set, seed, run,
+    simulation settings and model source, and subsets whose trajectories
+    are all cached are taken from it as one finished chunk instead of being
+    simulated. Subsets are then seeded by their parameter set rather than
+    their position in the sample, so a trajectory's draws, and hence its
+    cached KPIs, are the same in every run. Cached subsets have no timestep
+    tensor.
+
     Returns:
         DataFrame: A dataframe of simulation data
     """
 
+    if RESUME is not None:
+        if not PARALLELIZE:
+            raise ValueError("Only chunked runs can be resumed")
+        manifest = RunManifest.load(RESUME)
+        (SIMULATION_DAYS, TIMESTEP_IN_DAYS, SAMPLES, N_SWEEP_SAMPLES, SWEEPS_PER_PROCESS,
+         ENGINE, SEED, RECORDED_VARIABLES, RECORD_STRIDE, SINK, KPI_ONLY, SAMPLE_TRAJECTORIES,
+         DESIGN, NORMALIZED, KPI_CACHE) = (manifest.config.get(k) for k in PSUU_RUN_CONFIG_KEYS)
+
+    if KPI_ONLY and not PARALLELIZE:
+        raise ValueError("KPI_ONLY needs a chunked run")
+    if NORMALIZED and not PARALLELIZE:
+        raise ValueError("NORMALIZED needs a chunked run")
+    if KPI_CACHE is not None and (SEED is None or not PARALLELIZE):
+        raise ValueError("KPI_CACHE needs a seeded, chunked run")
+    if QUEUE is not None and not PARALLELIZE:
+        raise ValueError("Only chunked runs can be queued")
+    if UPLOAD_TO_S3 and UPLOAD_TO is None:
+        UPLOAD_TO = f"s3://{CLOUD_BUCKET_NAME}"
+    if UPLOAD_TO is not None and not PARALLELIZE:
+        raise ValueError("Only chunked runs can be uploaded")
+
+    if SINK is not None and SINK not in SINKS:
+        raise ValueError(f"Unknown sink '{SINK}', expected one of {tuple(SINKS)}")
+
+    # Manifests written before designs existed sampled at random
+    DESIGN = DESIGN or "random"
+    if DESIGN not in DESIGNS:
+        raise ValueError(f"Unknown design '{DESIGN}', expected one of {DESIGNS}")
+
     invoke_time = datetime.now()
     logger.info(f"PSuU Exploratory Run invoked at {invoke_time}")
 
     TIMESTEPS = int(SIMULATION_DAYS / TIMESTEP_IN_DAYS) + 1
 
-    default_params = deepcopy(DEFAULT_PARAMS)
-
-    sweep_params = sweep_cartesian_product(
-        {
-            **{k: [v] for k, v in default_params.items()},
-            **ENVIRONMENTAL_SCENARIOS,
-            **GOVERNANCE_SURFACE,
-        }
-    )
-
-    # Sample the sweep space
-    sweep_params_samples = {
-        k: sample(v, N_SWEEP_SAMPLES) if N_SWEEP_SAMPLES > 0 else v
-        for k, v in sweep_params.items()
-    }
+    # Combinations are decoded from their index only when they are run
+    sweep_space = psuu_sweep_space()
 
-    # Load simulation arguments
-    sim_args = (
-        INITIAL_STATE,
-        sweep_params_samples,
-        SUBSPACE_MODEL_BLOCKS,
-        TIMESTEPS,
-        SAMPLES,
-    )
-    assign_params = {
-        "label",
-        "environmental_label",
-        "timestep_in_days",
-        "block_time_in_seconds",
-        "max_credit_supply",
-        *GOVERNANCE_SURFACE.keys(),
-    }
+    sweep_combinations = len(sweep_space)
 
-    sweep_combinations = len(sweep_params['label'])
+    # Sample the sweep space, as indices so that the sample can be recorded
+    sample = psuu_sample(sweep_space, N_SWEEP_SAMPLES, DESIGN, SEED, manifest if RESUME is not None else None)
 
     n_sweeps = N_SWEEP_SAMPLES if N_SWEEP_SAMPLES > 0 else sweep_combinations
     N_measurements = n_sweeps * TIMESTEPS * SAMPLES
@@ -412,125 +1034,288 @@ def psuu(
     logger.info(f"PSuU Exploratory Run Dimensions: N_jobs={PROCESSES=:,}, N_t={TIMESTEPS=:,}, N_sweeps={n_sweeps:,}, N_mc={SAMPLES:,}, N_trajectories={traj_combinations:,}, N_measurements={N_measurements:,}")
 
 
-    parallelize = PARALLELIZE
-    use_joblib = USE_JOBLIB
-
-
     sim_start_time = datetime.now()
     logger.info(f"PSuU Exploratory Run starting at {sim_start_time}, ({sim_start_time - invoke_time} since invoke)")
-    if parallelize is False:
+    if PARALLELIZE is False:
         # Load simulation arguments
         sim_args = (
             INITIAL_STATE,
-            sweep_params_samples,
+            psuu_sweep_params(sweep_space, sample, 0, n_sweeps, SEED),
             SUBSPACE_MODEL_BLOCKS,
             TIMESTEPS,
             SAMPLES,
         )
         # Run simulation and write results to disk
-        sim_df = easy_run(
+        sim_df = simulate(
             *sim_args,
-            exec_mode="single",
-            assign_params=assign_params,
-            deepcopy_off=True,
-            supress_print=True
+            assign_params=PSUU_ASSIGN_PARAMS,
+            engine=ENGINE,
+            record=RECORDED_VARIABLES,
+            stride=RECORD_STRIDE,
         )
     else:
-        sweeps_per_process = SWEEPS_PER_PROCESS
-        processes = PROCESSES
-
-        chunk_size = sweeps_per_process
-        split_dicts = [
-            {k: v[i : i + chunk_size] for k, v in sweep_params_samples.items()}
-            for i in range(0, len(list(sweep_params_samples.values())[0]), chunk_size)
-        ]
-        sim_folder_path = Path("data/simulations")
-        base_folder = Path(f"psuu_run-{datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')}")
-        output_folder_path =sim_folder_path / base_folder
-        output_folder_path.mkdir(parents=True, exist_ok=True)
-
-        output_path = str(output_folder_path / "timestep_tensor")
-
-        def run_chunk(i_chunk, sweep_params, pickle_file=True, upload_to_s3=UPLOAD_TO_S3, post_process=True):
-            logger.debug(f"{i_chunk}, {datetime.now()}")
-            sim_args = (
-                INITIAL_STATE,
-                sweep_params,
-                SUBSPACE_MODEL_BLOCKS,
-                TIMESTEPS,
-                SAMPLES,
-            )
-            # Run simulationz
-            sim_df = easy_run(
-                *sim_args,
-                exec_mode="single",
-                assign_params=assign_params,
-                deepcopy_off=True,
-                supress_print=True
-            )
-
-            if upload_to_s3:
-                session = boto3.Session()
-                s3 = session.client("s3")
-
-            sim_df["subset"] = i_chunk * SWEEPS_PER_PROCESS + sim_df["subset"]
-            output_filename = output_path + f"-{i_chunk}.pkl.gz"
-
-            if pickle_file or upload_to_s3:
-                sim_df.to_pickle(output_filename)
-            if upload_to_s3:
-                s3.upload_file(str(output_filename),
-                CLOUD_BUCKET_NAME,
-                str(base_folder / f"timestep_tensor-{i_chunk}.pkl.gz") 
-                )
-                os.remove(str(output_filename))
-
-
-            if post_process:
-                agg_df = timestep_tensor_to_trajectory_tensor(sim_df).reset_index()
-                agg_output_filename = output_folder_path / f"trajectory_tensor-{i_chunk}.pkl.gz"
-                if pickle_file:
-                    agg_df.to_pickle(agg_output_filename)
-                    if upload_to_s3:
-                        s3.upload_file(str(agg_output_filename),
-                                       CLOUD_BUCKET_NAME,
-                                       str(base_folder / f"trajectory_tensor-{i_chunk}.pkl.gz"))
-
-        args = enumerate(split_dicts)
-        if use_joblib:
-            Parallel(n_jobs=processes)(
-                delayed(run_chunk)(i_chunk, sweep_params)
-                for (i_chunk, sweep_params) in tqdm(args, desc='Simulation Chunks', total=len(split_dicts))
-            )
+        if RESUME is not None:
+            output_folder_path = Path(RESUME)
         else:
-            for i_chunk, sweep_params in tqdm(args):
-                run_chunk(i_chunk, sweep_params)
-
+            output_folder_path = new_run_folder(Path("data/simulations"), "psuu_run")
+        sim_folder_path = output_folder_path.parent
+        base_folder = Path(output_folder_path.name)
+
+        kpi_cache = None
+        n_simulated = n_sweeps
+        if KPI_CACHE is not None:
+            kpi_cache = KPICache(KPI_CACHE)
+            # Everything but its parameter set and run that a trajectory's KPIs depend on
+            trajectory_context = {
+                "MODEL": model_fingerprint(),
+                "SIMULATION_DAYS": SIMULATION_DAYS,
+                "TIMESTEP_IN_DAYS": TIMESTEP_IN_DAYS,
+                "ENGINE": ENGINE,
+                "SEED": SEED,
+                "RECORD_STRIDE": RECORD_STRIDE,
+                "KPI_ONLY": KPI_ONLY,
+            }
+            trajectory_keys = psuu_trajectory_keys(sweep_space, sample, n_sweeps, SAMPLES, trajectory_context)
+            if RESUME is None:
+                sample, trajectory_keys, cached_rows, n_simulated = partition_cached_subsets(
+                    kpi_cache, sweep_space, sample, trajectory_keys)
+                logger.info(f"{n_sweeps - n_simulated:,} of {n_sweeps:,} subsets found in the KPI cache")
+
+        # Estimate each subset's cost from the chunk timings of earlier runs
+        cost_model = CostModel.from_manifests(
+            (p for p in sim_folder_path.iterdir() if p != output_folder_path), sweep_space)
+        subset_costs = cost_model.estimate(
+            ENGINE, sample_subsets(sweep_space, sample, cost_model.features), TIMESTEPS * SAMPLES)
+
+        if RESUME is None:
+            chunk_bounds = psuu_chunk_bounds(subset_costs, n_simulated, PROCESSES, SWEEPS_PER_PROCESS,
+                                             balanced=USE_JOBLIB or QUEUE is not None)
+            manifest = RunManifest(
+                run_dir=str(output_folder_path),
+                config={
+                    "SIMULATION_DAYS": SIMULATION_DAYS,
+                    "TIMESTEP_IN_DAYS": TIMESTEP_IN_DAYS,
+                    "SAMPLES": SAMPLES,
+                    "N_SWEEP_SAMPLES": N_SWEEP_SAMPLES,
+                    "SWEEPS_PER_PROCESS": SWEEPS_PER_PROCESS,
+                    "ENGINE": ENGINE,
+                    "SEED": SEED,
+                    "RECORDED_VARIABLES": None if RECORDED_VARIABLES is None else list(RECORDED_VARIABLES),
+                    "RECORD_STRIDE": RECORD_STRIDE,
+                    "SINK": SINK,
+                    "KPI_ONLY": KPI_ONLY,
+                    "SAMPLE_TRAJECTORIES": SAMPLE_TRAJECTORIES,
+                    "DESIGN": DESIGN,
+                    "NORMALIZED": NORMALIZED,
+                    "KPI_CACHE": KPI_CACHE,
+                },
+                n_combinations=sweep_combinations,
+                sample=sample,
+                chunks=[ChunkRecord(start, stop) for start, stop in chunk_bounds],
+            )
+            manifest.save()
+            if n_simulated < n_sweeps:
+                write_cached_chunk(manifest, cached_rows, trajectory_keys)
+            if NORMALIZED:
+                parameter_table(psuu_sweep_params(sweep_space, sample, 0, n_sweeps, SEED,
+                                                  content_seeded=KPI_CACHE is not None),
+                                PSUU_ASSIGN_PARAMS).to_pickle(manifest.parameters_path)
+
+        pending = set(manifest.pending())
+        if RESUME is not None:
+            logger.info(f"Resuming {RESUME}: {len(pending)} of {len(manifest.chunks)} chunks to run")
+        # The most expensive chunks go first, and each worker takes the next
+        # chunk as soon as it is free
+        order = dispatch_order([(chunk.start, chunk.stop) for chunk in manifest.chunks], subset_costs)
+        # Each chunk is decoded from the manifest by whichever worker runs it
+        results = run_psuu_chunks(output_folder_path, [i for i in order if i in pending],
+                                  PROCESSES, USE_JOBLIB, QUEUE)
+        # One uploader for the whole run, which the chunks' outputs are
+        # handed to as they finish
+        uploader = Uploader(upload_backend(UPLOAD_TO)) if UPLOAD_TO is not None else None
+
+        def upload(path: Path, remove: bool = False):
+            if uploader is not None:
+                uploader.submit(path, base_folder / path.relative_to(output_folder_path), remove)
+
+        # The chunk taken from the KPI cache finished before the others started
+        if RESUME is None and n_simulated < n_sweeps:
+            upload(manifest.output_path(len(manifest.chunks) - 1))
+
+        # Record each chunk as it finishes so that an interrupted run can be resumed
+        for i_chunk, error, started_at, finished_at, worker in tqdm(results, desc='Simulation Chunks', total=len(pending)):
+            manifest.mark(i_chunk, FAILED if error else DONE, error, started_at, finished_at, worker)
+            if not error:
+                if kpi_cache is not None:
+                    cache_chunk_trajectory_tensor(kpi_cache, trajectory_keys,
+                                                  read_chunk_trajectory_tensor(manifest, i_chunk))
+                upload(manifest.output_path(i_chunk))
+                upload(manifest.timestep_output_path(i_chunk), remove=True)
+        logger.info(utilization_report(manifest))
+        if kpi_cache is not None:
+            kpi_cache.close()
+
+        if failed := manifest.pending():
+            if uploader is not None:
+                uploader.close()
+            raise RuntimeError(
+                f"{len(failed)} of {len(manifest.chunks)} PSuU chunks failed ({failed}), "
+                f"rerun them with --resume {output_folder_path}")
+
+        # Combine the chunks' trajectory tensors, which a dataset already does
+        if SINK != "dataset":
+            upload(write_trajectory_tensor(manifest))
+        if NORMALIZED:
+            upload(manifest.parameters_path)
+        if uploader is not None:
+            uploader.close()
+            logger.info(f"Uploaded {uploader.uploaded_bytes / 2**20:,.1f} MiB to {UPLOAD_TO}")
+        manifest.finalized = True
+        manifest.save()
 
         if RETURN_SIM_DF:
-            sim_df = pd.concat(
-                [pd.read_pickle(part, compression="gzip") for part in glob(output_path+"*")]
-            )
+            sim_df = read_psuu_timestep_tensor(manifest)
 
     end_start_time = datetime.now()
     duration: float = (end_start_time - sim_start_time).total_seconds()
     logger.info(f"PSuU Run finished at {end_start_time}, ({end_start_time - sim_start_time} since sim start)")
-    logger.info(f"PSuU Run Performance Numbers; Duration (s): {duration:,.2f}, Measurements Per Second: {N_measurements/duration:,.2f} M/s, Measurements per Job * Second: {N_measurements/(duration * PROCESSES):,.2f} M/(J*s)")
+    logger.info(f"PSuU Run Performance Numbers; Duration (s): {duration:,.2f}, Measurements Per Second: {N_measurements/duration:,.2f} M/s, Measurements per Job * Second: {N_measurements/(duration * max(PROCESSES, 1)):,.2f} M/(J*s)")
     if RETURN_SIM_DF:
         return sim_df # type: ignore
-    else:
-        pass
-
-    if use_joblib and UPLOAD_TO_S3:
-        files = glob(str(output_folder_path / f"trajectory_tensor-*.pkl.gz"))
-        dfs = []
-        for file in files:
-            dfs.append(pd.read_pickle(file).reset_index())
-        agg_df = pd.concat(dfs)
-        agg_df.to_pickle(str(output_folder_path / f"trajectory_tensor.pkl.gz"))
-        session = boto3.Session()
-        s3 = session.client("s3")
-        s3.upload_file(str(output_folder_path / f"trajectory_tensor.pkl.gz"),
-                        CLOUD_BUCKET_NAME,
-                        str(base_folder / f"trajectory_tensor.pkl.gz"))
+    return None
+
+
+def psuu_successive_halving(
+    SIMULATION_DAYS: int = 3 * 365,
+    TIMESTEP_IN_DAYS: int = 1,
+    SAMPLES: int = 2,
+    N_SWEEP_SAMPLES: int = 48,
+    SWEEPS_PER_PROCESS: int = 20,
+    PROCESSES: int = cpu_count(),
+    RETURN_SIM_DF: bool = False,
+    ENGINE: str = "vectorized",
+    SEED: int | None = None,
+    DESIGN: str = "random",
+    RUNG_DAYS: Collection[int] = (365,),
+    KEEP_FRACTION: float = 1 / 3,
+    **kwargs
+) -> DataFrame | None:
+    """
+    PSuU with successive halving: every sampled subset is simulated up to
+    the first of `RUNG_DAYS`, scored on its KPIs so far, and only the best
+    `KEEP_FRACTION` of the subsets are resumed from their checkpoints to the
+    next rung, up to `SIMULATION_DAYS`.
+
+    Subsets are scored like the PSuU "Combined" goal, by how many of their
+    KPIs, averaged over runs, beat the median of the remaining subsets.
+    The run folder holds the timestep tensor of every trajectory as far as
+    it went, the trajectory tensor with the KPIs at that horizon in
+    `simulated_days`, and the compute of every rung in halving.json.
+
+    Returns:
+        DataFrame: The timestep tensor, if `RETURN_SIM_DF`
+    """
+    if ENGINE not in ("vectorized", "numba"):
+        raise ValueError(f"Successive halving resumes from checkpoints, which the {ENGINE} engine does not have")
+    if not 0 < KEEP_FRACTION <= 1:
+        raise ValueError(f"KEEP_FRACTION must be in (0, 1], got {KEEP_FRACTION}")
+    if DESIGN not in DESIGNS:
+        raise ValueError(f"Unknown design '{DESIGN}', expected one of {DESIGNS}")
+
+    invoke_time = datetime.now()
+    TIMESTEPS = int(SIMULATION_DAYS / TIMESTEP_IN_DAYS) + 1
+    rungs = sorted({int(days / TIMESTEP_IN_DAYS) + 1 for days in RUNG_DAYS if days < SIMULATION_DAYS} | {TIMESTEPS})
+
+    sweep_space = psuu_sweep_space()
+    sample = psuu_sample(sweep_space, N_SWEEP_SAMPLES, DESIGN, SEED)
+    n_subsets = N_SWEEP_SAMPLES if N_SWEEP_SAMPLES > 0 else len(sweep_space)
+
+    def candidate_params(subsets: list[int]) -> dict[str, list]:
+        if sample is None:
+            params = sweep_space.take(subsets)
+        else:
+            params = sweep_space.take({k: [indices[i] for i in subsets] for k, indices in sample.items()})
+        if SEED is not None:
+            params = {**seed_sweep(params, SEED), "rng_subset": list(subsets)}
+        return params
+
+    def run_rung(subsets: list[int], timesteps: int, resume: Checkpoint | None):
+        checkpoints: list[Checkpoint] = []
+        df = simulate(INITIAL_STATE, candidate_params(subsets), SUBSPACE_MODEL_BLOCKS, timesteps, SAMPLES,
+                      assign_params=PSUU_ASSIGN_PARAMS, engine=ENGINE, record=KPI_STATE_VARIABLES,
+                      resume=resume, checkpoint=checkpoints.append)
+        df = expand_governance_columns(df)
+        checkpoint = checkpoints[0]
+        if resume is None:
+            # Label trajectories by subset in the whole sample
+            ids = np.asarray(subsets)
+            df["subset"] = ids[df["subset"].to_numpy()]
+            row = checkpoint.keys.index("subset")
+            checkpoint.values[row] = ids[checkpoint.values[row].astype(int)]
+        return df, checkpoint
+
+    candidates = list(range(n_subsets))
+    checkpoint: Checkpoint | None = None
+
+    def resume_from(subsets: list[int]) -> Checkpoint | None:
+        if checkpoint is None:
+            return None
+        return checkpoint.take(np.isin(checkpoint.state()["subset"], subsets))
+
+    history: list[DataFrame] = []
+    reached = {}
+    report = []
+    previous = 0
+    for rung in rungs:
+        rung_start = datetime.now()
+        chunks = [candidates[i:i + SWEEPS_PER_PROCESS] for i in range(0, len(candidates), SWEEPS_PER_PROCESS)]
+        results = Parallel(n_jobs=min(PROCESSES, len(chunks)))(
+            delayed(run_rung)(subsets, rung, resume_from(subsets)) for subsets in chunks)
+        history.extend(df for df, _ in results)
+        checkpoint = Checkpoint.concat(c for _, c in results)
+        # Keep trajectories in (subset, run) order for the next rung
+        state = checkpoint.state()
+        checkpoint = checkpoint.take(np.lexsort((state["run"], state["subset"])))
+        reached.update({subset: rung for subset in candidates})
+        report.append({"simulated_days": (rung - 1) * TIMESTEP_IN_DAYS,
+                       "subsets": len(candidates),
+                       "trajectory_timesteps": len(candidates) * SAMPLES * (rung - previous),
+                       "duration_s": (datetime.now() - rung_start).total_seconds()})
+        logger.info(f"Successive halving rung {len(report)}/{len(rungs)}: {len(candidates):,} subsets "
+                    f"to timestep {rung:,} in {report[-1]['duration_s']:,.2f}s")
+        previous = rung
+        if rung == TIMESTEPS:
+            break
+
+        sim_df = pd.concat(history)
+        partial = timestep_tensor_to_trajectory_tensor(sim_df[sim_df.subset.isin(candidates)]).reset_index()
+        kpis = partial.groupby("subset")[list(KPI_functions)].mean()
+        scores = calculate_goal_score(kpis, "Combined", "score")["score"]
+        n_keep = max(1, ceil(len(candidates) * KEEP_FRACTION))
+        candidates = sorted(scores.sort_values(ascending=False, kind="stable").index[:n_keep])
+
+    sim_df = pd.concat(history).sort_values(["subset", "run", "timestep"], ignore_index=True)
+    agg_df = pd.concat(
+        timestep_tensor_to_trajectory_tensor(sim_df[sim_df.subset.map(reached) == rung]).reset_index()
+        for rung in sorted(set(reached.values())))
+    agg_df["simulated_days"] = agg_df.subset.map(lambda subset: (reached[subset] - 1) * TIMESTEP_IN_DAYS)
+
+    simulated = sum(r["trajectory_timesteps"] for r in report)
+    exhaustive = n_subsets * SAMPLES * TIMESTEPS
+    summary = {"rungs": report,
+               "trajectory_timesteps": simulated,
+               "exhaustive_trajectory_timesteps": exhaustive,
+               "saved_fraction": 1 - simulated / exhaustive,
+               "duration_s": (datetime.now() - invoke_time).total_seconds()}
+    logger.info(f"Successive halving simulated {simulated:,} of the {exhaustive:,} trajectory-timesteps "
+                f"of an exhaustive run ({summary['saved_fraction']:.1%} saved) in {summary['duration_s']:,.2f}s")
+
+    output_folder_path = new_run_folder(Path("data/simulations"), "psuu_halving")
+    sim_df.to_pickle(str(output_folder_path / "timestep_tensor.pkl.gz"))
+    agg_df.to_pickle(str(output_folder_path / "trajectory_tensor.pkl.gz"))
+    with open(output_folder_path / "halving.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    if RETURN_SIM_DF:
+        return sim_df
     return None
@@ -0,0 +1,148 @@
+"""
+A persistent cache of the trajectory tensor rows of PSuU trajectories.
+
+Each row is stored under a content address, the hash of everything that
+determines the trajectory: its parameter values, seed and run, the
+simulation settings, and a fingerprint of the model's source. A rerun over an
+overlapping sample only has to simulate the parameter sets the cache has
+not seen. The cache is a single SQLite file, kept under `max_bytes` by
+evicting the least recently used rows.
+"""
+import hashlib
+import json
+import numbers
+import sqlite3
+import time
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Collection, Iterable, Mapping
+
+import subspace_model
+
+# Modules that run, record, store or plot simulations rather than define
+# the model and its KPIs. Editing any other module of the package
+# invalidates every cached row.
+NON_MODEL_SOURCES = frozenset({
+    "__main__.py",
+    "util.py",
+    "experiments/charts.py",
+    "experiments/experiment.py",
+    "experiments/kpi_cache.py",
+    "experiments/manifest.py",
+    "experiments/scheduler.py",
+    "experiments/sinks.py",
+    "experiments/spool.py",
+    "experiments/upload.py",
+    "psuu/plots.py",
+    "psuu/util.py",
+})
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Keys per query, below SQLite's limit on bound variables
+_BATCH = 500
+
+
+def model_sources(excluded: Collection[str] = NON_MODEL_SOURCES) -> list[str]:
+    """The package's source files, relative to it, apart from `excluded`."""
+    root = Path(subspace_model.__file__).parent
+    return [path for path in sorted(file.relative_to(root).as_posix() for file in root.rglob("*.py"))
+            if path not in excluded]
+
+
+def model_fingerprint(excluded: Collection[str] = NON_MODEL_SOURCES) -> str:
+    """A hash of the model's source files."""
+    root = Path(subspace_model.__file__).parent
+    digest = hashlib.sha256()
+    for source in model_sources(excluded):
+        digest.update(source.encode())
+        digest.update((root / source).read_bytes())
+    return digest.hexdigest()
+
+
+def canonical_value(value):
+    """
+    The JSON form of a parameter value: numbers as floats, strings and None
+    as they are, subsidy components as their fields and sequences item by
+    item. Raises TypeError for values without one, such as functions.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return {field.name: canonical_value(getattr(value, field.name)) for field in fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [canonical_value(item) for item in value]
+    raise TypeError(f"{type(value).__name__} values have no canonical form")
+
+
+def content_hash(obj) -> str:
+    """The SHA-256 of the canonical JSON of `obj`."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class KPICache:
+    """
+    Trajectory tensor rows keyed by content hash, in `root`/kpis.sqlite.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError(f"The cache size must not be negative, got {max_bytes}")
+        self.path = Path(root) / "kpis.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(self.path, timeout=60)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS rows "
+                             "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS rows_used ON rows (used)")
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, dict]:
+        """The cached rows of those `keys` that are cached, marked as used."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._db:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i:i + _BATCH]
+                marks = ",".join("?" * len(batch))
+                found.update((key, json.loads(value)) for key, value in self._db.execute(
+                    f"SELECT key, value FROM rows WHERE key IN ({marks})", batch))
+                self._db.execute(f"UPDATE rows SET used = ? WHERE key IN ({marks})", [now, *batch])
+        return found
+
+    def put_many(self, rows: Mapping[str, dict]):
+        """Cache `rows` by key, then evict the least recently used beyond `max_bytes`."""
+        now = time.time()
+        values = [(key, json.dumps(row)) for key, row in rows.items()]
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?)",
+                                 [(key, value, len(key) + len(value), now) for key, value in values])
+        self.evict()
+
+    def evict(self):
+        """Drop the least recently used rows until the rest fit in `max_bytes`."""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM rows WHERE key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS kept FROM rows) WHERE kept > ?)",
+                (self.max_bytes,))
+
+    @property
+    def size(self) -> int:
+        """The bytes taken by the cached rows."""
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM rows").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self) -> 'KPICache':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
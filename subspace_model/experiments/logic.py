@@ -1,7 +1,6 @@
 import random
-from typing import Callable, List, Any
+from typing import Any, Callable, Hashable, List
 import numpy as np
-from scipy.stats import norm, poisson  # type: ignore
 from cadCAD.tools.preparation import sweep_cartesian_product  # type: ignore
 from subspace_model.const import (
     BLOCKS_PER_MONTH,
@@ -9,6 +8,7 @@ from subspace_model.const import (
     DAY_TO_SECONDS,
     ISSUANCE_FOR_FARMERS
 )
+from subspace_model.experiments.streams import RandomStream
 from subspace_model.metrics import (
     earned_minus_burned_supply,
     earned_supply,
@@ -23,73 +23,131 @@ from subspace_model.types import (
 )
 
 
+def VECTORIZED(function: Callable, vectorized: Callable | None = None) -> Callable:
+    """
+    Attach an array implementation to a functional parameter so that the
+    vectorized engine can evaluate it for many trajectories in one call.
+
+    `vectorized` takes the same arguments as `function`, with params and state
+    holding one value per trajectory. If omitted, `function` itself must
+    already work on arrays.
+    """
+    function.vectorized = vectorized if vectorized is not None else function  # type: ignore
+    return function
+
+
+def _trajectory_count(state) -> int:
+    return len(state["days_passed"])
+
+
+def CONSTANT(value: float) -> StochasticFunction:
+    return VECTORIZED(lambda p, s: value,
+                      lambda p, s: np.full(_trajectory_count(s), value, dtype=float))
+
+
 def DEFAULT_SLASH_FUNCTION(params: SubspaceModelParams, state: SubspaceModelState):
     return state["staking_pool_balance"] * 0.001  # HACK
 
 
-def NORMAL_GENERATOR(mu: float, sigma: float) -> StochasticFunction:
-    np.random.seed()
-    return lambda p, s: norm.rvs(mu, sigma, random_state=np.random.RandomState())
+VECTORIZED(DEFAULT_SLASH_FUNCTION)
+
+
+def NORMAL_GENERATOR(mu: float, sigma: float, key: Hashable = None) -> StochasticFunction:
+    """
+    Normally distributed values. Seeded draws depend on the arguments and
+    `key`, which tells apart generators with the same arguments.
+    """
+    stream = RandomStream(lambda rng, shape: rng.normal(mu, sigma, size=shape), ("normal", mu, sigma, key))
+    return VECTORIZED(lambda p, s: stream.scalar(p, s),
+                      lambda p, s: stream.vectorized(p, s))
 
 
 def NORMAL_INSTANTANEOUS_SHOCK_GENERATOR(
-    mu: float, sigma: float, N: int
+    mu: float, sigma: float, N: int, key: Hashable = None
 ) -> StochasticFunction:
-    np.random.seed()
+    def sampler(rng: np.random.Generator, shape: tuple[int, int]) -> np.ndarray:
+        value = rng.normal(mu, sigma, size=shape)
+        is_up = rng.integers(0, 2, size=shape).astype(bool)
+        return np.stack([value, np.where(is_up, value * 10, value / 10)], axis=-1)
+
+    stream = RandomStream(sampler, ("normal_instantaneous_shock", mu, sigma, N, key))
 
     def generator(p, s):
-        value = norm.rvs(mu, sigma, random_state=np.random.RandomState())
+        value, shocked = stream.scalar(p, s)
         if s["days_passed"] % (N * 7) == 0:
-            if np.random.choice([0, 1]):
-                value *= 10
-            else:
-                value /= 10
+            return shocked
         return value
 
-    return generator
+    def vectorized(p, s):
+        values = stream.vectorized(p, s)
+        is_shock = s["days_passed"] % (N * 7) == 0
+        return np.where(is_shock, values[:, 1], values[:, 0])
+
+    return VECTORIZED(generator, vectorized)
 
 
 def NORMAL_SUSTAINED_SHOCK_GENERATOR(
-    mu: float, sigma: float, N: int, M: int
+    mu: float, sigma: float, N: int, M: int, key: Hashable = None
 ) -> StochasticFunction:
-    np.random.seed()
+    stream = RandomStream(lambda rng, shape: rng.normal(mu, sigma, size=shape),
+                          ("normal_sustained_shock", mu, sigma, N, M, key))
+
+    def shock(value):
+        return value * 10 if (N * 7) % 2 else value / 10
 
     def generator(p, s):
-        value = norm.rvs(mu, sigma, random_state=np.random.RandomState())
+        value = stream.scalar(p, s)
         if s["days_passed"] % (N * 7) < M:
-            if (N * 7) % 2:
-                value *= 10
-            else:
-                value /= 10
+            value = shock(value)
         return value
 
-    return generator
+    def vectorized(p, s):
+        value = stream.vectorized(p, s)
+        return np.where(s["days_passed"] % (N * 7) < M, shock(value), value)
+
+    return VECTORIZED(generator, vectorized)
 
 
-def POISSON_GENERATOR(mu: float) -> StochasticFunction:
-    np.random.seed()
-    return lambda p, s: poisson.rvs(mu, random_state=np.random.RandomState())
+def POISSON_GENERATOR(mu: float, key: Hashable = None) -> StochasticFunction:
+    stream = RandomStream(lambda rng, shape: rng.poisson(mu, size=shape), ("poisson", mu, key))
+    return VECTORIZED(lambda p, s: stream.scalar(p, s),
+                      lambda p, s: stream.vectorized(p, s))
 
 
 def POSITIVE_INTEGER(generator: StochasticFunction) -> StochasticFunction:
-    return lambda p, s: max(0, int(generator(p, s)))
+    def vectorized(p, s):
+        value = np.trunc(generator.vectorized(p, s))  # type: ignore
+        return np.where(value > 0, value, 0)
+
+    function = lambda p, s: max(0, int(generator(p, s)))
+    if not hasattr(generator, "vectorized"):
+        return function
+    return VECTORIZED(function, vectorized)
 
 
 def MAGNITUDE(generator: StochasticFunction) -> StochasticFunction:
-    return lambda p, s: min(1, max(0, generator(p, s)))
+    def vectorized(p, s):
+        value = generator.vectorized(p, s)  # type: ignore
+        value = np.where(value > 0, value, 0)
+        return np.where(value < 1, value, 1)
+
+    function = lambda p, s: min(1, max(0, generator(p, s)))
+    if not hasattr(generator, "vectorized"):
+        return function
+    return VECTORIZED(function, vectorized)
 
 
 def predictable_trajectory(mean: float, **params: Any) -> Callable:
     mu: float = mean
     sigma: float = 0.3 * mu
-    generator: Callable = NORMAL_GENERATOR(mu, sigma)
+    generator: Callable = NORMAL_GENERATOR(mu, sigma, key=params.get("key"))
     return generator
 
 
 def high_volatility_trajectory(mean: float, **params: Any) -> Callable:
     mu: float = mean
     sigma: float = 5 * mu
-    generator: Callable = NORMAL_GENERATOR(mu, sigma)
+    generator: Callable = NORMAL_GENERATOR(mu, sigma, key=params.get("key"))
     return generator
 
 
@@ -99,7 +157,7 @@ def predictable_trajectory_with_instantaneous_shocks(
     mu: float = mean
     sigma: float = 0.3 * mu
     generator: Callable = NORMAL_INSTANTANEOUS_SHOCK_GENERATOR(
-        mu, sigma, N=params.get("N", 13)
+        mu, sigma, N=params.get("N", 13), key=params.get("key")
     )
     return generator
 
@@ -110,14 +168,18 @@ def predictable_trajectory_with_sustained_shocks(
     mu: float = mean
     sigma: float = 0.3 * mu
     generator: Callable = NORMAL_SUSTAINED_SHOCK_GENERATOR(
-        mu, sigma, N=params.get("N", 13), M=params.get("M", 7)
+        mu, sigma, N=params.get("N", 13), M=params.get("M", 7), key=params.get("key")
     )
     return generator
 
 
-def SCENARIO_GROUPS(means: List[float], N: int = 13, M: int = 7) -> List[Callable]:
+# Scenario battery subsampling is fixed so that params are reproducible across processes
+_SCENARIO_RNG = random.Random(0)
+
+
+def SCENARIO_GROUPS(means: List[float], N: int = 13, M: int = 7, key: Hashable = None) -> List[Callable]:
     # Subsample battery to conserve cardinality of scenarios parameter space
-    groups: List[Callable] = random.sample(
+    groups: List[Callable] = _SCENARIO_RNG.sample(
         [
             predictable_trajectory,
             high_volatility_trajectory,
@@ -130,19 +192,19 @@ def SCENARIO_GROUPS(means: List[float], N: int = 13, M: int = 7) -> List[Callabl
     for mean in means:
         if mean != 0:
             for group in groups:
-                results.append(group(mean))
+                results.append(group(mean, key=key))
         else:
-            results.append(lambda p, s: 0)
+            results.append(CONSTANT(0))
     return results
 
 
-SUPPLY_ISSUED = issued_supply
+SUPPLY_ISSUED = VECTORIZED(issued_supply)
 
-SUPPLY_EARNED = earned_supply
+SUPPLY_EARNED = VECTORIZED(earned_supply)
 
-SUPPLY_EARNED_MINUS_BURNED = earned_minus_burned_supply
+SUPPLY_EARNED_MINUS_BURNED = VECTORIZED(earned_minus_burned_supply)
 
-SUPPLY_TOTAL = total_supply
+SUPPLY_TOTAL = VECTORIZED(total_supply)
 
 
 REFERENCE_SUBSIDY_CONSTANT_SINGLE_COMPONENT = [
@@ -160,39 +222,32 @@ REFERENCE_SUBSIDY_HYBRID_TWO_COMPONENTS = [
 ]
 
 
-def MAINNET_REFERENCE_SUBSIDY_COMPONENTS():
-    component_1_start_days = [0, 14, 30]
-    component_2_start_days = [0, 14, 30]
-
-    component_1_initial_subsidy_duration = [0]
-    component_1_initial_subsidies = [1, 4, 7]
-    component_1_maximum_cumulative_subsidies = [
+# The factors of the mainnet reference subsidy grid, in product order
+MAINNET_REFERENCE_SUBSIDY_GRID = {
+    "component_1_start_days": [0, 14, 30],
+    "component_1_initial_subsidy_duration": [0],
+    "component_1_initial_subsidies": [1, 4, 7],
+    "component_1_maximum_cumulative_subsidies": [
         0.1 * ISSUANCE_FOR_FARMERS,
         0.3 * ISSUANCE_FOR_FARMERS,
-        0.5 * ISSUANCE_FOR_FARMERS]
-
-    component_2_initial_subsidy_duration = [
+        0.5 * ISSUANCE_FOR_FARMERS],
+    "component_2_start_days": [0, 14, 30],
+    "component_2_initial_subsidy_duration": [
         6 * (365.25 / 12),
         12 * (365.25 / 12),
         24 * (365.25 / 12),
         48 * (365.25 / 12),
-    ]
-    component_2_initial_subsidies = [1, 4, 7]
-    component_2_maximum_cumulative_subsidies = [0.1 * ISSUANCE_FOR_FARMERS,
-                                                0.3 * ISSUANCE_FOR_FARMERS,
-                                                0.5 * ISSUANCE_FOR_FARMERS]
+    ],
+    "component_2_initial_subsidies": [1, 4, 7],
+    "component_2_maximum_cumulative_subsidies": [0.1 * ISSUANCE_FOR_FARMERS,
+                                                 0.3 * ISSUANCE_FOR_FARMERS,
+                                                 0.5 * ISSUANCE_FOR_FARMERS],
+}
+
 
+def MAINNET_REFERENCE_SUBSIDY_COMPONENTS():
     cartesian_product = sweep_cartesian_product(
-        {
-            "component_1_start_days": component_1_start_days,
-            "component_1_initial_subsidy_duration": component_1_initial_subsidy_duration,
-            "component_1_initial_subsidies": component_1_initial_subsidies,
-            "component_1_maximum_cumulative_subsidies": component_1_maximum_cumulative_subsidies,
-            "component_2_start_days": component_2_start_days,
-            "component_2_initial_subsidy_duration": component_2_initial_subsidy_duration,
-            "component_2_initial_subsidies": component_2_initial_subsidies,
-            "component_2_maximum_cumulative_subsidies": component_2_maximum_cumulative_subsidies,
-        }  # type: ignore
+        MAINNET_REFERENCE_SUBSIDY_GRID  # type: ignore
     )
 
     components = [
@@ -275,3 +330,6 @@ def TRANSACTION_COUNT_PER_DAY_FUNCTION_FROM_UTILIZATION_RATIOS(
 
 def WEEKLY_VARYING(params: SubspaceModelParams, state: SubspaceModelState):
     return 2 + np.sin(2 * np.pi * state["days_passed"] / 7)
+
+
+VECTORIZED(WEEKLY_VARYING)
@@ -0,0 +1,105 @@
+"""
+A JSON manifest for chunked PSuU runs, kept in the run folder and updated
+as chunks finish, so that an interrupted run can be resumed where it
+stopped.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST_FILENAME = "manifest.json"
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class ChunkRecord:
+    start: int
+    stop: int
+    status: str = PENDING
+    started_at: str | None = None
+    finished_at: str | None = None
+    error: str | None = None
+    worker: int | str | None = None
+
+
+@dataclass
+class RunManifest:
+    """
+    Everything needed to rebuild a run's chunks: the settings that shape
+    the run, the sampled sweep as per-parameter indices into the full sweep
+    space, and the status of every chunk.
+    """
+    run_dir: str
+    config: dict
+    n_combinations: int
+    sample: dict[str, list[int]] | None
+    chunks: list[ChunkRecord]
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finalized: bool = False
+
+    @property
+    def path(self) -> Path:
+        return Path(self.run_dir) / MANIFEST_FILENAME
+
+    def save(self):
+        """Write the manifest atomically."""
+        tmp_path = self.path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, run_dir: str | Path) -> 'RunManifest':
+        path = Path(run_dir) / MANIFEST_FILENAME
+        if not path.exists():
+            raise ValueError(f"No run manifest found in {run_dir}")
+        data = json.loads(path.read_text())
+        data["chunks"] = [ChunkRecord(**chunk) for chunk in data["chunks"]]
+        # The run may have been moved since it was created
+        data["run_dir"] = str(run_dir)
+        return cls(**data)
+
+    @property
+    def parameters_path(self) -> Path:
+        """The parameter table of the subsets of a normalized run."""
+        return Path(self.run_dir) / "parameters.pkl.gz"
+
+    def output_path(self, i_chunk: int) -> Path:
+        """The trajectory tensor of a chunk, written last when it finishes."""
+        if self.config.get("SINK") == "dataset":
+            return Path(self.run_dir) / "trajectory_tensor" / f"chunk={i_chunk}"
+        return Path(self.run_dir) / f"trajectory_tensor-{i_chunk}.pkl.gz"
+
+    def timestep_output_path(self, i_chunk: int) -> Path:
+        """
+        The timestep tensor of a chunk, or its sample of whole trajectories
+        in a KPI-only run.
+        """
+        from subspace_model.experiments.sinks import SINK_EXTENSIONS
+        sink = self.config.get("SINK")
+        if self.config.get("KPI_ONLY"):
+            return Path(self.run_dir) / f"timestep_sample-{i_chunk}.pkl.gz"
+        if sink == "dataset":
+            return Path(self.run_dir) / "timestep_tensor" / f"chunk={i_chunk}"
+        return Path(self.run_dir) / f"timestep_tensor-{i_chunk}{SINK_EXTENSIONS[sink] if sink else '.pkl.gz'}"
+
+    def pending(self) -> list[int]:
+        """Chunks that have not finished or whose output is missing."""
+        return [i for i, chunk in enumerate(self.chunks)
+                if chunk.status != DONE or not self.output_path(i).exists()]
+
+    def mark(self, i_chunk: int, status: str, error: str | None = None,
+             started_at: str | None = None, finished_at: str | None = None,
+             worker: int | str | None = None):
+        """Record a chunk's outcome and save the manifest."""
+        chunk = self.chunks[i_chunk]
+        chunk.status = status
+        chunk.error = error
+        chunk.started_at = started_at
+        chunk.finished_at = finished_at
+        chunk.worker = worker
+        self.save()
@@ -0,0 +1,93 @@
+"""
+Selection of what a simulation records: which state variables, and at which
+timesteps. Both engines apply it while collecting results, so unrecorded
+values never reach the output dataframe.
+"""
+from math import nan
+from typing import Collection, Iterable
+
+import numpy as np
+import pandas as pd
+
+from subspace_model.psuu import GOVERNANCE_PARAM_COLUMNS
+
+# Columns that identify a row and are always recorded
+TRAJECTORY_ID_COLUMNS = ("simulation", "subset", "run", "timestep")
+
+
+def recorded_timesteps(N_timesteps: int, stride: int = 1) -> list[int]:
+    """
+    Timesteps kept with a given recording stride: every `stride`-th timestep
+    counting from the initial state, plus the final one.
+    """
+    if stride < 1:
+        raise ValueError(f"The recording stride must be a positive integer, got {stride}")
+    timesteps = list(range(0, N_timesteps + 1, stride))
+    if timesteps[-1] != N_timesteps:
+        timesteps.append(N_timesteps)
+    return timesteps
+
+
+def recorded_keys(state_keys: Iterable[str], record: Collection[str] | None = None) -> list[str]:
+    """
+    State variables to record, in state order. All of them when `record` is
+    None.
+    """
+    state_keys = [k for k in state_keys if k != "substep"]
+    if record is None:
+        return state_keys
+    if unknown := set(record) - set(state_keys):
+        raise ValueError(f"Cannot record unknown state variables: {sorted(unknown)}")
+    return [k for k in state_keys if k in record or k in TRAJECTORY_ID_COLUMNS]
+
+
+def derived_param_values(assign_params: set | bool, param_sets: list[dict]) -> dict[str, np.ndarray]:
+    """
+    The value for every parameter set of the numeric columns among
+    `assign_params` that are derived from a parameter, such as the fields of
+    the reference subsidy components, so that no object column is needed.
+    """
+    if isinstance(assign_params, bool) or not param_sets:
+        return {}
+    return {column: np.array([field_of(params[param]) for params in param_sets], dtype=float)
+            for column, (param, field_of) in GOVERNANCE_PARAM_COLUMNS.items()
+            if column in assign_params and param in param_sets[0]}
+
+
+def parameter_table(sweep_params: dict[str, list], assign_params: set | bool = True,
+                    subset_offset: int = 0) -> pd.DataFrame:
+    """
+    The parameters of every subset of a sweep, as the engines attach them
+    to each row with `assign_params`, indexed by (simulation, subset) from
+    `subset_offset` on.
+    """
+    n_subsets = max(len(v) for v in sweep_params.values())
+    param_sets = [{k: v[i] if len(v) > 1 else v[0] for k, v in sweep_params.items()}
+                  for i in range(n_subsets)]
+    selected = set(sweep_params) if assign_params is True else set(assign_params or ())
+    columns = {k: [params[k] for params in param_sets] for k in sweep_params if k in selected}
+    columns.update(derived_param_values(assign_params, param_sets))
+    index = pd.MultiIndex.from_arrays([np.zeros(n_subsets, dtype=np.int64),
+                                       np.arange(subset_offset, subset_offset + n_subsets)],
+                                      names=["simulation", "subset"])
+    return pd.DataFrame(columns, index=index)
+
+
+def records_to_dataframe(records: list[dict],
+                         N_timesteps: int,
+                         record: Collection[str] | None = None,
+                         stride: int = 1) -> pd.DataFrame:
+    """
+    Build a timestep tensor from raw cadCAD records, keeping only the last
+    substep of the recorded timesteps and the recorded variables.
+    """
+    if not records:
+        return pd.DataFrame()
+    last_substep = max(r["substep"] for r in records)
+    timesteps = set(recorded_timesteps(N_timesteps, stride))
+    # Variables introduced by the blocks are missing from the initial state
+    keys = recorded_keys({**records[0], **records[-1]}, record)
+    rows = [[r.get(k, nan) for k in keys] for r in records
+            if r["timestep"] in timesteps
+            and (r["substep"] == last_substep or r["timestep"] == 0)]
+    return pd.DataFrame(rows, columns=keys)
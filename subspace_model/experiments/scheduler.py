@@ -0,0 +1,154 @@
+"""
+Cost-aware scheduling of PSuU chunks.
+
+Subsets are costed from the chunk timings of earlier runs, split into
+contiguous chunks of roughly equal estimated cost, and handed out largest
+first to whichever worker frees up next, so that no worker is left with a
+long chunk at the end of the run.
+"""
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from statistics import mean
+from typing import Iterable
+
+import pandas as pd
+
+from subspace_model.experiments.manifest import DONE, RunManifest
+from subspace_model.experiments.sweep import SweepSpace
+
+# Parameters whose value drives how long a subset takes to simulate
+COST_FEATURES = ("environmental_label",)
+
+
+class CostModel:
+    """
+    Seconds per simulated trajectory-timestep, learned per engine and per
+    value of the cost features.
+    """
+
+    def __init__(self, features: tuple[str, ...] = COST_FEATURES):
+        self.features = features
+        self.rates: dict[tuple, list[float]] = defaultdict(list)
+
+    def _key(self, engine: str, subset: dict) -> tuple:
+        return (engine, *(str(subset.get(k)) for k in self.features))
+
+    def observe(self, engine: str, subsets: list[dict], seconds: float, units_per_subset: int):
+        """Record the time a chunk took, shared equally by its subsets."""
+        if not subsets or units_per_subset < 1:
+            return
+        rate = seconds / (len(subsets) * units_per_subset)
+        for subset in subsets:
+            self.rates[self._key(engine, subset)].append(rate)
+
+    def rate(self, engine: str, subset: dict) -> float:
+        """
+        The mean observed rate for the subset's features, falling back to
+        the engine's mean rate and then to 1.
+        """
+        if rates := self.rates.get(self._key(engine, subset)):
+            return mean(rates)
+        engine_rates = [r for k, rates in self.rates.items() if k[0] == engine for r in rates]
+        return mean(engine_rates) if engine_rates else 1.0
+
+    def estimate(self, engine: str, subsets: list[dict], units_per_subset: int) -> list[float]:
+        return [self.rate(engine, subset) * units_per_subset for subset in subsets]
+
+    @classmethod
+    def from_manifests(cls, run_dirs: Iterable[str | Path], sweep_space: SweepSpace,
+                       features: tuple[str, ...] = COST_FEATURES) -> 'CostModel':
+        """
+        Learn from the finished chunks of earlier runs over the same sweep
+        space. Runs that cannot be read or sampled another space are skipped.
+        """
+        model = cls(features)
+        n_combinations = len(sweep_space)
+        for run_dir in run_dirs:
+            try:
+                manifest = RunManifest.load(run_dir)
+            except (ValueError, OSError, TypeError, KeyError):
+                continue
+            if manifest.n_combinations != n_combinations:
+                continue
+            config = manifest.config
+            units = (int(config["SIMULATION_DAYS"] / config["TIMESTEP_IN_DAYS"]) + 1) * config["SAMPLES"]
+            subsets = sample_subsets(sweep_space, manifest.sample, features)
+            for chunk in manifest.chunks:
+                if chunk.status != DONE or chunk.started_at is None or chunk.finished_at is None:
+                    continue
+                seconds = (datetime.fromisoformat(chunk.finished_at)
+                           - datetime.fromisoformat(chunk.started_at)).total_seconds()
+                model.observe(config["ENGINE"], subsets[chunk.start:chunk.stop], seconds, units)
+        return model
+
+
+def sample_subsets(sweep_space: SweepSpace, sample: dict[str, list[int]] | None,
+                   keys: Iterable[str]) -> list[dict]:
+    """The values of `keys` for every subset of a sampled sweep."""
+    keys = list(keys)
+    if sample is None:
+        return [{k: sweep_space.value(k, i) for k in keys} for i in range(len(sweep_space))]
+    return [{k: sweep_space.value(k, i) for k, i in zip(keys, indices)}
+            for indices in zip(*(sample[k] for k in keys))]
+
+
+def plan_chunks(costs: list[float], n_workers: int, max_size: int,
+                tasks_per_worker: int = 4) -> list[tuple[int, int]]:
+    """
+    Split subsets into contiguous chunks of about equal cost, aiming for
+    `tasks_per_worker` chunks per worker and at most `max_size` subsets
+    per chunk.
+    """
+    if max_size < 1:
+        raise ValueError(f"The chunk size must be a positive integer, got {max_size}")
+    target = sum(costs) / max(n_workers * tasks_per_worker, 1)
+    chunks = []
+    start, cost = 0, 0.0
+    for i, subset_cost in enumerate(costs):
+        cost += subset_cost
+        if cost >= target or i + 1 - start >= max_size:
+            chunks.append((start, i + 1))
+            start, cost = i + 1, 0.0
+    if start < len(costs):
+        chunks.append((start, len(costs)))
+    return chunks
+
+
+def dispatch_order(chunks: list[tuple[int, int]], costs: list[float]) -> list[int]:
+    """Chunk indices from the most to the least expensive."""
+    chunk_costs = [sum(costs[start:stop]) for start, stop in chunks]
+    return sorted(range(len(chunks)), key=lambda i: -chunk_costs[i])
+
+
+def worker_utilization(manifest: RunManifest) -> pd.DataFrame:
+    """
+    Per-worker busy time over the span of the run's chunks, along with how
+    long each worker sat idle after its last chunk while others were still
+    running.
+    """
+    rows = [(chunk.worker, datetime.fromisoformat(chunk.started_at), datetime.fromisoformat(chunk.finished_at))
+            for chunk in manifest.chunks
+            if chunk.worker is not None and chunk.started_at and chunk.finished_at]
+    if not rows:
+        return pd.DataFrame(columns=["chunks", "busy_s", "utilization", "tail_idle_s"])
+    df = pd.DataFrame(rows, columns=["worker", "started_at", "finished_at"])
+    run_start, run_end = df.started_at.min(), df.finished_at.max()
+    span = max((run_end - run_start).total_seconds(), 1e-9)
+    df["busy_s"] = (df.finished_at - df.started_at).dt.total_seconds()
+    workers = df.groupby("worker").agg(chunks=("busy_s", "size"),
+                                       busy_s=("busy_s", "sum"),
+                                       last_finish=("finished_at", "max"))
+    workers["utilization"] = workers.busy_s / span
+    workers["tail_idle_s"] = (run_end - workers.last_finish).dt.total_seconds()
+    return workers.drop(columns="last_finish")
+
+
+def utilization_report(manifest: RunManifest) -> str:
+    workers = worker_utilization(manifest)
+    if workers.empty:
+        return "No chunk timings recorded"
+    return (f"Worker utilization: mean {workers.utilization.mean():.1%}, "
+            f"min {workers.utilization.min():.1%}, "
+            f"max tail idle {workers.tail_idle_s.max():,.1f}s\n"
+            f"{workers.to_string(float_format=lambda v: f'{v:,.2f}')}")
@@ -0,0 +1,333 @@
+"""
+Sinks that simulation engines push result batches into, so that a run can
+be written out as it progresses instead of being collected into a single
+DataFrame.
+
+Every batch is a DataFrame of complete rows in the `easy_run` layout. The
+cadCAD engine pushes one subset's trajectories at a time and the vectorized
+engines push every trajectory for a block of timesteps, so rows are grouped
+by batch rather than sorted by (subset, run, timestep).
+"""
+import shutil
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+import pyarrow.ipc  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+
+from subspace_model.experiments.streams import stream_id, trajectory_rng
+from subspace_model.psuu import kpi_input_columns, timestep_tensor_to_trajectory_tensor
+from subspace_model.psuu.kpis import KPIAccumulator
+from subspace_model.types import state_tensor_type_hints
+
+# Columns that identify a trajectory
+TRAJECTORY_KEYS = ["simulation", "subset", "run"]
+
+# Stream id of the draws that pick the sampled trajectories
+SAMPLE_STREAM = stream_id("trajectory sample")
+
+# Arrow types for the Python types used in the state type hints
+ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    str: pa.string(),
+}
+
+# Partition columns of the Parquet datasets written by PSuU runs
+DATASET_PARTITIONING = ds.partitioning(
+    pa.schema([("chunk", pa.int64()), ("subset", pa.int64())]), flavor="hive")
+
+
+class TrajectorySink:
+    """
+    Receives result batches from an engine. `transform` is applied to every
+    batch before it is stored.
+    """
+
+    def __init__(self, transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None):
+        self.transform = transform
+        self.rows = 0
+
+    def write(self, batch: pd.DataFrame):
+        if self.transform is not None:
+            batch = self.transform(batch)
+        self.rows += len(batch)
+        self._write(batch)
+
+    def _write(self, batch: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemorySink(TrajectorySink):
+    """
+    Keeps every batch in memory.
+    """
+
+    def __init__(self, transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None):
+        super().__init__(transform)
+        self.batches: list[pd.DataFrame] = []
+
+    def _write(self, batch: pd.DataFrame):
+        self.batches.append(batch)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """All batches, sorted in the `easy_run` row order."""
+        if not self.batches:
+            return pd.DataFrame()
+        df = pd.concat(self.batches, ignore_index=True)
+        return df.sort_values(["simulation", "subset", "run", "timestep"], kind="stable", ignore_index=True)
+
+
+class KPISink(TrajectorySink):
+    """
+    Reduces every trajectory to its row of the trajectory tensor as soon as
+    its final timestep arrives, holding only the KPI inputs of unfinished
+    trajectories. A random `sample_fraction` of the trajectories is also
+    kept in full, as timestep rows, for inspection. With a `seed`, whether
+    a trajectory is sampled depends only on the seed and its keys.
+
+    With `kpis` that the engine reduces as it runs, no KPI inputs are held
+    and the trajectory tensor is taken from them instead. The governance
+    surface is joined from `parameters` when the batches do not carry it.
+    """
+
+    def __init__(self, N_timesteps: int, sample_fraction: float = 0.0, seed: int | None = None,
+                 transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+                 kpis: KPIAccumulator | None = None,
+                 parameters: pd.DataFrame | None = None):
+        super().__init__(transform)
+        self.kpis = kpis
+        self.parameters = parameters
+        self.N_timesteps = N_timesteps
+        self.sample_fraction = sample_fraction
+        self.trajectories: list[pd.DataFrame] = []
+        self.samples: list[pd.DataFrame] = []
+        self._pending: list[pd.DataFrame] = []
+        self._sampled: dict[tuple, bool] = {}
+        self.seed = seed
+        self._rng = np.random.default_rng()
+
+    def _write(self, batch: pd.DataFrame):
+        ids = pd.MultiIndex.from_frame(batch[TRAJECTORY_KEYS])
+        if self.sample_fraction > 0:
+            for key in ids.unique():
+                if key not in self._sampled:
+                    self._sampled[key] = self._sample(key)
+            sampled = ids.map(self._sampled.__getitem__).to_numpy(dtype=bool)
+            if sampled.any():
+                self.samples.append(batch[sampled])
+        if self.kpis is not None:
+            return
+        self._pending.append(batch[kpi_input_columns(batch.columns)])
+
+        finished = ids[(batch.timestep == self.N_timesteps).to_numpy()]
+        if len(finished):
+            pending = pd.concat(self._pending, ignore_index=True)
+            done = pd.MultiIndex.from_frame(pending[TRAJECTORY_KEYS]).isin(finished)
+            self.trajectories.append(timestep_tensor_to_trajectory_tensor(pending[done], self.parameters))
+            self._pending = [pending[~done]] if not done.all() else []
+
+    def _sample(self, key: tuple) -> bool:
+        rng = self._rng if self.seed is None else trajectory_rng(self.seed, (*key, SAMPLE_STREAM))
+        return rng.random() < self.sample_fraction
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """The trajectory tensor of every finished trajectory."""
+        if self.kpis is not None:
+            return self.kpis.trajectory_tensor(self.transform, self.parameters)
+        if not self.trajectories:
+            return pd.DataFrame()
+        return pd.concat(self.trajectories).sort_index()
+
+    def sample_dataframe(self) -> pd.DataFrame:
+        """The timestep rows of the sampled trajectories."""
+        if not self.samples:
+            return pd.DataFrame()
+        df = pd.concat(self.samples, ignore_index=True)
+        return df.sort_values(["simulation", "subset", "run", "timestep"], kind="stable", ignore_index=True)
+
+
+def to_arrow(batch: pd.DataFrame, schema: pa.Schema | None = None) -> pa.Table:
+    """
+    Convert a batch to an Arrow table. Object columns that are not strings,
+    such as functional parameters or subsidy components, are stored as their
+    `str` representation.
+    """
+    batch = batch.copy(deep=False)
+    for column in batch.columns:
+        if batch[column].dtype == object and not batch[column].map(lambda v: v is None or isinstance(v, str)).all():
+            batch[column] = batch[column].map(str)
+    return pa.Table.from_pandas(batch, schema=schema, preserve_index=False)
+
+
+def typed_schema(schema: pa.Schema) -> pa.Schema:
+    """
+    Set the type of every state variable column to the one given by its
+    type hint, so that every engine writes the same schema. Integer hinted
+    variables that the model computes as floats are kept as floats rather
+    than truncated.
+    """
+    fields = []
+    for f in schema:
+        arrow_type = ARROW_TYPES.get(state_tensor_type_hints.get(f.name))
+        if arrow_type is None or (pa.types.is_integer(arrow_type) and pa.types.is_floating(f.type)):
+            fields.append(f)
+        else:
+            fields.append(f.with_type(arrow_type))
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+class ArrowFileSink(TrajectorySink):
+    """
+    Base for columnar file sinks. The schema is taken from the first batch.
+    """
+
+    def __init__(self, path: str | Path, transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None):
+        super().__init__(transform)
+        self.path = Path(path)
+        self.schema: pa.Schema | None = None
+        self._writer = None
+
+    def _open(self, schema: pa.Schema):
+        raise NotImplementedError
+
+    def _write(self, batch: pd.DataFrame):
+        table = to_arrow(batch, self.schema)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = self._open(table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ParquetSink(ArrowFileSink):
+    """
+    Writes each batch as a Parquet row group.
+    """
+
+    def __init__(self, path: str | Path, compression: str = "snappy",
+                 transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None):
+        super().__init__(path, transform)
+        self.compression = compression
+
+    def _open(self, schema: pa.Schema):
+        return pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+
+class ArrowIPCSink(ArrowFileSink):
+    """
+    Writes each batch to an Arrow IPC (Feather v2) file.
+    """
+
+    def _open(self, schema: pa.Schema):
+        return pa.ipc.new_file(self.path, schema)
+
+
+class ParquetDatasetSink(TrajectorySink):
+    """
+    Writes a Hive-partitioned Parquet dataset into the `path` directory,
+    with one directory per value of the `partition_cols` and one file per
+    batch inside each. State variable columns are typed from their type
+    hints. Anything already in `path` is removed when the first batch is
+    written, so that a rerun replaces the data instead of adding to it.
+    """
+
+    def __init__(self, path: str | Path, compression: str = "zstd",
+                 transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+                 partition_cols: tuple[str, ...] = ("subset",)):
+        super().__init__(transform)
+        self.path = Path(path)
+        self.compression = compression
+        self.partition_cols = partition_cols
+        self.schema: pa.Schema | None = None
+        self._batches = 0
+
+    def _write(self, batch: pd.DataFrame):
+        table = to_arrow(batch)
+        if self.schema is None:
+            self.schema = typed_schema(table.schema)
+            shutil.rmtree(self.path, ignore_errors=True)
+        # Integers beyond 2**53 lose precision as float hinted columns
+        table = table.cast(self.schema, safe=False)
+        pq.write_to_dataset(table, self.path,
+                            partition_cols=list(self.partition_cols),
+                            basename_template=f"part-{self._batches}-{{i}}.parquet",
+                            existing_data_behavior="overwrite_or_ignore",
+                            compression=self.compression)
+        self._batches += 1
+
+
+SINKS: dict[str, type[TrajectorySink]] = {
+    "parquet": ParquetSink,
+    "arrow": ArrowIPCSink,
+    "dataset": ParquetDatasetSink,
+}
+
+# Datasets are directories
+SINK_EXTENSIONS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "dataset": "",
+}
+
+
+def read_columns(path: str | Path) -> list[str]:
+    """The columns of a file or dataset written by a sink, read from its schema only."""
+    path = Path(path)
+    if path.is_dir():
+        return ds.dataset(path, format="parquet", partitioning=DATASET_PARTITIONING).schema.names
+    if path.suffix == SINK_EXTENSIONS["arrow"]:
+        with pa.memory_map(str(path), "rb") as source:
+            return pa.ipc.open_file(source).schema.names
+    return pq.read_schema(path).names
+
+
+def read_dataset(path: str | Path, columns: list[str] | None = None, filters=None) -> pd.DataFrame:
+    """
+    Read a partitioned Parquet dataset, or any directory of it such as a
+    single chunk's. Only the files of the partitions matching `filters` are
+    read, and from them only the `columns` asked for.
+
+        read_dataset(run_dir / "timestep_tensor", columns=["subset", "run", "timestep", "total_supply"],
+                     filters=[("chunk", "=", 0), ("subset", "in", [0, 1])])
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning=DATASET_PARTITIONING)
+    if filters is not None:
+        filters = pq.filters_to_expression(filters)
+    return dataset.to_table(columns=columns, filter=filters).to_pandas()
+
+
+def read_sink(path: str | Path, columns: list[str] | None = None, filters=None) -> pd.DataFrame:
+    """
+    Read back a file or dataset written by a sink, optionally only some of
+    its columns. `filters` select the partitions of a dataset.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return read_dataset(path, columns, filters)
+    if path.suffix == SINK_EXTENSIONS["arrow"]:
+        with pa.OSFile(str(path), "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        table = pq.read_table(path, columns=columns, filters=filters)
+    return table.to_pandas()
@@ -0,0 +1,236 @@
+"""
+A file-system work queue for spreading PSuU chunks over several hosts.
+
+The queue is a folder on storage that the coordinator and every worker
+share, at the same path as the run folders. The coordinator spools one
+JSON spec per chunk into `pending`. A worker claims a spec by renaming it
+into its own folder under `claimed`, which only one worker can win, and
+keeps touching the claim as a heartbeat while the chunk runs. It then
+writes the outcome to `done`. The coordinator puts claims whose heartbeat
+stops back into `pending` for another worker, so a chunk may run more than
+once but is recorded once.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+logger = logging.getLogger('subspace-digital-twin')
+
+# Seconds between a worker's heartbeats, and without one before a claim is reassigned
+HEARTBEAT_INTERVAL_S = 10.0
+HEARTBEAT_TIMEOUT_S = 60.0
+
+
+@dataclass
+class ChunkSpec:
+    """What a worker needs to run a chunk: the rest is in the run's manifest."""
+    run_dir: str
+    chunk: int
+
+    @property
+    def name(self) -> str:
+        return f"{Path(self.run_dir).name}.{self.chunk:06d}.json"
+
+
+def _write_json(path: Path, data: dict):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Spool:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.pending = self.root / "pending"
+        self.claimed = self.root / "claimed"
+        self.done = self.root / "done"
+        for folder in (self.pending, self.claimed, self.done):
+            folder.mkdir(parents=True, exist_ok=True)
+        # Last seen heartbeat of every claim, and when it was seen on this host's clock
+        self._heartbeats: dict[Path, tuple[float, float]] = {}
+
+    def publish(self, specs: Iterable[ChunkSpec]):
+        """Queue chunks, which are claimed in the order they are published."""
+        for i, spec in enumerate(specs):
+            _write_json(self.pending / f"{time.time_ns()}-{i:06d}-{spec.name}", asdict(spec))
+
+    def claim(self, worker: str) -> tuple[ChunkSpec, Path] | None:
+        """Take the next pending chunk, or None if there is none."""
+        folder = self.claimed / worker
+        folder.mkdir(exist_ok=True)
+        for path in sorted(self.pending.glob("*.json")):
+            claim = folder / path.name
+            try:
+                os.rename(path, claim)
+            except FileNotFoundError:
+                # Another worker got there first
+                continue
+            os.utime(claim)
+            return ChunkSpec(**json.loads(claim.read_text())), claim
+        return None
+
+    def heartbeat(self, claim: Path):
+        try:
+            os.utime(claim)
+        except FileNotFoundError:
+            pass
+
+    def complete(self, claim: Path, spec: ChunkSpec, result: dict):
+        """Report a claimed chunk's outcome and release the claim."""
+        _write_json(self.done / claim.name, {**asdict(spec), **result})
+        try:
+            claim.unlink()
+        except FileNotFoundError:
+            # Reassigned while it ran
+            pass
+
+    def withdraw(self, run_dir: str | Path) -> int:
+        """Drop a run's pending chunks, eg. those left by an interrupted coordinator."""
+        paths = list(self.pending.glob(f"*-{Path(run_dir).name}.*.json"))
+        for path in paths:
+            path.unlink(missing_ok=True)
+        return len(paths)
+
+    def collect(self, run_dir: str | Path) -> Iterator[dict]:
+        """Take the outcomes reported for a run's chunks."""
+        run_name = Path(run_dir).name
+        for path in sorted(self.done.glob(f"*-{run_name}.*.json")):
+            result = json.loads(path.read_text())
+            path.unlink()
+            yield result
+
+    def requeue_stale(self, timeout: float = HEARTBEAT_TIMEOUT_S) -> list[ChunkSpec]:
+        """
+        Put back into `pending` the claims that have not had a heartbeat for
+        `timeout` seconds. Heartbeats are timed by when this host sees them
+        change, so clocks need not agree between hosts.
+        """
+        now = time.monotonic()
+        requeued = []
+        claims = set(self.claimed.glob("*/*.json"))
+        self._heartbeats = {claim: seen for claim, seen in self._heartbeats.items() if claim in claims}
+        for claim in claims:
+            try:
+                mtime = claim.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            last_mtime, seen_at = self._heartbeats.get(claim, (None, now))
+            if mtime != last_mtime:
+                self._heartbeats[claim] = (mtime, now)
+            elif now - seen_at > timeout:
+                try:
+                    os.rename(claim, self.pending / claim.name)
+                except FileNotFoundError:
+                    continue
+                del self._heartbeats[claim]
+                requeued.append(ChunkSpec(**json.loads((self.pending / claim.name).read_text())))
+        return requeued
+
+
+def work(queue: str | Path,
+         run: Callable[[str, int], object] | None = None,
+         worker: str | None = None,
+         poll_interval: float = 5.0,
+         idle_timeout: float | None = None,
+         heartbeat_interval: float = HEARTBEAT_INTERVAL_S) -> int:
+    """
+    Run chunks from a queue until it has been empty for `idle_timeout`
+    seconds, or forever if None, and return how many were run. `run` runs
+    one chunk, by default `run_psuu_chunk`.
+    """
+    if run is None:
+        from subspace_model.experiments.experiment import run_psuu_chunk
+        run = run_psuu_chunk
+    spool = Spool(queue)
+    worker = worker or worker_id()
+    n_chunks = 0
+    idle_since = time.monotonic()
+    logger.info(f"Worker {worker} pulling chunks from {spool.root}")
+    while True:
+        claimed = spool.claim(worker)
+        if claimed is None:
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return n_chunks
+            time.sleep(poll_interval)
+            continue
+
+        spec, claim = claimed
+        logger.info(f"Worker {worker} running chunk {spec.chunk} of {spec.run_dir}")
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(heartbeat_interval):
+                spool.heartbeat(claim)
+
+        heart = threading.Thread(target=beat, daemon=True)
+        heart.start()
+        started_at = datetime.now().isoformat()
+        try:
+            run(spec.run_dir, spec.chunk)
+            error = None
+        except Exception as e:
+            logger.exception(f"PSuU chunk {spec.chunk} of {spec.run_dir} failed")
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+            heart.join()
+        spool.complete(claim, spec, {"error": error,
+                                     "started_at": started_at,
+                                     "finished_at": datetime.now().isoformat(),
+                                     "worker": worker})
+        n_chunks += 1
+        idle_since = time.monotonic()
+
+
+def coordinate(queue: str | Path,
+               run_dir: str | Path,
+               chunks: Iterable[int],
+               local_workers: int = 0,
+               poll_interval: float = 1.0,
+               heartbeat_timeout: float = HEARTBEAT_TIMEOUT_S) -> Iterator[tuple]:
+    """
+    Queue a run's chunks and yield (chunk, error, started_at, finished_at,
+    worker) as workers report them, reassigning the chunks of workers that
+    stop responding. `local_workers` worker processes are started on this
+    host and stopped once every chunk is in; any other workers are started
+    with `python -m subspace_model worker`.
+    """
+    spool = Spool(queue)
+    spool.withdraw(run_dir)
+    remaining = list(chunks)
+    spool.publish(ChunkSpec(str(run_dir), i) for i in remaining)
+    remaining = set(remaining)
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=work, args=(str(spool.root),),
+                                 kwargs=dict(poll_interval=poll_interval), daemon=True)
+                 for _ in range(local_workers if remaining else 0)]
+    for process in processes:
+        process.start()
+    try:
+        while remaining:
+            for result in spool.collect(run_dir):
+                if result["chunk"] in remaining:
+                    remaining.discard(result["chunk"])
+                    yield (result["chunk"], result["error"], result["started_at"],
+                           result["finished_at"], result["worker"])
+            for spec in spool.requeue_stale(heartbeat_timeout):
+                logger.warning(f"Reassigning chunk {spec.chunk} of {spec.run_dir}, whose worker stopped responding")
+            if remaining:
+                time.sleep(poll_interval)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
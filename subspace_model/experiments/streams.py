@@ -0,0 +1,132 @@
+import hashlib
+from collections.abc import Mapping
+from typing import Callable, Hashable
+
+import numpy as np
+
+# Draws `shape` = (timesteps, trajectories) values from a generator
+PathSampler = Callable[[np.random.Generator, tuple[int, int]], np.ndarray]
+
+# Number of timesteps drawn at once for every trajectory
+BLOCK_TIMESTEPS = 128
+
+
+
+def trajectory_rng(seed: int, trajectory: tuple[int, ...]) -> np.random.Generator:
+    """
+    Counter-based generator for a single trajectory, so that its draws depend
+    only on the seed and the trajectory identity and not on how a sweep is
+    chunked or scheduled.
+    """
+    return np.random.Generator(np.random.Philox(
+        np.random.SeedSequence(int(seed), spawn_key=tuple(int(i) for i in trajectory))))
+
+
+def stream_id(key: Hashable) -> int:
+    """
+    A stable id for a stream from its `key`, the same in every process
+    whatever other streams were created before it.
+    """
+    return int.from_bytes(hashlib.sha256(repr(key).encode()).digest()[:8], "little")
+
+
+def _param(params, key: str, default=None):
+    if isinstance(params, Mapping):
+        return params.get(key, default)
+    return default
+
+
+class RandomStream:
+    """
+    Serves pre-drawn random paths by timestep.
+
+    Values are drawn in blocks of timesteps, one column per trajectory, so that
+    a stochastic parameter costs a single vectorized draw every few hundred
+    timesteps instead of a new RNG and `rvs` call on every timestep. A fresh
+    path is started whenever the trajectory or seed changes or the timestep goes
+    backwards.
+
+    When the params carry an `rng_seed`, every trajectory draws from its own
+    generator keyed by (seed, simulation, subset, run, stream id), with the
+    stream id derived from `key`. Streams with equal keys draw the same
+    values. Otherwise all trajectories share a persistent unseeded generator.
+    """
+
+    def __init__(self, sampler: PathSampler, key: Hashable):
+        self.sampler = sampler
+        self.stream_id = stream_id(key)
+        self.rng = np.random.default_rng()
+        self._trajectory: Hashable = None
+        self._rngs: list[np.random.Generator] | None = None
+        self._timestep = -1
+        self._path = np.empty((0, 0))
+
+    def _draw(self, width: int) -> np.ndarray:
+        shape = (BLOCK_TIMESTEPS, 1)
+        if self._rngs is None:
+            return self.sampler(self.rng, (BLOCK_TIMESTEPS, width))
+        return np.concatenate([self.sampler(rng, shape) for rng in self._rngs], axis=1)
+
+    def path(self,
+             trajectory: Hashable,
+             timestep: int,
+             width: int = 1,
+             seeds: Callable[[], list[tuple[int, tuple]] | None] = lambda: None) -> np.ndarray:
+        """
+        Values at `timestep` for each of the `width` trajectories identified
+        by `trajectory`. On a new path, `seeds` gives the (seed, trajectory id)
+        of every column, or None for unseeded draws.
+        """
+        timestep = int(timestep)
+        if (trajectory != self._trajectory
+                or width != self._path.shape[1]
+                or timestep < self._timestep):
+            keys = seeds()
+            self._rngs = None if keys is None else [
+                trajectory_rng(seed, (*ids, self.stream_id)) if seed is not None else self.rng
+                for seed, ids in keys]
+            self._trajectory = trajectory
+            self._path = np.empty((0, width))
+        while timestep >= len(self._path):
+            block = self._draw(width)
+            self._path = block if len(self._path) == 0 else np.concatenate([self._path, block])
+        self._timestep = timestep
+        return self._path[timestep]
+
+    def scalar(self, params: Mapping, state: Mapping):
+        """
+        Value for a single cadCAD trajectory. States without a timestep get
+        an independent draw.
+        """
+        if not isinstance(state, Mapping) or "timestep" not in state:
+            return self.sampler(self.rng, (1, 1))[0, 0]
+        subset = _param(params, "rng_subset")
+        ids = (state.get("simulation", 0),
+               state.get("subset", 0) if subset is None else subset,
+               state.get("run", 1))
+        seed = _param(params, "rng_seed")
+        return self.path((seed, *ids), state["timestep"],
+                         seeds=lambda: None if seed is None else [(seed, ids)])[0]
+
+    def vectorized(self, params: Mapping, state: Mapping) -> np.ndarray:
+        """
+        Values for all trajectories of a vectorized state at its timestep.
+        """
+        timestep = state["timestep"]
+        width = len(timestep)
+
+        def seeds():
+            seed = _param(params, "rng_seed")
+            if seed is None or all(s is None for s in seed):
+                return None
+            subset = _param(params, "rng_subset")
+            subset = [None] * width if subset is None else subset
+            return [(s, (simulation, state_subset if rng_subset is None else rng_subset, run))
+                    for s, simulation, state_subset, rng_subset, run
+                    in zip(seed, state["simulation"], state["subset"], subset, state["run"])]
+
+        seed = _param(params, "rng_seed")
+        # Seeded paths are told apart by their subsets too, as a run resumed
+        # from a checkpoint does not start over from the first timestep
+        key = ("vectorized", None if seed is None else (tuple(seed), tuple(_param(params, "rng_subset", ()))))
+        return self.path(key, timestep[0], width, seeds)
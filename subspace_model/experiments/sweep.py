@@ -0,0 +1,81 @@
+"""
+A lazy Cartesian product of parameter sweep axes.
+
+Combinations are numbered as `sweep_cartesian_product` orders them, with the
+last axis varying fastest, and are only decoded when asked for, so the size
+of the space costs nothing until it is sampled.
+"""
+from math import prod
+from random import Random
+from typing import Iterable, Mapping, Sequence
+
+
+class SweepSpace:
+    """
+    The Cartesian product of `axes`, a map from parameter names to their
+    values. Combination `index` takes, for every axis, the value at digit
+    `index // stride % size` of its mixed-radix representation.
+
+    An axis whose values are themselves a Cartesian product, such as the
+    reference subsidy grid, can declare the sizes of its `factors` in
+    product order so that sampling designs treat each factor as its own
+    dimension.
+    """
+
+    def __init__(self, axes: Mapping[str, Sequence],
+                 factors: Mapping[str, Sequence[int]] | None = None):
+        self.axes = {k: list(v) for k, v in axes.items()}
+        if empty := [k for k, v in self.axes.items() if not v]:
+            raise ValueError(f"Sweep axes without values: {empty}")
+        self.sizes = {k: len(v) for k, v in self.axes.items()}
+        self.factors = {k: (size,) for k, size in self.sizes.items()}
+        for k, sizes in (factors or {}).items():
+            if k not in self.axes:
+                raise ValueError(f"Factors given for '{k}', which is not a sweep axis")
+            if prod(sizes) != self.sizes[k]:
+                raise ValueError(
+                    f"The factors {tuple(sizes)} of '{k}' do not multiply to its {self.sizes[k]} values")
+            self.factors[k] = tuple(sizes)
+        self.strides: dict[str, int] = {}
+        stride = 1
+        for k in reversed(self.axes):
+            self.strides[k] = stride
+            stride *= self.sizes[k]
+
+    def __len__(self) -> int:
+        return prod(self.sizes.values())
+
+    def keys(self):
+        return self.axes.keys()
+
+    def position(self, key: str, index: int) -> int:
+        """The position on its axis of one parameter's value in combination `index`."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Combination {index} is outside a sweep space of {len(self):,}")
+        return index // self.strides[key] % self.sizes[key]
+
+    def value(self, key: str, index: int):
+        """The value of one parameter in combination `index`."""
+        return self.axes[key][self.position(key, index)]
+
+    def __getitem__(self, index: int) -> dict:
+        """The parameter set of combination `index`."""
+        return {k: self.value(k, index) for k in self.axes}
+
+    def take(self, indices: Mapping[str, Sequence[int]] | Iterable[int]) -> dict[str, list]:
+        """
+        Sweep parameters in the `sweep_cartesian_product` layout for the given
+        combinations, either the same ones for every parameter or, as drawn
+        by `sample`, separate ones per parameter.
+        """
+        if isinstance(indices, Mapping):
+            return {k: [self.value(k, i) for i in indices[k]] for k in self.axes}
+        indices = list(indices)
+        return {k: [self.value(k, i) for i in indices] for k in self.axes}
+
+    def sample(self, n: int, rng: Random) -> dict[str, list[int]]:
+        """
+        Draw `n` combination indices without replacement, separately for
+        every parameter.
+        """
+        return {k: rng.sample(range(len(self)), n) for k in self.axes}
@@ -0,0 +1,148 @@
+"""
+Background upload of simulation outputs.
+
+An `Uploader` takes files as soon as they are written and uploads them from
+a pool of threads, with retries, while the simulation carries on. At most
+`max_pending` files wait at a time, so a slow network holds back the
+producer rather than filling the disk. Backends put one file under a key:
+`S3Backend` through a single reused boto3 client with multipart transfers,
+and `FileSystemBackend` into a local folder, for tests and shared storage.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Protocol
+
+logger = logging.getLogger('subspace-digital-twin')
+
+# Files above this size are uploaded to S3 in parts of this size
+MULTIPART_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+class UploadBackend(Protocol):
+    def put(self, path: Path, key: str): ...
+
+
+class S3Backend:
+    """
+    An S3 bucket, or any S3-compatible store given its `endpoint_url`.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None,
+                 multipart_chunk_bytes: int = MULTIPART_CHUNK_BYTES, concurrency: int = 4):
+        import boto3  # type: ignore
+        from boto3.s3.transfer import TransferConfig  # type: ignore
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        # boto3 clients are thread-safe, unlike sessions
+        self.client = boto3.session.Session().client("s3", endpoint_url=endpoint_url)
+        self.config = TransferConfig(multipart_threshold=multipart_chunk_bytes,
+                                     multipart_chunksize=multipart_chunk_bytes,
+                                     max_concurrency=concurrency)
+
+    def put(self, path: Path, key: str):
+        key = f"{self.prefix}/{key}" if self.prefix else key
+        self.client.upload_file(str(path), self.bucket, key, Config=self.config)
+
+
+class FileSystemBackend:
+    """A local folder, written to atomically so that no partial file is seen."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def put(self, path: Path, key: str):
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, target)
+
+
+def upload_backend(destination: str) -> UploadBackend:
+    """The backend of an `s3://bucket/prefix` URL or of a local folder."""
+    if destination.startswith("s3://"):
+        bucket, _, prefix = destination[len("s3://"):].partition("/")
+        return S3Backend(bucket, prefix, endpoint_url=os.environ.get("S3_ENDPOINT_URL"))
+    return FileSystemBackend(destination)
+
+
+class Uploader:
+    """
+    Uploads files in the background through `backend`, retrying each one
+    up to `retries` times with exponential backoff.
+    """
+
+    def __init__(self, backend: UploadBackend, workers: int = 4, max_pending: int = 16,
+                 retries: int = 3, backoff_s: float = 1.0):
+        self.backend = backend
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures: list[Future] = []
+        self._lock = threading.Lock()
+        self.uploaded_bytes = 0
+        self.failed: list[tuple[Path, str]] = []
+
+    def _upload(self, path: Path, key: str, remove: bool):
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    self.backend.put(path, key)
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        logger.error(f"Giving up on uploading {path} to {key}: {e}")
+                        self.failed.append((path, f"{type(e).__name__}: {e}"))
+                        return
+                    logger.warning(f"Retrying the upload of {path} after {type(e).__name__}: {e}")
+                    time.sleep(self.backoff_s * 2 ** attempt)
+            with self._lock:
+                self.uploaded_bytes += path.stat().st_size
+            if remove:
+                path.unlink()
+        finally:
+            self._slots.release()
+
+    def submit(self, path: str | Path, key: str | Path, remove: bool = False):
+        """
+        Queue a file, or every file under a directory, to be uploaded under
+        `key`. With `remove`, files are deleted once uploaded, and a
+        directory once all its files are. Blocks while the queue is full.
+        """
+        path = Path(path)
+        files = [path] if not path.is_dir() else sorted(f for f in path.rglob("*") if f.is_file())
+        futures = []
+        for file in files:
+            self._slots.acquire()
+            file_key = str(key) if file == path else str(Path(key) / file.relative_to(path))
+            futures.append(self._executor.submit(self._upload, file, file_key, remove))
+        if remove and path.is_dir():
+            def remove_dir(_):
+                if all(f.done() for f in futures) and path.exists() and not self.failed:
+                    shutil.rmtree(path, ignore_errors=True)
+            for future in futures:
+                future.add_done_callback(remove_dir)
+        self._futures.extend(futures)
+
+    def close(self):
+        """Wait for every queued upload, and raise if any of them failed."""
+        for future in self._futures:
+            future.result()
+        self._executor.shutdown()
+        if self.failed:
+            raise RuntimeError(f"{len(self.failed)} uploads failed: {self.failed}")
+
+    def __enter__(self) -> 'Uploader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True, cancel_futures=True)
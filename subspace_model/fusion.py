@@ -0,0 +1,276 @@
+"""
+Static dependency analysis and substep fusion for partial state update blocks.
+
+Every policy and state update function (SUF) is inspected for the state keys
+it reads and writes. State reads are found statically by walking string
+constants through the function code, its closures, the module functions it
+references and any functional parameter it looks up. Writes (the key a SUF
+returns) and policy signals are found by probing each function once on a
+dummy state, falling back to the function's own constants when the probe
+fails.
+
+Adjacent blocks are fused only when doing so cannot change any value: the
+later block must not read (read-after-write) or overwrite (write-after-write)
+what the earlier one writes, and they must share no policy signal keys.
+Write-after-read is safe, as every function in a fused substep still sees
+the pre-substep state. Fusing into the first block of a timestep is refused
+too, since cadCAD evaluates the first substep against the previous
+timestep's counter.
+
+    python -m subspace_model.fusion
+"""
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import CodeType, FunctionType, MethodType
+from typing import Any, Callable
+
+from subspace_model.params import DEFAULT_PARAMS
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
+
+logger = logging.getLogger('subspace-digital-twin')
+
+
+@dataclass
+class BlockAccess:
+    label: str
+    reads: set[str] = field(default_factory=set)
+    writes: set[str] = field(default_factory=set)
+    signals: set[str] = field(default_factory=set)
+
+
+def _code_objects(code: CodeType):
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _code_objects(const)
+
+
+def _is_model_object(obj: Any) -> bool:
+    return (getattr(obj, '__module__', None) or '').startswith('subspace_model')
+
+
+class _Scanner:
+    """
+    Collects the string constants reachable from a function.
+    """
+
+    def __init__(self, params: list[Mapping]):
+        self.params = params
+        self._cache: dict[int, set[str]] = {}
+
+    def own_strings(self, f: Callable) -> set[str]:
+        """String constants in a function's own code and closure."""
+        f = getattr(f, '__func__', f)
+        strings: set[str] = set()
+        if isinstance(f, FunctionType):
+            for code in _code_objects(f.__code__):
+                strings |= {c for c in code.co_consts if isinstance(c, str)}
+            for cell in f.__closure__ or ():
+                try:
+                    value = cell.cell_contents
+                except ValueError:
+                    continue
+                if isinstance(value, str):
+                    strings.add(value)
+        return strings
+
+    def strings(self, obj: Any, _visiting: set[int] | None = None) -> set[str]:
+        """String constants reachable from `obj` through code, closures,
+        referenced module functions and functional parameters."""
+        visiting = set() if _visiting is None else _visiting
+        if id(obj) in self._cache:
+            return self._cache[id(obj)]
+        if id(obj) in visiting:
+            return set()
+        visiting.add(id(obj))
+
+        strings: set[str] = set()
+        children: list[Any] = []
+        if isinstance(obj, MethodType):
+            children += [obj.__func__, obj.__self__]
+        elif isinstance(obj, FunctionType):
+            strings |= self.own_strings(obj)
+            for cell in obj.__closure__ or ():
+                try:
+                    children.append(cell.cell_contents)
+                except ValueError:
+                    pass
+            children += list(obj.__dict__.values())
+            for code in _code_objects(obj.__code__):
+                children += [obj.__globals__[name] for name in code.co_names
+                             if name in obj.__globals__]
+        elif isinstance(obj, (list, tuple, set)):
+            children += list(obj)
+        elif isinstance(obj, type) and _is_model_object(obj):
+            for value in vars(obj).values():
+                children.append(getattr(value, 'fget', getattr(value, '__func__', value)))
+        elif _is_model_object(obj) and not isinstance(obj, type):
+            children.append(type(obj))
+            children += list(getattr(obj, '__dict__', {}).values())
+
+        for child in children:
+            if isinstance(child, (FunctionType, MethodType, list, tuple, set)) or _is_model_object(child):
+                strings |= self.strings(child, visiting)
+
+        # Functional parameters looked up by name are part of the function
+        for key in list(strings):
+            for params in self.params:
+                value = params.get(key) if isinstance(params, Mapping) else None
+                if callable(value) or isinstance(value, (list, tuple)):
+                    strings |= self.strings(value, visiting)
+
+        visiting.discard(id(obj))
+        if _visiting is None:
+            self._cache[id(obj)] = strings
+        return strings
+
+
+class _ProbeSignal(dict):
+    def __missing__(self, key):
+        return 1.0
+
+    def get(self, key, default=None):
+        return self[key]
+
+
+def _probe_state() -> dict:
+    state = {k: 1.0 for k in INITIAL_STATE}
+    # A trajectory no simulation uses, so probes don't disturb random streams
+    state.update(timestep=1, substep=1, simulation=-1, subset=-1, run=-1)
+    return state
+
+
+def block_access(block: dict, params: Mapping, scanner: _Scanner, state_keys: set[str]) -> BlockAccess:
+    """
+    State keys read and written by a block, along with the policy signal
+    keys it produces or consumes.
+    """
+    access = BlockAccess(block.get("label", ""))
+    for policy in block.get("policies", {}).values():
+        access.reads |= scanner.strings(policy) & state_keys
+        try:
+            signal = policy(params, 0, [], _probe_state())
+            access.signals |= set(signal.keys())
+        except Exception:
+            access.signals |= scanner.own_strings(policy)
+
+    for variable, suf in block.get("variables", {}).items():
+        access.reads |= scanner.strings(suf) & state_keys
+        # SUFs read the signal keys they refer to
+        access.signals |= scanner.own_strings(suf) - state_keys
+        access.writes.add(variable)
+        try:
+            key, _ = suf(params, 0, [], _probe_state(), _ProbeSignal())
+            access.writes.add(key)
+        except Exception:
+            access.writes |= scanner.own_strings(suf) & state_keys
+    return access
+
+
+def dependency_graph(blocks: list[dict] = SUBSPACE_MODEL_BLOCKS,
+                     params: Mapping | list[Mapping] = DEFAULT_PARAMS) -> tuple[list[BlockAccess], dict[int, set[int]]]:
+    """
+    Per-block state access and the read-after-write dependencies between
+    blocks, as a map from each block index to the earlier blocks whose
+    writes it reads.
+
+    `params` may be a single parameter set or every parameter set of a sweep,
+    in which case functional parameters from all of them are inspected.
+    """
+    params_list = [params] if isinstance(params, Mapping) else list(params)
+    scanner = _Scanner(params_list)
+    state_keys = set(INITIAL_STATE) | {"timestep", "substep"}
+    for block in blocks:
+        state_keys |= set(block.get("variables", {}))
+
+    accesses = [block_access(block, params_list[0], scanner, state_keys) for block in blocks]
+    dependencies: dict[int, set[int]] = {}
+    for j, access in enumerate(accesses):
+        dependencies[j] = {i for i in range(j) if accesses[i].writes & access.reads}
+    return accesses, dependencies
+
+
+def fusion_hazards(first: BlockAccess, second: BlockAccess) -> list[str]:
+    """
+    Reasons why `second` cannot be merged into the substep of `first`.
+    """
+    hazards = []
+    if raw := first.writes & second.reads:
+        hazards.append(f"read-after-write on {sorted(raw)}")
+    if waw := first.writes & second.writes:
+        hazards.append(f"write-after-write on {sorted(waw)}")
+    if signals := first.signals & second.signals:
+        hazards.append(f"shared policy signals {sorted(signals)}")
+    return hazards
+
+
+def merge_blocks(first: dict, second: dict, first_access: BlockAccess, second_access: BlockAccess) -> dict:
+    """
+    Merge two blocks into a single substep.
+
+    Raises:
+        ValueError: If fusing would change the result
+    """
+    hazards = fusion_hazards(first_access, second_access)
+    if set(first["variables"]) & set(second["variables"]):
+        hazards.append("duplicate variables")
+    if set(first["policies"]) & set(second["policies"]):
+        hazards.append("duplicate policy names")
+    if hazards:
+        raise ValueError(
+            f"Cannot fuse '{first_access.label}' and '{second_access.label}': {'; '.join(hazards)}")
+    return {
+        "label": f"{first.get('label', '')} + {second.get('label', '')}",
+        "policies": {**first["policies"], **second["policies"]},
+        "variables": {**first["variables"], **second["variables"]},
+    }
+
+
+def fuse_blocks(blocks: list[dict] = SUBSPACE_MODEL_BLOCKS,
+                params: Mapping | list[Mapping] = DEFAULT_PARAMS) -> list[dict]:
+    """
+    Semantically equivalent block list with adjacent independent blocks
+    fused into single substeps.
+    """
+    accesses, _ = dependency_graph(blocks, params)
+    fused: list[dict] = []
+    fused_accesses: list[BlockAccess] = []
+    for block, access in zip(blocks, accesses):
+        # The first substep sees the previous timestep, so keep it apart
+        if len(fused) > 1 and not fusion_hazards(fused_accesses[-1], access):
+            try:
+                fused[-1] = merge_blocks(fused[-1], block, fused_accesses[-1], access)
+            except ValueError:
+                pass
+            else:
+                last = fused_accesses[-1]
+                fused_accesses[-1] = BlockAccess(fused[-1]["label"],
+                                                 last.reads | access.reads,
+                                                 last.writes | access.writes,
+                                                 last.signals | access.signals)
+                continue
+        fused.append(block)
+        fused_accesses.append(access)
+    return fused
+
+
+def dependency_report(blocks: list[dict] = SUBSPACE_MODEL_BLOCKS,
+                      params: Mapping | list[Mapping] = DEFAULT_PARAMS) -> str:
+    accesses, dependencies = dependency_graph(blocks, params)
+    lines = []
+    for i, access in enumerate(accesses):
+        depends_on = ", ".join(accesses[d].label for d in sorted(dependencies[i])) or "-"
+        lines.append(f"[{i}] {access.label}")
+        lines.append(f"    reads:      {', '.join(sorted(access.reads))}")
+        lines.append(f"    writes:     {', '.join(sorted(access.writes))}")
+        lines.append(f"    depends on: {depends_on}")
+    fused = fuse_blocks(blocks, params)
+    lines.append(f"Fused {len(blocks)} blocks into {len(fused)}:")
+    lines += [f"    {block.get('label', '')}" for block in fused]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(dependency_report())
@@ -647,9 +647,8 @@ def p_transfers(
 def s_reference_subsidy(
     params: SubspaceModelParams, _2, state_history: list, state: SubspaceModelState, _5) -> tuple:
     """ """
-    current_reference_subsidy = 0.0
-    for component in params['reference_subsidy_components']:
-        current_reference_subsidy += component(state['blocks_passed'])
+    schedule = SubsidySchedule.compile(params['reference_subsidy_components'], state['delta_blocks'])
+    current_reference_subsidy = schedule(state['blocks_passed'])
 
     if state['timestep'] > 1:
         avg_ref_subsidy = (current_reference_subsidy + state['reference_subsidy']) / 2
@@ -660,25 +659,46 @@ def s_reference_subsidy(
     return ("reference_subsidy", avg_ref_subsidy)
 
 
-def s_cumm_generic(source_col, target_col, nan_value=0.0):
+def s_cumm_running(source_col, nan_value=0.0):
+    """
+    Running total of `source_col` over all timesteps on `cumm_<source_col>`,
+    so that each step costs O(1) regardless of the history length. NaN
+    source values are accumulated as `nan_value`.
+    """
+    target_col = f"cumm_{source_col}"
+    # -> tuple[Any, Any]:
+    def suf(_1, _2, _3, state: SubspaceModelState, _5):
+        value = state[source_col]
+        if isnan(value):
+            value = nan_value
+        return (target_col, state[target_col] + value)
+    return suf
+
+
+def s_cumm_generic(source_col, target_col):
+    """
+    Cumulative sum of `source_col` on `target_col`: the running total of the
+    previous timesteps plus the current value as it is. A NaN makes its own
+    timestep NaN and counts as the running total's `nan_value` afterwards,
+    as the sum over the whole history did.
+    """
+    running_col = f"cumm_{source_col}"
     # -> tuple[Any, Any]:
-    def suf(_1, _2, history: list[list[SubspaceModelState]], state: SubspaceModelState, _5):
-        value = 0.0
-        for h in history:
-            past_value = h[-1][source_col] # type: ignore
-            if isnan(past_value):
-                past_value = nan_value
-            value += past_value
-        value += state[source_col]  # XXX: check if there's no double counting
-        return (target_col, value)
+    def suf(_1, _2, _3, state: SubspaceModelState, _5):
+        return (target_col, state[running_col] + state[source_col])
     return suf
 
 
+s_cumm_block_reward = s_cumm_running("block_reward")
+s_cumm_storage_fee_volume = s_cumm_running("storage_fee_volume")
+# Unlike other cumulative metrics, a NaN fee volume is kept rather than
+# skipped, so that cumm_compute_fees_to_farmers stays NaN from then on, as
+# its sum over the whole history did
+s_cumm_compute_fee_volume = s_cumm_running("compute_fee_volume", nan_value=float('nan'))
+
+
 # -> tuple[Any, Any]:
-def s_cumm_compute_fee_to_farmers(p: SubspaceModelParams, _2, history: list[list[SubspaceModelState]], state: SubspaceModelState, _5):
-    value = 0.0
-    for h in history:
-        value += h[-1]['compute_fee_volume']
-    value += state['compute_fee_volume']
+def s_cumm_compute_fee_to_farmers(p: SubspaceModelParams, _2, _3, state: SubspaceModelState, _5):
+    value = state['cumm_compute_fee_volume'] + state['compute_fee_volume']
     value *= p['compute_fees_to_farmers']
     return ("cumm_compute_fees_to_farmers", value)
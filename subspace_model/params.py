@@ -8,6 +8,7 @@ from subspace_model.experiments.logic import predictable_trajectory
 from subspace_model.experiments.logic import (
     DEFAULT_REFERENCE_SUBSIDY_COMPONENTS,
     MAINNET_REFERENCE_SUBSIDY_COMPONENTS,
+    CONSTANT,
     DEFAULT_SLASH_FUNCTION,
     MAGNITUDE,
     NORMAL_GENERATOR,
@@ -22,16 +23,11 @@ from subspace_model.experiments.logic import (
 )
 
 
-def operator_stake_per_ts_function(p: SubspaceModelParams, s: SubspaceModelState):
-    return 0.01
+operator_stake_per_ts_function = CONSTANT(0.01)
 
+nominator_stake_per_ts_function = CONSTANT(0.01)
 
-def nominator_stake_per_ts_function(p: SubspaceModelParams, s: SubspaceModelState):
-    return 0.01
-
-
-def compute_weights_per_tx_function(p: SubspaceModelParams, s: SubspaceModelState):
-    return 60_000_000
+compute_weights_per_tx_function = CONSTANT(60_000_000)
 
 
 DEFAULT_PARAMS = SubspaceModelParams(
@@ -39,6 +35,8 @@ DEFAULT_PARAMS = SubspaceModelParams(
     label="standard",
     environmental_label="standard",
     timestep_in_days=1,
+    rng_seed=None,
+    rng_subset=None,
     # Mechanism Parameters
     slash_function=DEFAULT_SLASH_FUNCTION,
     reference_subsidy_components=DEFAULT_REFERENCE_SUBSIDY_COMPONENTS,
@@ -66,31 +64,31 @@ DEFAULT_PARAMS = SubspaceModelParams(
     # Behavioral Parameters Between 0 and 1
     operator_stake_per_ts_function=operator_stake_per_ts_function,
     nominator_stake_per_ts_function=nominator_stake_per_ts_function,
-    transfer_operator_to_farmer_per_day_function=lambda p, s: 0.05,
-    transfer_farmer_to_nominator_per_day_function=lambda p, s: 0.01,
-    transfer_farmer_to_operator_per_day_function=lambda p, s: 0.01,
+    transfer_operator_to_farmer_per_day_function=CONSTANT(0.05),
+    transfer_farmer_to_nominator_per_day_function=CONSTANT(0.01),
+    transfer_farmer_to_operator_per_day_function=CONSTANT(0.01),
     # Environmental Parameters (Integer positive in [0,inf])
     ## Environmental: Fees
-    priority_fee_function=lambda p, s: 0,
+    priority_fee_function=CONSTANT(0),
     ## Enviromental: Compute Weights per Tx
     compute_weights_per_tx_function=compute_weights_per_tx_function,
     min_compute_weights_per_tx=6_000_000,  # XXX
-    compute_weight_per_bundle_function=lambda p, s: 10_000_000_000,
+    compute_weight_per_bundle_function=CONSTANT(10_000_000_000),
     min_compute_weights_per_bundle=2_000_000_000,  # XXX
     ## Environmental: Tx Sizes
-    transaction_size_function=lambda p, s: 256,
+    transaction_size_function=CONSTANT(256),
     min_transaction_size=100,  # XXX
-    bundle_size_function=lambda p, s: 1500,
+    bundle_size_function=CONSTANT(1500),
     min_bundle_size=250,  # XXX
     ## Environmental: Tx Count
-    bundle_count_per_day_function=lambda p, s: 6 * BLOCKS_PER_DAY,
+    bundle_count_per_day_function=CONSTANT(6 * BLOCKS_PER_DAY),
     transaction_count_per_day_function=TRANSACTION_COUNT_PER_DAY_FUNCTION_FROM_UTILIZATION_RATIOS,
     ## Environmental: Slash Count
-    slash_per_day_function=lambda p, s: 0,
+    slash_per_day_function=CONSTANT(0),
     ## Environmental: Space Pledged per Time
-    newly_pledged_space_per_day_function=lambda p, s: 100.0 * (2 ** 50),
+    newly_pledged_space_per_day_function=CONSTANT(100.0 * (2 ** 50)),
     utilization_ratio=0.01,
-    utilization_ratio_function=MAGNITUDE(SCENARIO_GROUPS([0.01])[0])
+    utilization_ratio_function=MAGNITUDE(SCENARIO_GROUPS([0.01], key="utilization_ratio_function")[0])
 )
 
 
@@ -108,28 +106,28 @@ GOVERNANCE_SURFACE: Dict[str, List] = {
 
 ENVIRONMENTAL_SCENARIOS: Dict[str, List[Callable]] = {
     "utilization_ratio_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.005, 0.01, 0.02])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.005, 0.01, 0.02], key="utilization_ratio_function")
     ],
     "priority_fee_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0], key="priority_fee_function")
     ],
     "slash_per_day_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0], key="slash_per_day_function")
     ],
     "operator_stake_per_ts_function": [
-        NORMAL_GENERATOR(0.01, 0.02)
+        NORMAL_GENERATOR(0.01, 0.02, key="operator_stake_per_ts_function")
     ],
     "nominator_stake_per_ts_function": [
-        NORMAL_GENERATOR(0.01, 0.02)
+        NORMAL_GENERATOR(0.01, 0.02, key="nominator_stake_per_ts_function")
     ],
     "transfer_operator_to_farmer_per_day_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.1])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.1], key="transfer_operator_to_farmer_per_day_function")
     ],
     "transfer_farmer_to_nominator_per_day_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.025])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.025], key="transfer_farmer_to_nominator_per_day_function")
     ],
     "transfer_farmer_to_operator_per_day_function": [
-        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.025])
+        MAGNITUDE(generator) for generator in SCENARIO_GROUPS([0.025], key="transfer_farmer_to_operator_per_day_function")
     ],
 }
 
@@ -137,32 +135,32 @@ ENVIRONMENTAL_SCENARIOS: Dict[str, List[Callable]] = {
 SPECIAL_ENVIRONMENTAL_SCENARIOS = {
     "stochastic": {
         # Behavioral Parameters Between 0 and 1
-        "operator_stake_per_ts_function": NORMAL_GENERATOR(0.01, 0.02),
-        "nominator_stake_per_ts_function": NORMAL_GENERATOR(0.01, 0.02),
+        "operator_stake_per_ts_function": NORMAL_GENERATOR(0.01, 0.02, key="operator_stake_per_ts_function"),
+        "nominator_stake_per_ts_function": NORMAL_GENERATOR(0.01, 0.02, key="nominator_stake_per_ts_function"),
         "transfer_operator_to_farmer_per_day_function": MAGNITUDE(
-            NORMAL_GENERATOR(0.05, 0.05)
+            NORMAL_GENERATOR(0.05, 0.05, key="transfer_operator_to_farmer_per_day_function")
         ),
         "transfer_farmer_to_nominator_per_day_function": MAGNITUDE(
-            NORMAL_GENERATOR(0.01, 0.02)
+            NORMAL_GENERATOR(0.01, 0.02, key="transfer_farmer_to_nominator_per_day_function")
         ),
         "transfer_farmer_to_operator_per_day_function": MAGNITUDE(
-            NORMAL_GENERATOR(0.01, 0.02)
+            NORMAL_GENERATOR(0.01, 0.02, key="transfer_farmer_to_operator_per_day_function")
         ),
         # Environmental Parameters (Integer positive in [0,inf])
         "environmental_label": "stochastic",
-        "priority_fee_function": POSITIVE_INTEGER(NORMAL_GENERATOR(0, 0.001)),
+        "priority_fee_function": POSITIVE_INTEGER(NORMAL_GENERATOR(0, 0.001, key="priority_fee_function")),
         "compute_weights_per_tx_function": POSITIVE_INTEGER(
-            NORMAL_GENERATOR(60_000_000, 15_000_000)
+            NORMAL_GENERATOR(60_000_000, 15_000_000, key="compute_weights_per_tx_function")
         ),
         "compute_weight_per_bundle_function": POSITIVE_INTEGER(
-            NORMAL_GENERATOR(10_000_000_000, 5_000_000_000)
+            NORMAL_GENERATOR(10_000_000_000, 5_000_000_000, key="compute_weight_per_bundle_function")
         ),
-        "transaction_size_function": POSITIVE_INTEGER(NORMAL_GENERATOR(256, 100)),
-        "bundle_size_function": POSITIVE_INTEGER(NORMAL_GENERATOR(1500, 1000)),
-        "transaction_count_per_day_function": POISSON_GENERATOR(1 * BLOCKS_PER_DAY),
-        "bundle_count_per_day_function": POISSON_GENERATOR(6 * BLOCKS_PER_DAY),
-        "slash_per_day_function": POISSON_GENERATOR(0.1),
-        "new_sectors_per_day_function": POSITIVE_INTEGER(NORMAL_GENERATOR(1000, 500)),
+        "transaction_size_function": POSITIVE_INTEGER(NORMAL_GENERATOR(256, 100, key="transaction_size_function")),
+        "bundle_size_function": POSITIVE_INTEGER(NORMAL_GENERATOR(1500, 1000, key="bundle_size_function")),
+        "transaction_count_per_day_function": POISSON_GENERATOR(1 * BLOCKS_PER_DAY, key="transaction_count_per_day_function"),
+        "bundle_count_per_day_function": POISSON_GENERATOR(6 * BLOCKS_PER_DAY, key="bundle_count_per_day_function"),
+        "slash_per_day_function": POISSON_GENERATOR(0.1, key="slash_per_day_function"),
+        "new_sectors_per_day_function": POSITIVE_INTEGER(NORMAL_GENERATOR(1000, 500, key="new_sectors_per_day_function")),
     },
     "weekly-varying": {
         "environmental_label": "weekly-varying",
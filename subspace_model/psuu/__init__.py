@@ -1,9 +1,11 @@
 from subspace_model.types import *
+import numpy as np
 import pandas as pd
 from glob import glob
 import re
 import os
 from datetime import datetime
+from typing import Iterable
 
 
 
@@ -20,58 +22,170 @@ GOVERNANCE_SURFACE_PARAMS = [
     'weight_to_fee']
 
 
-def timestep_tensor_to_trajectory_tensor(sim_df: pd.DataFrame) -> pd.DataFrame:
-    i = 0
-    sim_df[f'component_{i+1}_initial_period_start'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].initial_period_start)
-    sim_df[f'component_{i+1}_initial_period_duration'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].initial_period_duration)
-    sim_df[f'component_{i+1}_max_cumulative_subsidy'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].max_cumulative_subsidy)
-    sim_df[f'component_{i+1}_max_reference_subsidy'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].max_reference_subsidy)
-
-    i = 1
-    sim_df[f'component_{i+1}_initial_period_start'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].initial_period_start)
-    sim_df[f'component_{i+1}_initial_period_duration'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].initial_period_duration)
-    sim_df[f'component_{i+1}_max_cumulative_subsidy'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].max_cumulative_subsidy)
-    sim_df[f'component_{i+1}_max_reference_subsidy'] = sim_df.reference_subsidy_components.map(
-        lambda x: x[i].max_reference_subsidy)
+SUBSIDY_COMPONENT_FIELDS = ['initial_period_start', 'initial_period_duration',
+                            'max_cumulative_subsidy', 'max_reference_subsidy']
+
+# Numeric columns for the fields of the two reference subsidy components, as
+# the parameter they are read from and how. Engines attach them in place of
+# the object column when they are among the assigned parameters.
+GOVERNANCE_PARAM_COLUMNS = {
+    f'component_{i+1}_{field}': ('reference_subsidy_components',
+                                 lambda components, i=i, field=field: getattr(components[i], field))
+    for i in range(2) for field in SUBSIDY_COMPONENT_FIELDS
+}
+
+
+def expand_governance_columns(sim_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add a numeric column for every field of the two reference subsidy
+    components. Columns that are already there, as simulations attach
+    them, are left as they are.
+    """
+    for column, (param, field_of) in GOVERNANCE_PARAM_COLUMNS.items():
+        if column not in sim_df.columns:
+            sim_df[column] = sim_df[param].map(field_of)
+    return sim_df
+
+
+def kpi_input_columns(columns: Iterable[str]) -> list[str]:
+    """
+    The columns among `columns` that the trajectory tensor is computed from:
+    the trajectory ids, the governance surface and the KPI state variables.
+    """
+    from subspace_model.params import GOVERNANCE_SURFACE
+    from subspace_model.psuu.kpis import KPI_STATE_VARIABLES
+    return [c for c in columns
+            if c in KPI_STATE_VARIABLES or c in ('simulation', 'subset', 'run', 'timestep')
+            or c.startswith('component_') or c in GOVERNANCE_SURFACE]
+
 
+def trajectory_tensor_keys(sim_df: pd.DataFrame) -> list[str]:
+    """
+    The columns that index the trajectory tensor: the trajectory ids and
+    the governance surface, with the subsidy components as flat columns.
+    """
     from subspace_model.params import GOVERNANCE_SURFACE
     governance_surface_params = (set(GOVERNANCE_SURFACE.keys()) | {
                                  c for c in sim_df.columns if 'component' in c}) - {'reference_subsidy_components'}
 
     trajectory_id_columns = ['simulation', 'subset', 'run']
-    agg_columns = trajectory_id_columns + list(governance_surface_params)
-
-    from subspace_model.psuu.kpis import KPI_functions
-
-    kpi_dfs = []
-    threshold_dfs = []
-    for kpi, (kpi_f, kpi_t) in KPI_functions.items():
-        kpi_s = sim_df.groupby(agg_columns).apply(kpi_f, include_groups=False)
-        kpi_s.name = kpi
-        kpi_dfs.append(kpi_s)
-
-    all_kpi_df = pd.concat(kpi_dfs, axis=1)
+    return trajectory_id_columns + sorted(governance_surface_params)
+
+
+def join_parameters(sim_df: pd.DataFrame, parameters: pd.DataFrame,
+                    columns: Iterable[str] | None = None) -> pd.DataFrame:
+    """
+    Attach to every row the parameters of its subset, all of them or only
+    `columns`, from a parameter table indexed by (simulation, subset).
+    """
+    rows = parameters.index.get_indexer(pd.MultiIndex.from_frame(sim_df[['simulation', 'subset']]))
+    if (rows < 0).any():
+        raise ValueError("Some subsets are missing from the parameter table")
+    columns = parameters.columns if columns is None else columns
+    return sim_df.assign(**{c: parameters[c].to_numpy()[rows] for c in columns})
+
+
+def timestep_tensor_to_trajectory_tensor(sim_df: pd.DataFrame, parameters: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    The KPIs of every trajectory, indexed by the trajectory ids and the
+    governance surface. Given the run's `parameters` table, trajectories
+    are grouped by their integer ids alone and the governance surface is
+    joined from it afterwards.
+    """
+    if parameters is None:
+        sim_df = expand_governance_columns(sim_df)
+        agg_columns = trajectory_tensor_keys(sim_df)
+    else:
+        agg_columns = ['simulation', 'subset', 'run']
+
+    from subspace_model.psuu.kpis import KPI_functions, SEGMENT_KPI_functions
+    from subspace_model.psuu.segments import Segments
+
+    # Number the trajectories once, and reduce every KPI over them in one pass
+    grouped = sim_df.groupby(agg_columns)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    segments = Segments(sim_df, codes, len(index))
+
+    kpis = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for kpi, (kpi_f, kpi_t) in KPI_functions.items():
+            if kpi in SEGMENT_KPI_functions:
+                kpis[kpi] = pd.Series(SEGMENT_KPI_functions[kpi](segments), index=index)
+            else:
+                kpis[kpi] = grouped.apply(kpi_f, include_groups=False)
+
+    all_kpi_df = pd.DataFrame(kpis)
+    if parameters is not None:
+        ids = join_parameters(all_kpi_df.index.to_frame(index=False), parameters)
+        all_kpi_df.index = pd.MultiIndex.from_frame(ids[trajectory_tensor_keys(ids)])
     return all_kpi_df
 
-def create_latest_trajectory_tensor(directory:str="./data/simulations/") -> pd.DataFrame:
-# Combine all of the chunks and write simulation results to disk
+def _chunk_trajectory_tensor(part: str | None, output: str, parameters: str | None = None) -> str:
+    """
+    Write the trajectory tensor of one timestep tensor part, unless it is
+    already there.
+    """
+    if not os.path.exists(output):
+        if part is None:
+            raise ValueError(f"{output} is missing and its chunk has no timestep tensor to compute it from")
+        if parameters is not None:
+            parameters = pd.read_pickle(parameters)
+        from subspace_model.experiments.sinks import read_columns, read_sink
+        if part.endswith('.pkl.gz'):
+            sim_df = pd.read_pickle(part, compression='gzip')
+        else:
+            sim_df = read_sink(part, columns=kpi_input_columns(read_columns(part)))
+        timestep_tensor_to_trajectory_tensor(sim_df, parameters).reset_index().to_pickle(output)
+    return output
+
+
+def create_latest_trajectory_tensor(directory:str="./data/simulations/", columns: list[str] | None = None, filters=None,
+                                    processes: int = 2) -> pd.DataFrame:
+    """
+    Trajectory tensor of the latest PSuU run, with only the given `columns`
+    and the rows matching `filters`, eg. `[("subset", "in", [0, 1])]`, as a
+    flat DataFrame with the trajectory ids and governance surface as
+    columns. Runs written as Parquet datasets are read directly.
+
+    Otherwise the timestep tensor parts are reduced by a pool of `processes`
+    workers, one part at a time each, into the run's per-chunk trajectory
+    tensors. Chunks whose trajectory tensor already exists are skipped.
+    The chunk tensors are appended in order to a Parquet file in
+    data/trajectory_tensors, so that at most a few parts are held in memory.
+    Raises ValueError for chunks with neither a timestep nor a trajectory
+    tensor.
+    """
     latest = sorted(glob(f"{directory}psuu_run*"))[-1]
-    parts = sorted(glob(f"{latest}/*"), key=lambda x: int(re.search(r"-([0-9]+)\.pkl\.gz$", x).group(1)))
-
-    data = []
-    for part in parts:
-        print(part)
-        data.append(timestep_tensor_to_trajectory_tensor(pd.read_pickle(part, compression='gzip')))
-
-    trajectory_tensor = pd.concat(data)
-
-    trajectory_tensor.to_pickle(f'./data/trajectory_tensors/{datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")}.pkl.gz', compression='gzip')
-
-    return trajectory_tensor
+    if os.path.isdir(f"{latest}/trajectory_tensor"):
+        from subspace_model.experiments.sinks import read_dataset
+        return read_dataset(f"{latest}/trajectory_tensor", columns=columns, filters=filters)
+
+    from joblib import Parallel, delayed  # type: ignore
+    from subspace_model.experiments.sinks import ParquetSink, read_sink
+
+    # Chunks of KPI-only runs have a trajectory tensor and no timestep tensor
+    chunk_pattern = re.compile(r"(timestep|trajectory)_tensor-([0-9]+)\.(pkl\.gz|parquet|arrow)$")
+    parts: dict[int, str | None] = {}
+    if os.path.exists(f"{latest}/manifest.json"):
+        from subspace_model.experiments.manifest import RunManifest
+        parts = {i: None for i in range(len(RunManifest.load(latest).chunks))}
+    for path in sorted(glob(f"{latest}/t*_tensor-*")):
+        if m := chunk_pattern.search(path):
+            parts.setdefault(int(m.group(2)), None)
+            if m.group(1) == "timestep":
+                parts[int(m.group(2))] = path
+
+    # Normalized runs keep the parameters of their subsets apart
+    parameters = f"{latest}/parameters.pkl.gz" if os.path.exists(f"{latest}/parameters.pkl.gz") else None
+
+    os.makedirs('./data/trajectory_tensors', exist_ok=True)
+    output = f'./data/trajectory_tensors/{datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")}.parquet'
+    chunk_tensors = Parallel(n_jobs=processes, return_as="generator")(
+        delayed(_chunk_trajectory_tensor)(part, f"{latest}/trajectory_tensor-{i}.pkl.gz", parameters)
+        for i, part in sorted(parts.items()))
+    with ParquetSink(output) as sink:
+        for chunk_tensor in chunk_tensors:
+            sink.write(pd.read_pickle(chunk_tensor))
+
+    return read_sink(output, columns=columns, filters=filters)
@@ -1,6 +1,10 @@
+from subspace_model.psuu import expand_governance_columns, join_parameters, trajectory_tensor_keys
 from subspace_model.psuu.types import *
+from subspace_model.psuu.segments import Segments
 from subspace_model.types import *
 from math import sqrt
+import numpy as np
+from typing import Mapping
 
 ## KPIs
 
@@ -40,8 +44,89 @@ def cumm_rewards(df: TrajectoryDataFrame) -> KPI:
     return df.block_reward.sum()
 
 
+## Online KPIs
+
+# A term of every trajectory at one timestep, given its state then and at the previous timestep
+OnlineTerm = Callable[[Mapping[str, np.ndarray], Mapping[str, np.ndarray]], np.ndarray]
+
+
+class Sum(NamedTuple):
+    """Sum of a term over the timesteps, skipping NaNs."""
+    term: OnlineTerm
+
+
+class Mean(NamedTuple):
+    """Mean of a term over the timesteps where it is not NaN."""
+    term: OnlineTerm
+
+
+class OnlineKPI(NamedTuple):
+    """A KPI as streaming reducers, combined by `finish` once a trajectory ends."""
+    reducers: tuple[Sum | Mean, ...]
+    finish: Callable[..., np.ndarray] = lambda x: x
+
+
+# The KPIs of `KPI_functions` as reductions of per-timestep terms. They are
+# reduced online by `KPIAccumulator` and over the timestep tensor rows of all
+# trajectories by `SEGMENT_KPI_functions`.
+ONLINE_KPI_functions: dict[str, OnlineKPI] = {
+    'mean_relative_community_owned_supply': OnlineKPI((
+        Mean(lambda s, p: s['community_owned_supply'] / (s['allocated_tokens'] + s['issued_supply'])),)),
+    # Farmer Subsidy Factor = Cummulative Rewards / Cummulative Farmer Revenue
+    # Where Revenue = Cummulative Farmer Inflows (Rewards + Storage Fees + Compute Fees)
+    'mean_farmer_subsidy_factor': OnlineKPI((
+        Mean(lambda s, p: s['cumm_rewards'] / (s['cumm_rewards'] + s['cumm_storage_fees_to_farmers'] + s['cumm_compute_fees_to_farmers'])),)),
+    # M(t) = Rewards to Proposers(t) / New Pledged Space(t)
+    'mean_proposing_rewards_per_newly_pledged_space': OnlineKPI((
+        Mean(lambda s, p: s['reward_to_voters'] / (s['total_space_pledged'] - p['total_space_pledged'])),)),
+    'mean_proposer_reward_minus_voter_reward': OnlineKPI((
+        Mean(lambda s, p: s['reward_to_proposer'] - s['per_recipient_reward']),)),
+    'cumm_rewards_before_1yr': OnlineKPI((
+        Sum(lambda s, p: np.where(s['days_passed'] < 366, s['block_reward'], 0.0)),)),
+    # M(t) = Storage Fee Volume(t) / Compute Fee Volume(t)
+    'abs_sum_storage_fees_per_sum_compute_fees': OnlineKPI((
+        Sum(lambda s, p: s['storage_fee_volume']),
+        Sum(lambda s, p: s['compute_fee_volume'])),
+        lambda storage, compute: np.sqrt(np.abs(storage ** 2 - compute ** 2))),
+    'cumm_rewards': OnlineKPI((
+        Sum(lambda s, p: s['block_reward']),)),
+}
+
+
+## KPIs of every trajectory at once, as reductions over the rows of each
+
+class _SegmentRows:
+    """The columns of every row, or of the row before it within its segment, NaN on first rows."""
+
+    def __init__(self, seg: Segments, previous: bool = False):
+        self._seg = seg
+        self._previous = previous
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        x = self._seg[key]
+        return self._seg.previous(x) if self._previous else x
+
+
+def segment_kpi(online: OnlineKPI) -> Callable[[Segments], np.ndarray]:
+    """An online KPI reduced over the rows of every trajectory."""
+    def kpi(seg: Segments) -> np.ndarray:
+        current, previous = _SegmentRows(seg), _SegmentRows(seg, previous=True)
+        reduced = []
+        for reducer in online.reducers:
+            x = np.broadcast_to(reducer.term(current, previous), (len(seg.order),))
+            reduced.append(seg.mean(x) if isinstance(reducer, Mean) else seg.sum(x))
+        return online.finish(*reduced)
+    return kpi
+
+
 ## PSuU KPI Dict
 
+# The KPIs of `timestep_tensor_to_trajectory_tensor`, computed in one pass
+# over all trajectories
+SEGMENT_KPI_functions: dict[str, Callable[[Segments], np.ndarray]] = {
+    kpi: segment_kpi(online) for kpi, online in ONLINE_KPI_functions.items()
+}
+
 KPI_functions: dict[str, TrajectoryKPIandThreshold] = {
     'mean_relative_community_owned_supply': TrajectoryKPIandThreshold(per_timestep_average_relative_community_owned_supply, "larger_than_median"),
     'mean_farmer_subsidy_factor': TrajectoryKPIandThreshold(mean_farmer_subsidy_factor, "smaller_than_median"),
@@ -52,6 +137,107 @@ KPI_functions: dict[str, TrajectoryKPIandThreshold] = {
     'cumm_rewards': TrajectoryKPIandThreshold(cumm_rewards, "smaller_than_median")
 }
 
+
+class _ReadVariables:
+    """A state that records which variables are read from it."""
+
+    def __init__(self):
+        self.keys: set[str] = set()
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        self.keys.add(key)
+        return np.ones(1)
+
+
+def kpi_state_variables(kpis: dict[str, OnlineKPI]) -> list[str]:
+    """The state variables that the terms of `kpis` read."""
+    state = _ReadVariables()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for online in kpis.values():
+            for reducer in online.reducers:
+                reducer.term(state, state)
+    return sorted(state.keys)
+
+
+# State variables read by the KPI functions, for recording only what PSuU needs
+KPI_STATE_VARIABLES = kpi_state_variables(ONLINE_KPI_functions)
+
+
+class _StateView:
+    """Float arrays of a state, with NaNs for the variables it does not hold yet."""
+
+    def __init__(self, state: Mapping[str, np.ndarray], n: int):
+        self._state = state
+        self._n = n
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key in self._state:
+            return np.asarray(self._state[key], dtype=float)
+        return np.full(self._n, np.nan)
+
+
+class KPIAccumulator:
+    """
+    Reduces the online KPIs of every trajectory of a vectorized simulation
+    from its state at each timestep, so that no history is kept.
+    """
+
+    def __init__(self, kpis: dict[str, OnlineKPI] = ONLINE_KPI_functions):
+        self.kpis = kpis
+        self.trajectories: pd.DataFrame | None = None
+
+    def start(self, n: int):
+        """Reset the reducers for `n` trajectories."""
+        self.n = n
+        self._totals = {(kpi, i): np.zeros(n) for kpi, online in self.kpis.items()
+                        for i in range(len(online.reducers))}
+        self._counts = {key: np.zeros(n) for key in self._totals}
+        self._previous = _StateView({}, n)
+
+    def update(self, state: Mapping[str, np.ndarray]):
+        """Reduce the state of every trajectory at the next timestep."""
+        current = _StateView(state, self.n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for kpi, online in self.kpis.items():
+                for i, reducer in enumerate(online.reducers):
+                    x = np.broadcast_to(reducer.term(current, self._previous), (self.n,))
+                    valid = ~np.isnan(x)
+                    self._totals[kpi, i] += np.where(valid, x, 0.0)
+                    self._counts[kpi, i] += valid
+        self._previous = _StateView({k: np.array(state[k], dtype=float) for k in state}, self.n)
+
+    def finish(self, trajectories: pd.DataFrame):
+        """Set the ids and parameters of the trajectories, one row each in order."""
+        self.trajectories = trajectories
+
+    def result(self) -> dict[str, np.ndarray]:
+        values = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for kpi, online in self.kpis.items():
+                reduced = [self._totals[kpi, i] / self._counts[kpi, i] if isinstance(reducer, Mean)
+                           else self._totals[kpi, i]
+                           for i, reducer in enumerate(online.reducers)]
+                values[kpi] = online.finish(*reduced)
+        return values
+
+    def trajectory_tensor(self, transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+                          parameters: pd.DataFrame | None = None) -> pd.DataFrame:
+        """
+        The KPIs indexed like `timestep_tensor_to_trajectory_tensor`, after
+        `transform` is applied to the trajectories and the `parameters` of
+        their subsets are joined.
+        """
+        df = self.trajectories.copy()
+        for kpi, values in self.result().items():
+            df[kpi] = values
+        if transform is not None:
+            df = transform(df)
+        if parameters is not None:
+            df = join_parameters(df, parameters)
+        df = expand_governance_columns(df)
+        return df.set_index(trajectory_tensor_keys(df))[list(self.kpis)].sort_index()
+
+
 GOAL_KPI_GROUPS = {
     'G1_rational_economic_incentives': ['mean_proposing_rewards_per_newly_pledged_space', 'mean_proposer_reward_minus_voter_reward'],
     'G2_community_incentives': ['mean_relative_community_owned_supply', 'cumm_rewards_before_1yr'],
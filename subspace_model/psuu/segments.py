@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+
+class Segments:
+    """
+    The rows of a timestep tensor sorted into one contiguous segment per
+    trajectory, keeping their order within each, so that a KPI is computed
+    for every trajectory at once with segment-wise NumPy reductions.
+
+    `codes` numbers the trajectory of every row from 0 to `n - 1`, with -1
+    for rows that belong to none. Reductions skip NaNs like pandas does.
+    """
+
+    def __init__(self, df: pd.DataFrame, codes: np.ndarray, n: int):
+        rows = np.flatnonzero(codes >= 0)
+        self.order = rows[np.argsort(codes[rows], kind="stable")]
+        self.starts = np.searchsorted(codes[self.order], np.arange(n))
+        self.n = n
+        self._df = df
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._columns:
+            self._columns[column] = self._df[column].to_numpy(dtype=float)[self.order]
+        return self._columns[column]
+
+    def sum(self, x: np.ndarray) -> np.ndarray:
+        if self.n == 0:
+            return np.empty(0)
+        return np.add.reduceat(np.where(np.isnan(x), 0.0, x), self.starts)
+
+    def count(self, x: np.ndarray) -> np.ndarray:
+        if self.n == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.add.reduceat((~np.isnan(x)).astype(np.int64), self.starts)
+
+    def mean(self, x: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum(x) / self.count(x)
+
+    def previous(self, x: np.ndarray) -> np.ndarray:
+        """The value of the previous row, NaN on the first row of each segment."""
+        p = np.empty_like(x)
+        p[1:] = x[:-1]
+        p[self.starts] = np.nan
+        return p
@@ -103,5 +103,8 @@ INITIAL_STATE = SubspaceModelState(
     cumm_rewards=0.0,
     cumm_storage_fees_to_farmers=0.0,
     cumm_compute_fees_to_farmers=0.0,
+    cumm_block_reward=0.0,
+    cumm_storage_fee_volume=0.0,
+    cumm_compute_fee_volume=0.0,
 )
 
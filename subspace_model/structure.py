@@ -194,9 +194,12 @@ _SUBSPACE_MODEL_BLOCKS: list[dict] = [
                 "community_owned_supply",
                 community_owned_supply(state, params),
             ),
-            "cumm_rewards": s_cumm_generic("block_reward", "cumm_rewards", nan_value=0.0),
+            "cumm_rewards": s_cumm_generic("block_reward", "cumm_rewards"),
             "cumm_storage_fees_to_farmers": s_cumm_generic("storage_fee_volume", "cumm_storage_fees_to_farmers"),
-            "cumm_compute_fees_to_farmers": s_cumm_compute_fee_to_farmers
+            "cumm_compute_fees_to_farmers": s_cumm_compute_fee_to_farmers,
+            "cumm_block_reward": s_cumm_block_reward,
+            "cumm_storage_fee_volume": s_cumm_storage_fee_volume,
+            "cumm_compute_fee_volume": s_cumm_compute_fee_volume,
         },
     },
 ]
@@ -1,6 +1,8 @@
 from typing import Callable, TypedDict, get_origin, Union, get_args
 import math
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 import pandera as pa
 
 from subspace_model.units import *
@@ -69,7 +71,90 @@ class SubsidyComponent:
         K = self.max_total_subsidy_during_exponential_period
         return K * math.log(2) / self.max_reference_subsidy
 
-
+    @property
+    def key(self) -> tuple:
+        return (self.initial_period_start, self.initial_period_duration,
+                self.max_cumulative_subsidy, self.max_reference_subsidy)
+
+
+# Most subsidy schedules a process keeps tabulated at once
+SUBSIDY_SCHEDULE_CACHE_SIZE = 256
+
+
+class SubsidySchedule:
+    """
+    Total reference subsidy of a set of components tabulated on the grid of
+    `blocks_passed` values reached in steps of `delta_blocks`, along with its
+    cumulative integral over blocks.
+
+    The table is built once per distinct component set and step through
+    `SubsidySchedule.compile`, grows on demand and is shared by every
+    trajectory that uses the same components, with the least recently used
+    of more than `SUBSIDY_SCHEDULE_CACHE_SIZE` tables dropped. Times off the
+    grid are evaluated directly.
+    """
+
+    def __init__(self, components: list[SubsidyComponent], delta_blocks: Blocks, size: int = 1024):
+        self.components = tuple(components)
+        self.delta_blocks = delta_blocks
+        self.blocks = np.zeros(1)
+        self.subsidy = np.array([self.evaluate(0.0)])
+        self.cumulative = np.zeros(1)
+        self._extend(size)
+
+    @classmethod
+    def compile(cls, components: list[SubsidyComponent], delta_blocks: Blocks) -> 'SubsidySchedule':
+        """Cached schedule for a component set and timestep size."""
+        return _compile_subsidy_schedule(tuple(c.key for c in components), delta_blocks)
+
+    def evaluate(self, t: Blocks) -> CreditsPerBlock:
+        """Direct evaluation, summed in the same order as the model."""
+        value = 0.0
+        for component in self.components:
+            value += component(t)
+        return value
+
+    def _extend(self, size: int):
+        n = len(self.blocks)
+        # Accumulate as the model does, so that grid points match `blocks_passed` exactly
+        blocks = np.cumsum(np.r_[self.blocks[-1], np.full(size - n, self.delta_blocks)])[1:]
+        subsidy = np.fromiter((self.evaluate(t) for t in blocks), dtype=float, count=len(blocks))
+        increments = np.r_[self.subsidy[-1], subsidy[:-1]] * np.diff(np.r_[self.blocks[-1], blocks])
+        self.blocks = np.r_[self.blocks, blocks]
+        self.subsidy = np.r_[self.subsidy, subsidy]
+        self.cumulative = np.r_[self.cumulative, self.cumulative[-1] + np.cumsum(increments)]
+        # Plain lists for fast scalar lookups
+        self._blocks = self.blocks.tolist()
+        self._subsidy = self.subsidy.tolist()
+
+    def _index(self, t: np.ndarray) -> np.ndarray:
+        i = np.rint(np.asarray(t) / self.delta_blocks) if self.delta_blocks > 0 else np.zeros_like(t)
+        i = np.where(np.isfinite(i) & (i >= 0), i, 0).astype(int)
+        if i.size and i.max() >= len(self.blocks):
+            self._extend(max(2 * len(self.blocks), int(i.max()) + 1))
+        return i
+
+    def __call__(self, t: Blocks) -> CreditsPerBlock:
+        if self.delta_blocks > 0 and t >= 0:
+            i = round(t / self.delta_blocks)
+            if i >= len(self._blocks):
+                self._extend(max(2 * len(self._blocks), i + 1))
+            if self._blocks[i] == t:
+                return self._subsidy[i]
+        return self.evaluate(t)
+
+    def values(self, t: np.ndarray) -> np.ndarray:
+        """Vectorized `__call__`."""
+        i = self._index(t)
+        hit = self.blocks[i] == t
+        if hit.all():
+            return self.subsidy[i]
+        return np.where(hit, self.subsidy[i], [self.evaluate(x) for x in t])
+
+
+@lru_cache(maxsize=SUBSIDY_SCHEDULE_CACHE_SIZE)
+def _compile_subsidy_schedule(keys: tuple[tuple, ...], delta_blocks: Blocks) -> SubsidySchedule:
+    return SubsidySchedule([SubsidyComponent(*key) for key in keys], delta_blocks)
 
 
 class SubspaceModelState(TypedDict):
@@ -173,6 +258,9 @@ class SubspaceModelState(TypedDict):
     cumm_rewards: Credits 
     cumm_storage_fees_to_farmers: Credits 
     cumm_compute_fees_to_farmers: Credits 
+    cumm_block_reward: Credits
+    cumm_storage_fee_volume: Credits
+    cumm_compute_fee_volume: Credits
 
 
 class SubspaceModelParams(TypedDict):
@@ -180,6 +268,8 @@ class SubspaceModelParams(TypedDict):
     label: str
     environmental_label: str
     timestep_in_days: Days
+    rng_seed: int | None  # Seed for the stochastic generators, unseeded if None
+    rng_subset: int | None  # Subset id used for seeding, the cadCAD subset if None
 
     # Mechanism Parameters
     slash_function: Callable[[
@@ -0,0 +1,202 @@
+"""
+A NumPy simulation engine that advances every (subset, run) trajectory of a
+parameter sweep at once.
+
+Each state variable is held as an array with one entry per trajectory, so a
+single Python loop over timesteps steps the whole sweep. The output matches
+the layout of `cadCAD.tools.easy_run` with `drop_substeps=True`.
+"""
+from numbers import Number
+from typing import Callable, Collection
+
+import numpy as np
+import pandas as pd
+
+from subspace_model.experiments.recording import (
+    TRAJECTORY_ID_COLUMNS,
+    derived_param_values,
+    recorded_keys,
+    recorded_timesteps,
+)
+from subspace_model.experiments.sinks import TrajectorySink
+from subspace_model.psuu.kpis import KPIAccumulator
+from subspace_model.types import SubspaceModelState
+from subspace_model.vectorized.structure import VECTORIZED_MODEL_BLOCKS
+from subspace_model.vectorized.types import Checkpoint, StateFrame, StateTable, VectorizedParams
+
+
+def _as_array(value, size: int) -> np.ndarray:
+    if isinstance(value, np.ndarray) and value.shape == (size,):
+        return value
+    return np.broadcast_to(np.asarray(value, dtype=float), (size,)).copy()
+
+
+def partial_state_update(params: VectorizedParams,
+                         state: StateFrame,
+                         block: dict):
+    """
+    Apply a single block in place with cadCAD semantics: policies are
+    evaluated and summed on the pre-block state, and every state update
+    function reads that same pre-block state.
+    """
+    signal: dict[str, np.ndarray] = {}
+    for policy in block["policies"].values():
+        for k, v in policy(params, state).items():
+            signal[k] = signal[k] + v if k in signal else v
+
+    updates = dict(suf(params, state, signal)
+                   for suf in block["variables"].values())
+    state.update({k: _as_array(v, params.size) for k, v in updates.items()})
+
+
+def run_vectorized(initial_state: SubspaceModelState,
+                   sweep_params: dict[str, list],
+                   N_timesteps: int,
+                   N_samples: int,
+                   assign_params: set | bool = True,
+                   blocks: list[dict] = VECTORIZED_MODEL_BLOCKS,
+                   record: Collection[str] | None = None,
+                   stride: int = 1,
+                   sink: TrajectorySink | None = None,
+                   sink_timesteps: int = 64,
+                   resume: Checkpoint | None = None,
+                   checkpoint: Callable[[Checkpoint], None] | None = None,
+                   kpis: KPIAccumulator | None = None) -> pd.DataFrame | None:
+    """
+    Run all trajectories of a cadCAD-style sweep together.
+
+    Args:
+        initial_state: The initial state shared by all trajectories
+        sweep_params: cadCAD sweep params as lists of per-subset values
+        N_timesteps: Number of timesteps, as in `easy_run`
+        N_samples: Number of Monte Carlo runs per subset
+        assign_params: Parameters to attach as columns, as in `easy_run`
+        blocks: Vectorized partial state update blocks
+        record: State variables to record, or None for all of them
+        stride: Record every `stride`-th timestep, plus the final one
+        sink: If given, receives the results of every `sink_timesteps`
+            recorded timesteps as soon as they are done, and nothing is
+            returned
+        resume: Continue the trajectories from this checkpoint, which
+            holds them in sweep order, up to `N_timesteps`. Only the
+            timesteps after the checkpoint are recorded.
+        checkpoint: Receives the state of every trajectory after the last
+            timestep
+        kpis: Reduces the online KPIs from the state of every trajectory
+            at every timestep, whatever is recorded, and is given the
+            trajectories' ids and parameters at the end
+
+    Returns:
+        pd.DataFrame: A timestep tensor in the same layout as `easy_run`
+    """
+    params = VectorizedParams(sweep_params, N_samples)
+    n = params.size
+
+    if resume is None:
+        state = StateFrame({**initial_state,
+                            "simulation": 0,
+                            "subset": params.subset,
+                            "run": params.run}, n)
+        first_timestep = 1
+    else:
+        if resume.size != n:
+            raise ValueError(f"The checkpoint holds {resume.size} trajectories, expected {n}")
+        if resume.timestep > N_timesteps:
+            raise ValueError(f"The checkpoint at timestep {resume.timestep} is past N_timesteps={N_timesteps}")
+        if kpis is not None:
+            raise ValueError("Online KPIs need whole trajectories, not resumed ones")
+        state = StateFrame(resume.state(), n)
+        first_timestep = resume.timestep + 1
+    initial_keys = list(state)
+    initial_values = state.values.copy()
+    recorded = [t for t in recorded_timesteps(N_timesteps, stride) if t >= first_timestep or resume is None]
+    rows = {t: i for i, t in enumerate(recorded)}
+    # Rows of the current table are recorded timesteps `start` onwards
+    slab = len(recorded) if sink is None else sink_timesteps
+    start = 0
+    keys: list[str] = []
+    table: StateTable | None = None
+
+    def new_table() -> StateTable:
+        return StateTable(keys, n, min(slab, len(recorded) - start) - 1)
+
+    def put(row: int, values):
+        nonlocal table, start
+        table.record(row - start, values)
+        if sink is not None and row - start == table.data.shape[1] - 1:
+            sink.write(history_to_dataframe(table, params, assign_params))
+            start = row + 1
+            if start < len(recorded):
+                table = new_table()
+
+    if resume is not None:
+        # A resumed state already holds every variable
+        keys = recorded_keys(state, record)
+        table = new_table()
+
+    if kpis is not None:
+        kpis.start(n)
+        kpis.update(state)
+
+    with np.errstate(all='ignore'):
+        for timestep in range(first_timestep, N_timesteps + 1):
+            state.update({"timestep": np.full(n, float(timestep))})
+            for block in blocks:
+                partial_state_update(params, state, block)
+            if table is None:
+                # Blocks may introduce new variables, so allocate after the first step
+                keys = recorded_keys(state, record)
+                table = new_table()
+                put(0, dict(zip(initial_keys, initial_values)))
+            if timestep in rows:
+                put(rows[timestep], state)
+            if kpis is not None:
+                kpis.update(state)
+
+    if checkpoint is not None:
+        checkpoint(Checkpoint(N_timesteps, list(state), state.values.copy()))
+
+    if kpis is not None:
+        ids = StateTable([k for k in TRAJECTORY_ID_COLUMNS if k in state], n, 0)
+        ids.record(0, state)
+        kpis.finish(history_to_dataframe(ids, params, assign_params))
+
+    if table is None:
+        table = StateTable(recorded_keys(state, record), n, 0)
+        table.record(0, state)
+        if sink is not None:
+            sink.write(history_to_dataframe(table, params, assign_params))
+
+    if sink is not None:
+        return None
+    return history_to_dataframe(table, params, assign_params)
+
+
+def history_to_dataframe(table: StateTable,
+                         params: VectorizedParams,
+                         assign_params: set | bool = True) -> pd.DataFrame:
+    """
+    Flatten a run's state table into a timestep tensor sorted by
+    (subset, run, timestep). State variables are always floats.
+    """
+    n_t = table.data.shape[1]
+    df = pd.DataFrame(table.matrix, columns=list(table.keys), copy=False)
+    for k in ["timestep", "simulation", "subset", "run"]:
+        df[k] = df[k].astype(int)
+
+    if assign_params is not False:
+        selected = set(params.keys())
+        if assign_params is not True:
+            selected &= set(assign_params)
+        for k in [k for k in params.keys() if k in selected]:
+            values = [subset[k] for subset in params.subsets]
+            if all(isinstance(v, Number) for v in values):
+                per_subset = np.asarray(values)
+            else:
+                per_subset = np.empty(len(values), dtype=object)
+                per_subset[:] = values
+            df[k] = np.repeat(per_subset[params.subset], n_t)
+        for k, per_subset in derived_param_values(assign_params, params.subsets).items():
+            df[k] = np.repeat(per_subset[params.subset], n_t)
+
+    return df
@@ -0,0 +1,443 @@
+"""
+Numba-compiled kernels for the deterministic policies of the vectorized
+engine.
+
+Each kernel is a typed loop over flat per-trajectory arrays that follows its
+scalar counterpart in `subspace_model/logic.py` statement by statement. The
+policy wrappers gather the state and parameter arrays, evaluate every
+stochastic parameter function up front so the kernels only see pre-drawn
+arrays, and return the same signals as `subspace_model/vectorized/logic.py`.
+
+Numba is optional, installed with the `numba` extra; `numba_model_blocks`
+raises an ImportError without it.
+"""
+from math import floor, nan
+
+import numpy as np
+
+from subspace_model.const import (
+    BLOCKS_PER_DAY,
+    MAX_CREDIT_ISSUANCE,
+    SEGMENT_SIZE,
+    SHANNON_IN_CREDITS,
+)
+from subspace_model.vectorized import logic
+from subspace_model.vectorized.structure import VECTORIZED_MODEL_BLOCKS
+from subspace_model.vectorized.types import (
+    VectorizedParams,
+    VectorizedSignal,
+    VectorizedState,
+)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _jit(f):
+    # NaN and inf on division by zero, as with NumPy, rather than exceptions
+    if numba is None:
+        return f
+    return numba.njit(cache=True, error_model='numpy')(f)
+
+
+@_jit
+def _max(a, b):
+    """Builtin `max(a, b)`, including its NaN semantics."""
+    return b if b > a else a
+
+
+@_jit
+def _min(a, b):
+    """Builtin `min(a, b)`, including its NaN semantics."""
+    return b if b < a else a
+
+
+## Kernels ##
+
+
+@_jit
+def reward_kernel(S_r, storage_fee_in_credits_per_bytes, block_utilization,
+                  reward_issuance_balance, max_block_size, reward_recipients):
+    n = len(S_r)
+    reward = np.zeros(n)
+    per_recipient_reward = np.zeros(n)
+    reward_to_proposer = np.zeros(n)
+    reward_to_voters = np.zeros(n)
+    for i in range(n):
+        F_bar = max_block_size[i] * storage_fee_in_credits_per_bytes[i]
+        utilization_based_reward = (S_r[i] - _min(S_r[i], F_bar) * block_utilization[i]) * BLOCKS_PER_DAY
+        voting_rewards = S_r[i] * BLOCKS_PER_DAY
+        total_reward = utilization_based_reward + voting_rewards
+        if reward_issuance_balance[i] > total_reward:
+            reward[i] = total_reward
+            per_recipient_reward[i] = voting_rewards * (1 / reward_recipients[i])
+            reward_to_proposer[i] = utilization_based_reward + voting_rewards * (1 / reward_recipients[i])
+            reward_to_voters[i] = reward[i] - reward_to_proposer[i]
+    return reward, per_recipient_reward, reward_to_proposer, reward_to_voters
+
+
+@_jit
+def archive_kernel(delta_blocks, transaction_count, average_transaction_size,
+                   buffer_size, header_size, archival_buffer_segment_size):
+    n = len(delta_blocks)
+    new_history_bytes = np.zeros(n)
+    new_buffer_bytes = np.empty(n)
+    for i in range(n):
+        header_volume = delta_blocks[i] * header_size[i]
+        tx_volume = transaction_count[i] * average_transaction_size[i]
+        new_buffer_bytes[i] = tx_volume + header_volume
+        current_buffer = new_buffer_bytes[i] + buffer_size[i]
+        segments_being_archived = floor(current_buffer / archival_buffer_segment_size[i])
+        if segments_being_archived > 0:
+            delta_buffer = SEGMENT_SIZE * segments_being_archived
+            new_buffer_bytes[i] += -1 * delta_buffer
+            new_history_bytes[i] += delta_buffer
+    return new_history_bytes, new_buffer_bytes
+
+
+@_jit
+def pledge_sectors_kernel(blockchain_history_size, total_space_pledged,
+                          min_replication_factor, newly_pledged_space):
+    n = len(blockchain_history_size)
+    new_space_pledged = np.empty(n)
+    for i in range(n):
+        required_space_pledged = blockchain_history_size[i] * min_replication_factor[i]
+        new_pledge_due_to_requirements = _max(required_space_pledged - total_space_pledged[i], 0.0)
+        new_pledge_due_to_random = np.trunc(_max(newly_pledged_space[i], 0.0))
+        new_space_pledged[i] = _max(new_pledge_due_to_requirements + new_pledge_due_to_random,
+                                    new_pledge_due_to_requirements)
+    return new_space_pledged
+
+
+@_jit
+def storage_fees_kernel(total_credit_supply, total_space_pledged, blockchain_history_size,
+                        transaction_count, average_transaction_size, min_replication_factor):
+    n = len(total_credit_supply)
+    free_space = np.empty(n)
+    storage_fee_in_credits_per_bytes = np.empty(n)
+    extrinsic_length_in_bytes = np.empty(n)
+    storage_fee_volume = np.empty(n)
+    for i in range(n):
+        free_space[i] = _max(
+            (total_space_pledged[i] / min_replication_factor[i]) - blockchain_history_size[i], 1.0)
+        storage_fee_in_credits_per_bytes[i] = total_credit_supply[i] / free_space[i]
+        extrinsic_length_in_bytes[i] = transaction_count[i] * average_transaction_size[i]
+        storage_fee_volume[i] = storage_fee_in_credits_per_bytes[i] * extrinsic_length_in_bytes[i]
+    return free_space, storage_fee_in_credits_per_bytes, extrinsic_length_in_bytes, storage_fee_volume
+
+
+@_jit
+def compute_fees_kernel(weight_to_fee, target_block_fullness, block_utilization, adjustment_variable,
+                        average_priority_fee, prev_compute_fee_multiplier, average_compute_weight_per_tx,
+                        transaction_count, average_compute_weight_per_bundle, bundle_count,
+                        farmers_balance, operators_balance):
+    n = len(weight_to_fee)
+    target_block_delta = np.empty(n)
+    targeted_adjustment_parameter = np.empty(n)
+    compute_fee_multiplier = np.empty(n)
+    tx_compute_weight = np.empty(n)
+    compute_fee_volume = np.empty(n)
+    farmers_delta = np.empty(n)
+    operators_delta = np.empty(n)
+    fees_to_operators = np.empty(n)
+    for i in range(n):
+        target_block_delta[i] = target_block_fullness[i] - block_utilization[i]
+        targeted_adjustment_parameter[i] = (
+            1
+            + adjustment_variable[i] * target_block_delta[i]
+            + adjustment_variable[i]**2 * target_block_delta[i]**2 / 2
+        )
+        compute_fee_multiplier[i] = targeted_adjustment_parameter[i] * prev_compute_fee_multiplier[i]
+        tx_compute_weight[i] = average_compute_weight_per_tx[i] * transaction_count[i]
+        bundles_compute_weight = average_compute_weight_per_bundle[i] * bundle_count[i]
+        total_compute_weights = tx_compute_weight[i] + bundles_compute_weight
+        raw_fee = (compute_fee_multiplier[i] * weight_to_fee[i] * total_compute_weights
+                   + average_priority_fee[i])
+        compute_fee_volume[i] = _max(raw_fee, 1 * SHANNON_IN_CREDITS)
+
+        # HACK: same joint payment assumption as `logic.p_compute_fees`
+        combined_balance = farmers_balance[i] + operators_balance[i]
+        compute_fee_from_farmers = compute_fee_volume[i] * farmers_balance[i] / combined_balance
+        compute_fee_from_operators = compute_fee_volume[i] * operators_balance[i] / combined_balance
+        farmers_delta[i] = compute_fee_from_farmers - compute_fee_from_farmers
+        operators_delta[i] = compute_fee_from_operators - compute_fee_from_operators
+        fees_to_operators[i] = compute_fee_from_operators
+    return (target_block_delta, targeted_adjustment_parameter, compute_fee_multiplier,
+            tx_compute_weight, compute_fee_volume, farmers_delta, operators_delta, fees_to_operators)
+
+
+@_jit
+def slash_kernel(staking_pool_balance, operator_pool_shares, nominator_pool_shares,
+                 slash_count, slash_amount, slash_to_farmers_share):
+    n = len(staking_pool_balance)
+    slash_value = np.zeros(n)
+    slash_to_farmers = np.zeros(n)
+    operator_shares_to_subtract = np.zeros(n)
+    slash_to_burn = np.zeros(n)
+    for i in range(n):
+        pool_balance = staking_pool_balance[i]
+        if pool_balance > 0:
+            value = _min(slash_count[i] * slash_amount[i], pool_balance)
+            if value > 0:
+                slash_value[i] = value
+                slash_to_farmers[i] = value * slash_to_farmers_share[i]
+                slash_to_burn[i] = value - slash_to_farmers[i]
+                pool_balance_after = pool_balance - value
+                total_shares = operator_pool_shares[i] + nominator_pool_shares[i]
+                operator_shares_to_subtract[i] = total_shares * (pool_balance_after / pool_balance - 1.0)
+    return slash_value, slash_to_farmers, operator_shares_to_subtract, slash_to_burn
+
+
+@_jit
+def unvest_kernel(days_passed, allocated_tokens, testnets, foundation, subspace_labs, ssl_priv_sale):
+    n = len(days_passed)
+    out = np.empty((8, n))
+    for i in range(n):
+        start_period_fraction = 0.25 if days_passed[i] >= 365 else 0.0
+        linear_period_fraction = 0.75 * _min(_max(days_passed[i] - 365, 0.0) / 3, 1.0)
+        unvested_fraction = start_period_fraction + linear_period_fraction
+        investors = 0.2153 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        founders = 0.02 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        team = 0.05 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        advisors = 0.015 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        vendors = 0.02 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        ambassadors = 0.01 * MAX_CREDIT_ISSUANCE * unvested_fraction
+        allocated_tokens_new = (investors + founders + team + advisors + vendors + ambassadors
+                                + testnets[i] + foundation[i] + subspace_labs[i] + ssl_priv_sale[i])
+        out[0, i] = allocated_tokens_new - allocated_tokens[i]
+        out[1, i] = allocated_tokens_new
+        out[2, i] = investors
+        out[3, i] = founders
+        out[4, i] = team
+        out[5, i] = advisors
+        out[6, i] = vendors
+        out[7, i] = ambassadors
+    return out
+
+
+@_jit
+def staking_kernel(operator_pool_shares, nominator_pool_shares, staking_pool_balance,
+                   operators_balance, nominators_balance, operator_stake_fraction,
+                   nominator_stake_fraction):
+    n = len(operator_pool_shares)
+    operator_stake = np.empty(n)
+    nominator_stake = np.empty(n)
+    total_stake = np.empty(n)
+    invariant = np.empty(n)
+    for i in range(n):
+        total_shares = operator_pool_shares[i] + nominator_pool_shares[i]
+        if total_shares > 1e-4:
+            invariant[i] = staking_pool_balance[i] / total_shares
+        elif total_shares >= 0:
+            invariant[i] = 1.0
+        else:
+            invariant[i] = nan
+
+        if operator_stake_fraction[i] > 0:
+            operator_stake[i] = operators_balance[i] * operator_stake_fraction[i]
+        elif invariant[i] > 0:
+            operator_stake[i] = operator_pool_shares[i] * operator_stake_fraction[i] * invariant[i]
+        else:
+            operator_stake[i] = 0.0
+
+        if nominator_stake_fraction[i] > 0:
+            nominator_stake[i] = nominators_balance[i] * nominator_stake_fraction[i]
+        elif invariant[i] > 0:
+            nominator_stake[i] = nominator_pool_shares[i] * nominator_stake_fraction[i] * invariant[i]
+        else:
+            nominator_stake[i] = 0.0
+
+        total_stake[i] = operator_stake[i] + nominator_stake[i]
+
+        # NOTE: for handling withdraws bigger than the pool itself.
+        if -total_stake[i] > staking_pool_balance[i]:
+            old_total_stake = total_stake[i]
+            total_stake[i] = -staking_pool_balance[i]
+            scale = total_stake[i] / old_total_stake
+            operator_stake[i] *= scale
+            nominator_stake[i] *= scale
+    return operator_stake, nominator_stake, total_stake, invariant
+
+
+@_jit
+def transfers_kernel(operators_balance, farmers_balance, operator_to_farmer,
+                     farmer_to_nominator, farmer_to_operator):
+    n = len(operators_balance)
+    delta_operators = np.zeros(n)
+    delta_nominators = np.zeros(n)
+    delta_farmers = np.zeros(n)
+    for i in range(n):
+        if operators_balance[i] > 0:
+            delta = operators_balance[i] * operator_to_farmer[i]
+            delta_operators[i] -= delta
+            delta_farmers[i] += delta
+        if farmers_balance[i] > 0:
+            delta = farmers_balance[i] * farmer_to_nominator[i]
+            delta_farmers[i] -= delta
+            delta_nominators[i] += delta
+            delta = farmers_balance[i] * farmer_to_operator[i]
+            delta_farmers[i] -= delta
+            delta_operators[i] += delta
+    return delta_operators, delta_nominators, delta_farmers
+
+
+## Policies ##
+
+
+def p_reward(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    reward, per_recipient_reward, reward_to_proposer, reward_to_voters = reward_kernel(
+        state["reference_subsidy"], state["storage_fee_in_credits_per_bytes"],
+        state["block_utilization"], state["reward_issuance_balance"],
+        params["max_block_size"], params["reward_recipients"])
+    return {"block_reward": reward,
+            "reward_issuance_balance": -reward,
+            "farmers_balance": reward,
+
+            "reward_to_voters": reward_to_voters,
+            "reward_to_proposer": reward_to_proposer,
+            "per_recipient_reward": per_recipient_reward}
+
+
+def p_archive(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    new_history_bytes, new_buffer_bytes = archive_kernel(
+        state["delta_blocks"], state["transaction_count"], state["average_transaction_size"],
+        state["buffer_size"], params["header_size"], params["archival_buffer_segment_size"])
+    return {
+        "blockchain_history_size": new_history_bytes,
+        "buffer_size": new_buffer_bytes,
+    }
+
+
+def p_pledge_sectors(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    new_space_pledged = pledge_sectors_kernel(
+        state["blockchain_history_size"], state["total_space_pledged"],
+        params["min_replication_factor"],
+        params.call("newly_pledged_space_per_day_function", state))
+    return {"total_space_pledged": new_space_pledged}
+
+
+def p_storage_fees(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    free_space, storage_fee_in_credits_per_bytes, extrinsic_length_in_bytes, storage_fee_volume = storage_fees_kernel(
+        params.call("credit_supply_definition", state, with_params=False),
+        state["total_space_pledged"], state["blockchain_history_size"],
+        state["transaction_count"], state["average_transaction_size"],
+        params["min_replication_factor"])
+    return {
+        "free_space": free_space,
+        "storage_fee_in_credits_per_bytes": storage_fee_in_credits_per_bytes,
+        "extrinsic_length_in_bytes": extrinsic_length_in_bytes,
+        "storage_fee_volume": storage_fee_volume,
+    }
+
+
+def p_compute_fees(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    (target_block_delta, targeted_adjustment_parameter, compute_fee_multiplier,
+     tx_compute_weight, compute_fee_volume, farmers_delta, operators_delta,
+     fees_to_operators) = compute_fees_kernel(
+        params["weight_to_fee"], state["target_block_fullness"], state["block_utilization"],
+        state["adjustment_variable"], state["average_priority_fee"], state["compute_fee_multiplier"],
+        state["average_compute_weight_per_tx"], state["transaction_count"],
+        state["average_compute_weight_per_bundle"], state["bundle_count"],
+        state["farmers_balance"], state["operators_balance"])
+    return {
+        "target_block_delta": target_block_delta,
+        "targeted_adjustment_parameter": targeted_adjustment_parameter,
+        "compute_fee_multiplier": compute_fee_multiplier,
+        "tx_compute_weight": tx_compute_weight,
+        "compute_fee_volume": compute_fee_volume,
+        "priority_fee_volume": state["average_priority_fee"],
+        "farmers_balance": farmers_delta,
+        "operators_balance": operators_delta,
+        "fees_to_operators": fees_to_operators,
+    }
+
+
+def p_unvest(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    (farmers_balance, allocated_tokens, investors, founders,
+     team, advisors, vendors, ambassadors) = unvest_kernel(
+        state["days_passed"], state["allocated_tokens"],
+        state["allocated_tokens_testnets"], state["allocated_tokens_foundation"],
+        state["allocated_tokens_subspace_labs"], state["allocated_tokens_ssl_priv_sale"])
+    return {
+        "other_issuance_balance": -1.0 * farmers_balance,
+        "farmers_balance": farmers_balance,
+
+        "allocated_tokens": allocated_tokens,
+        "allocated_tokens_investors": investors,
+        "allocated_tokens_founders": founders,
+        "allocated_tokens_team": team,
+        "allocated_tokens_advisors": advisors,
+        "allocated_tokens_vendors": vendors,
+        "allocated_tokens_ambassadors": ambassadors,
+    }
+
+
+def p_slash(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    slash_value, slash_to_farmers, operator_shares_to_subtract, slash_to_burn = slash_kernel(
+        state["staking_pool_balance"], state["operator_pool_shares"], state["nominator_pool_shares"],
+        params.call("slash_per_day_function", state), params.call("slash_function", state),
+        params["slash_to_farmers"])
+    return {
+        "staking_pool_balance": -slash_value,
+        "farmers_balance": slash_to_farmers,
+        "operator_pool_shares": operator_shares_to_subtract,
+        "burnt_balance": slash_to_burn,
+    }
+
+
+def p_staking(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    operator_stake, nominator_stake, total_stake, invariant = staking_kernel(
+        state["operator_pool_shares"], state["nominator_pool_shares"], state["staking_pool_balance"],
+        state["operators_balance"], state["nominators_balance"],
+        params.call("operator_stake_per_ts_function", state),
+        params.call("nominator_stake_per_ts_function", state))
+    return {
+        "operators_balance": -operator_stake,
+        "operator_pool_shares": operator_stake / invariant,
+        "nominator_pool_shares": nominator_stake / invariant,
+        "nominators_balance": -nominator_stake,
+        "staking_pool_balance": total_stake,
+    }
+
+
+def p_transfers(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    delta_operators, delta_nominators, delta_farmers = transfers_kernel(
+        state["operators_balance"], state["farmers_balance"],
+        params.call("transfer_operator_to_farmer_per_day_function", state),
+        params.call("transfer_farmer_to_nominator_per_day_function", state),
+        params.call("transfer_farmer_to_operator_per_day_function", state))
+    return {
+        "operators_balance": delta_operators,
+        "nominators_balance": delta_nominators,
+        "farmers_balance": delta_farmers,
+    }
+
+
+# Vectorized policies and their compiled replacements
+NUMBA_POLICIES = {
+    logic.p_reward: p_reward,
+    logic.p_archive: p_archive,
+    logic.p_pledge_sectors: p_pledge_sectors,
+    logic.p_storage_fees: p_storage_fees,
+    logic.p_compute_fees: p_compute_fees,
+    logic.p_unvest: p_unvest,
+    logic.p_slash: p_slash,
+    logic.p_staking: p_staking,
+    logic.p_transfers: p_transfers,
+}
+
+
+def numba_model_blocks() -> list[dict]:
+    """
+    `VECTORIZED_MODEL_BLOCKS` with the deterministic policies replaced by
+    their compiled kernels.
+    """
+    if numba is None:
+        raise ImportError("The numba engine requires numba to be installed")
+    return [
+        {**block, "policies": {name: NUMBA_POLICIES.get(policy, policy)
+                               for name, policy in block["policies"].items()}}
+        for block in VECTORIZED_MODEL_BLOCKS
+    ]
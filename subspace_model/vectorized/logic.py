@@ -0,0 +1,476 @@
+"""
+Array counterparts of the policies and state update functions in
+`subspace_model/logic.py`. Every state variable holds one value per
+trajectory, and each function mirrors its scalar counterpart line by line,
+including the keys that the scalar versions return.
+"""
+from typing import Callable
+
+import numpy as np
+
+from subspace_model.const import *
+from subspace_model.types import SubsidySchedule
+from subspace_model.vectorized.types import (
+    VectorizedParams,
+    VectorizedSignal,
+    VectorizedState,
+)
+
+
+def _max(a, b):
+    """Element-wise `max(a, b)` with the same NaN semantics as the builtin."""
+    return np.where(b > a, b, a)
+
+
+def _min(a, b):
+    """Element-wise `min(a, b)` with the same NaN semantics as the builtin."""
+    return np.where(b < a, b, a)
+
+
+def replace_suf(variable: str, default_value=0.0) -> Callable:
+    """Vectorized `subspace_model.logic.replace_suf`"""
+    return lambda params, state, signal: (
+        variable,
+        signal.get(variable, default_value),
+    )
+
+
+def add_suf(variable: str, default_value=0.0) -> Callable:
+    """Vectorized `subspace_model.logic.add_suf`"""
+    return lambda params, state, signal: (
+        variable,
+        signal.get(variable, default_value) + state[variable],
+    )
+
+
+## Time Tracking ##
+
+
+def p_evolve_time(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    delta_days = params["timestep_in_days"]
+    delta_seconds = delta_days * DAY_TO_SECONDS
+    delta_blocks = delta_seconds / params["block_time_in_seconds"]
+    return {
+        "delta_days": delta_days,
+        "days_passed": delta_days,
+        "delta_blocks": delta_blocks,
+        "blocks_passed": delta_blocks,
+    }
+
+
+## Reference Subsidy ##
+
+
+def s_reference_subsidy(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    current_reference_subsidy = np.zeros(params.size)
+    for components, idx in params.groups("reference_subsidy_components"):
+        delta_blocks = state["delta_blocks"][idx]
+        for step in np.unique(delta_blocks):
+            sub_idx = idx[delta_blocks == step]
+            schedule = SubsidySchedule.compile(components, step)
+            current_reference_subsidy[sub_idx] = schedule.values(state["blocks_passed"][sub_idx])
+
+    avg_ref_subsidy = np.where(
+        state["timestep"] > 1,
+        (current_reference_subsidy + state["reference_subsidy"]) / 2,
+        current_reference_subsidy)
+
+    return ("reference_subsidy", avg_ref_subsidy)
+
+
+## Environmental Processes ##
+
+
+def s_average_priority_fee(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    value = _max(params.call("priority_fee_function", state), 0)
+    return ("average_priority_fee", value)
+
+
+def s_average_compute_weight_per_tx(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    return (
+        "average_compute_weight_per_tx",
+        _max(params.call("compute_weights_per_tx_function", state),
+             params["min_compute_weights_per_tx"]),
+    )
+
+
+def s_average_compute_weight_per_bundle(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    # NOTE: keeps the key returned by `logic.s_average_compute_weight_per_bundle`
+    return (
+        "average_compute_weight_per_budle",
+        _max(params.call("compute_weight_per_bundle_function", state),
+             params["min_compute_weights_per_bundle"]),
+    )
+
+
+def s_bundle_count(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    bundle_count = _max(params.call("bundle_count_per_day_function", state), 0)
+    return ("bundle_count", bundle_count)
+
+
+def p_block_utilization(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    block_utilization = params.call("utilization_ratio_function", state)
+    max_normal_block_length = (
+        params["max_block_size"] * DAY_TO_SECONDS *
+        params["block_time_in_seconds"]
+    )
+    transaction_volume = block_utilization * max_normal_block_length * BLOCKS_PER_DAY
+    average_transaction_size = state["average_transaction_size"]
+    transaction_count = transaction_volume / average_transaction_size
+
+    return {
+        "block_utilization": block_utilization,
+        "transaction_count": transaction_count,
+        "average_transaction_size": average_transaction_size,
+    }
+
+
+## Archival & Sector Onboarding ##
+
+
+def p_archive(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    header_volume = state["delta_blocks"] * params["header_size"]
+    tx_volume = state["transaction_count"] * state["average_transaction_size"]
+    new_buffer_bytes = tx_volume + header_volume
+    current_buffer = new_buffer_bytes + state["buffer_size"]
+    segments_being_archived = np.floor(
+        current_buffer / params["archival_buffer_segment_size"])
+
+    delta_buffer = np.where(segments_being_archived > 0,
+                            SEGMENT_SIZE * segments_being_archived, 0.0)
+
+    return {
+        "blockchain_history_size": delta_buffer,
+        "buffer_size": new_buffer_bytes - delta_buffer,
+    }
+
+
+def p_pledge_sectors(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    required_space_pledged = state["blockchain_history_size"] * params["min_replication_factor"]
+    new_pledge_due_to_requirements = _max(
+        required_space_pledged - state["total_space_pledged"], 0)
+    new_pledge_due_to_random = np.trunc(
+        _max(params.call("newly_pledged_space_per_day_function", state), 0))
+    new_space_pledged = _max(
+        new_pledge_due_to_requirements + new_pledge_due_to_random,
+        new_pledge_due_to_requirements,
+    )
+    return {"total_space_pledged": new_space_pledged}
+
+
+## Farmer Rewards ##
+
+
+def p_reward(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    S_r = state["reference_subsidy"]
+    F_bar = params["max_block_size"] * state["storage_fee_in_credits_per_bytes"]
+    g = state["block_utilization"]
+
+    utilization_based_reward = (S_r - _min(S_r, F_bar) * g) * BLOCKS_PER_DAY
+    voting_rewards = S_r * BLOCKS_PER_DAY
+    total_reward = utilization_based_reward + voting_rewards
+
+    is_issuing = state["reward_issuance_balance"] > total_reward
+    per_recipient = voting_rewards * (1 / params["reward_recipients"])
+    reward = np.where(is_issuing, total_reward, 0.0)
+    per_recipient_reward = np.where(is_issuing, per_recipient, 0.0)
+    reward_to_proposer = np.where(
+        is_issuing, utilization_based_reward + per_recipient, 0.0)
+    reward_to_voters = np.where(is_issuing, reward - reward_to_proposer, 0.0)
+
+    return {"block_reward": reward,
+            "reward_issuance_balance": -reward,
+            "farmers_balance": reward,
+
+            "reward_to_voters": reward_to_voters,
+            "reward_to_proposer": reward_to_proposer,
+            "per_recipient_reward": per_recipient_reward}
+
+
+## Fees ##
+
+
+def p_storage_fees(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    total_credit_supply = params.call(
+        "credit_supply_definition", state, with_params=False)
+    free_space = _max(
+        (state["total_space_pledged"] / params["min_replication_factor"])
+        - state["blockchain_history_size"], 1)
+    storage_fee_in_credits_per_bytes = total_credit_supply / free_space
+    extrinsic_length_in_bytes = (
+        state["transaction_count"] * state["average_transaction_size"])
+    storage_fee_volume = storage_fee_in_credits_per_bytes * extrinsic_length_in_bytes
+
+    return {
+        "free_space": free_space,
+        "storage_fee_in_credits_per_bytes": storage_fee_in_credits_per_bytes,
+        "extrinsic_length_in_bytes": extrinsic_length_in_bytes,
+        "storage_fee_volume": storage_fee_volume,
+    }
+
+
+def p_compute_fees(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    weight_to_fee = params["weight_to_fee"]
+    adjustment_variable = state["adjustment_variable"]
+    priority_fee_volume = state["average_priority_fee"]
+
+    target_block_delta = state["target_block_fullness"] - state["block_utilization"]
+    targeted_adjustment_parameter = (
+        1
+        + adjustment_variable * target_block_delta
+        + adjustment_variable**2 * target_block_delta**2 / 2
+    )
+    compute_fee_multiplier = targeted_adjustment_parameter * state["compute_fee_multiplier"]
+
+    tx_compute_weight = state["average_compute_weight_per_tx"] * state["transaction_count"]
+    bundles_compute_weight = (
+        state["average_compute_weight_per_bundle"] * state["bundle_count"])
+    total_compute_weights = tx_compute_weight + bundles_compute_weight
+
+    raw_fee = (compute_fee_multiplier * weight_to_fee * total_compute_weights
+               + priority_fee_volume)
+    compute_fee_volume = _max(raw_fee, 1 * SHANNON_IN_CREDITS)
+
+    # HACK: same joint payment assumption as `logic.p_compute_fees`
+    combined_balance = state["farmers_balance"] + state["operators_balance"]
+    compute_fee_from_farmers = compute_fee_volume * state["farmers_balance"] / combined_balance
+    compute_fee_from_operators = compute_fee_volume * state["operators_balance"] / combined_balance
+    fees_to_farmers = compute_fee_from_farmers
+    fees_to_operators = compute_fee_from_operators
+
+    return {
+        "target_block_delta": target_block_delta,
+        "targeted_adjustment_parameter": targeted_adjustment_parameter,
+        "compute_fee_multiplier": compute_fee_multiplier,
+        "tx_compute_weight": tx_compute_weight,
+        "compute_fee_volume": compute_fee_volume,
+        "priority_fee_volume": priority_fee_volume,
+        "farmers_balance": fees_to_farmers - compute_fee_from_farmers,
+        "operators_balance": fees_to_operators - compute_fee_from_operators,
+        "fees_to_operators": fees_to_operators,
+    }
+
+
+## Direct Allocations ##
+
+
+def p_unvest(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    days_passed = state["days_passed"]
+    start_period_fraction = 0.25 * (days_passed >= 365)
+    linear_period_fraction = 0.75 * _min(_max(days_passed - 365, 0) / 3, 1.0)
+    unvested_fraction = start_period_fraction + linear_period_fraction
+
+    investors = 0.2153 * MAX_CREDIT_ISSUANCE * unvested_fraction
+    founders = 0.02 * MAX_CREDIT_ISSUANCE * unvested_fraction
+    team = 0.05 * MAX_CREDIT_ISSUANCE * unvested_fraction
+    advisors = 0.015 * MAX_CREDIT_ISSUANCE * unvested_fraction
+    vendors = 0.02 * MAX_CREDIT_ISSUANCE * unvested_fraction
+    ambassadors = 0.01 * MAX_CREDIT_ISSUANCE * unvested_fraction
+
+    allocated_tokens_new = (investors + founders + team + advisors + vendors + ambassadors
+                            + state["allocated_tokens_testnets"]
+                            + state["allocated_tokens_foundation"]
+                            + state["allocated_tokens_subspace_labs"]
+                            + state["allocated_tokens_ssl_priv_sale"])
+
+    farmers_balance = allocated_tokens_new - state["allocated_tokens"]
+
+    return {
+        "other_issuance_balance": -1.0 * farmers_balance,
+        "farmers_balance": farmers_balance,
+
+        "allocated_tokens": allocated_tokens_new,
+        "allocated_tokens_investors": investors,
+        "allocated_tokens_founders": founders,
+        "allocated_tokens_team": team,
+        "allocated_tokens_advisors": advisors,
+        "allocated_tokens_vendors": vendors,
+        "allocated_tokens_ambassadors": ambassadors,
+    }
+
+
+## User Behavioral Processes ##
+
+
+def p_slash(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    pool_balance = state["staking_pool_balance"]
+    slash_count = params.call("slash_per_day_function", state)
+    slash_value = _min(slash_count * params.call("slash_function", state), pool_balance)
+    slash_value = np.where((pool_balance > 0) & (slash_value > 0), slash_value, 0.0)
+
+    slash_to_farmers = slash_value * params["slash_to_farmers"]
+    slash_to_burn = slash_value - slash_to_farmers
+    total_shares = state["operator_pool_shares"] + state["nominator_pool_shares"]
+    operator_shares_to_subtract = np.where(
+        slash_value > 0,
+        total_shares * ((pool_balance - slash_value) / pool_balance - 1.0),
+        0.0)
+
+    return {
+        "staking_pool_balance": -slash_value,
+        "farmers_balance": slash_to_farmers,
+        "operator_pool_shares": operator_shares_to_subtract,
+        "burnt_balance": slash_to_burn,
+    }
+
+
+def p_staking(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    total_shares = state["operator_pool_shares"] + state["nominator_pool_shares"]
+    invariant = np.where(total_shares > 1e-4,
+                         state["staking_pool_balance"] / total_shares,
+                         np.where(total_shares >= 0, 1.0, np.nan))
+
+    operator_stake_fraction = params.call("operator_stake_per_ts_function", state)
+    operator_stake = np.where(
+        operator_stake_fraction > 0,
+        state["operators_balance"] * operator_stake_fraction,
+        np.where(invariant > 0,
+                 state["operator_pool_shares"] * operator_stake_fraction * invariant,
+                 0.0))
+
+    nominator_stake_fraction = params.call("nominator_stake_per_ts_function", state)
+    nominator_stake = np.where(
+        nominator_stake_fraction > 0,
+        state["nominators_balance"] * nominator_stake_fraction,
+        np.where(invariant > 0,
+                 state["nominator_pool_shares"] * nominator_stake_fraction * invariant,
+                 0.0))
+
+    total_stake = operator_stake + nominator_stake
+
+    # NOTE: for handling withdraws bigger than the pool itself.
+    is_overdrawn = -total_stake > state["staking_pool_balance"]
+    scale = np.where(is_overdrawn, -state["staking_pool_balance"] / total_stake, 1.0)
+    total_stake = np.where(is_overdrawn, -state["staking_pool_balance"], total_stake)
+    operator_stake = operator_stake * scale
+    nominator_stake = nominator_stake * scale
+
+    return {
+        "operators_balance": -operator_stake,
+        "operator_pool_shares": operator_stake / invariant,
+        "nominator_pool_shares": nominator_stake / invariant,
+        "nominators_balance": -nominator_stake,
+        "staking_pool_balance": total_stake,
+    }
+
+
+def p_transfers(params: VectorizedParams, state: VectorizedState) -> VectorizedSignal:
+    operators_balance = state["operators_balance"]
+    farmers_balance = state["farmers_balance"]
+
+    # Operators to Farmers
+    operators_to_farmers = np.where(
+        operators_balance > 0,
+        operators_balance * params.call(
+            "transfer_operator_to_farmer_per_day_function", state),
+        0.0)
+
+    # Farmers to Nominators & Operators
+    has_balance = farmers_balance > 0
+    farmers_to_nominators = np.where(
+        has_balance,
+        farmers_balance * params.call(
+            "transfer_farmer_to_nominator_per_day_function", state),
+        0.0)
+    farmers_to_operators = np.where(
+        has_balance,
+        farmers_balance * params.call(
+            "transfer_farmer_to_operator_per_day_function", state),
+        0.0)
+
+    return {
+        "operators_balance": farmers_to_operators - operators_to_farmers,
+        "nominators_balance": farmers_to_nominators,
+        "farmers_balance": (operators_to_farmers - farmers_to_nominators) - farmers_to_operators,
+    }
+
+
+## Metrics ##
+
+
+def circulating_supply(state: VectorizedState) -> np.ndarray:
+    return (
+        state["operators_balance"]
+        + state["nominators_balance"]
+        + state["farmers_balance"]
+    )
+
+
+def user_supply(state: VectorizedState) -> np.ndarray:
+    return circulating_supply(state) + state["staking_pool_balance"]
+
+
+def issued_supply(state: VectorizedState) -> np.ndarray:
+    return (
+        sum_of_stocks(state) - state["burnt_balance"] - state["reward_issuance_balance"]
+    )
+
+
+def earned_minus_burned_supply(state: VectorizedState) -> np.ndarray:
+    return user_supply(state) - state["burnt_balance"]
+
+
+def total_supply(state: VectorizedState) -> np.ndarray:
+    return issued_supply(state) - state["burnt_balance"]
+
+
+def sum_of_stocks(state: VectorizedState) -> np.ndarray:
+    return (
+        user_supply(state)
+        + state["other_issuance_balance"]
+        + state["reward_issuance_balance"]
+        + state["burnt_balance"]
+    )
+
+
+def storage_fee_per_rewards(state: VectorizedState) -> np.ndarray:
+    return state["storage_fee_volume"] / _max(1, state["block_reward"])
+
+
+def community_owned_supply(state: VectorizedState) -> np.ndarray:
+    community_vested_supply = (state["allocated_tokens_testnets"]
+                               + state["allocated_tokens_foundation"]
+                               + state["allocated_tokens_ambassadors"])
+    return state["cumm_rewards"] + community_vested_supply
+
+
+def s_metric(key: str, metric: Callable[[VectorizedState], np.ndarray]) -> Callable:
+    """
+    Creates a state update function that writes `metric(state)` to `key`.
+    """
+    return lambda params, state, signal: (key, metric(state))
+
+
+def s_cumm_running(source_col: str, nan_value=0.0) -> Callable:
+    """
+    Vectorized `subspace_model.logic.s_cumm_running`.
+    """
+    target_col = f"cumm_{source_col}"
+
+    def suf(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+        value = state[source_col]
+        value = np.where(np.isnan(value), nan_value, value)
+        return (target_col, state[target_col] + value)
+    return suf
+
+
+def s_cumm_generic(source_col: str, target_col: str) -> Callable:
+    """
+    Vectorized `subspace_model.logic.s_cumm_generic`.
+    """
+    running_col = f"cumm_{source_col}"
+
+    def suf(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+        return (target_col, state[running_col] + state[source_col])
+    return suf
+
+
+s_cumm_block_reward = s_cumm_running("block_reward")
+s_cumm_storage_fee_volume = s_cumm_running("storage_fee_volume")
+s_cumm_compute_fee_volume = s_cumm_running("compute_fee_volume", nan_value=np.nan)
+
+
+def s_cumm_compute_fee_to_farmers(params: VectorizedParams, state: VectorizedState, _signal) -> tuple:
+    value = state["cumm_compute_fee_volume"] + state["compute_fee_volume"]
+    value = value * params["compute_fees_to_farmers"]
+    return ("cumm_compute_fees_to_farmers", value)
@@ -0,0 +1,153 @@
+from subspace_model.vectorized.logic import *
+
+# Mirrors `subspace_model.structure.SUBSPACE_MODEL_BLOCKS`
+
+VECTORIZED_MODEL_BLOCKS: list[dict] = [
+    {
+        "label": "Time Tracking",
+        "policies": {"evolve_time": p_evolve_time},
+        "variables": {
+            "delta_days": replace_suf("delta_days"),
+            "days_passed": add_suf("days_passed"),
+            "delta_blocks": replace_suf("delta_blocks"),
+            "blocks_passed": add_suf("blocks_passed"),
+        },
+    },
+    {
+        "label": "Reference Subsidy",
+        "policies": {},
+        "variables": {
+            "reference_subsidy": s_reference_subsidy,
+        },
+    },
+    {
+        "label": "Environmental Processes",
+        "policies": {"block_utilization": p_block_utilization},
+        "variables": {
+            "average_priority_fee": s_average_priority_fee,
+            "average_compute_weight_per_tx": s_average_compute_weight_per_tx,
+            "transaction_count": replace_suf("transaction_count"),
+            "average_transaction_size": replace_suf("average_transaction_size"),
+            "average_compute_weight_per_bundle": s_average_compute_weight_per_bundle,
+            "bundle_count": s_bundle_count,
+            "block_utilization": replace_suf("block_utilization"),
+        },
+    },
+    {
+        "label": "Archival Process",
+        "policies": {"archival": p_archive},
+        "variables": {
+            "blockchain_history_size": add_suf("blockchain_history_size"),
+            "buffer_size": add_suf("buffer_size"),
+        },
+    },
+    {
+        "label": "Sector Onboarding",
+        "policies": {"sector_onboarding": p_pledge_sectors},
+        "variables": {
+            "total_space_pledged": add_suf("total_space_pledged"),
+        },
+    },
+    {
+        "label": "Issuance Rewards",
+        "policies": {"issuance_reward": p_reward},
+        "variables": {
+            "reward_issuance_balance": add_suf("reward_issuance_balance"),
+            "farmers_balance": add_suf("farmers_balance"),
+            "block_reward": replace_suf("block_reward"),
+            "reward_to_voters": replace_suf("reward_to_voters"),
+            "reward_to_proposer": replace_suf("reward_to_proposer"),
+        },
+    },
+    {
+        "label": "Storage Fees",
+        "policies": {"storage_fees": p_storage_fees},
+        "variables": {
+            "free_space": replace_suf("free_space"),
+            "storage_fee_in_credits_per_bytes": replace_suf("storage_fee_in_credits_per_bytes"),
+            "extrinsic_length_in_bytes": replace_suf("extrinsic_length_in_bytes"),
+            "storage_fee_volume": replace_suf("storage_fee_volume"),
+        },
+    },
+    {
+        "label": "Compute Fees",
+        "policies": {"compute_fees": p_compute_fees},
+        "variables": {
+            "target_block_delta": replace_suf("target_block_delta"),
+            "targeted_adjustment_parameter": replace_suf("targeted_adjustment_parameter"),
+            "compute_fee_multiplier": replace_suf("compute_fee_multiplier"),
+            "tx_compute_weight": replace_suf("tx_compute_weight"),
+            "compute_fee_volume": replace_suf("compute_fee_volume"),
+            "priority_fee_volume": replace_suf("priority_fee_volume"),
+            "farmers_balance": add_suf("farmers_balance"),
+            "nominators_balance": add_suf("nominators_balance"),
+            "operators_balance": add_suf("operators_balance"),
+        },
+    },
+    {
+        "label": "Direct Allocations",
+        "policies": {"unvest": p_unvest},
+        "variables": {
+            "other_issuance_balance": add_suf("other_issuance_balance"),
+            "farmers_balance": add_suf("farmers_balance"),
+            "allocated_tokens": replace_suf("allocated_tokens"),
+            "allocated_tokens_investors": replace_suf("allocated_tokens_investors"),
+            "allocated_tokens_founders": replace_suf("allocated_tokens_founders"),
+            "allocated_tokens_team": replace_suf("allocated_tokens_team"),
+            "allocated_tokens_advisors": replace_suf("allocated_tokens_advisors"),
+            "allocated_tokens_vendors": replace_suf("allocated_tokens_vendors"),
+            "allocated_tokens_ambassadors": replace_suf("allocated_tokens_ambassadors"),
+        },
+    },
+    {
+        "label": "Slash",
+        "policies": {"slash": p_slash},
+        "variables": {
+            "staking_pool_balance": add_suf("staking_pool_balance"),
+            "operator_pool_shares": add_suf("operator_pool_shares"),
+            "burnt_balance": add_suf("burnt_balance"),
+        },
+    },
+    {
+        "label": "Staking / Unstaking",
+        "policies": {"staking": p_staking},
+        "variables": {
+            "operators_balance": add_suf("operators_balance"),
+            "nominators_balance": add_suf("nominators_balance"),
+            "staking_pool_balance": add_suf("staking_pool_balance"),
+            "operator_pool_shares": add_suf("operator_pool_shares"),
+            "nominator_pool_shares": add_suf("nominator_pool_shares"),
+        },
+    },
+    {
+        "label": "Transfers",
+        "policies": {"transfers": p_transfers},
+        "variables": {
+            "operators_balance": add_suf("operators_balance"),
+            "nominators_balance": add_suf("nominators_balance"),
+            "farmers_balance": add_suf("farmers_balance"),
+        },
+    },
+    {
+        "label": "Metrics",
+        "policies": {},
+        "variables": {
+            # NOTE: keeps the keys returned by the scalar metrics block
+            "circulating_supply": s_metric("circulating_supply", circulating_supply),
+            "user_supply": s_metric("user_supply", user_supply),
+            "earned_supply": s_metric("user_supply", user_supply),
+            "issued_supply": s_metric("issued_supply", issued_supply),
+            "earned_minus_burned_supply": s_metric("user_supply", earned_minus_burned_supply),
+            "total_supply": s_metric("total_supply", total_supply),
+            "sum_of_stocks": s_metric("sum_of_stocks", sum_of_stocks),
+            "storage_fee_per_rewards": s_metric("storage_fee_per_rewards", storage_fee_per_rewards),
+            "community_owned_supply": s_metric("community_owned_supply", community_owned_supply),
+            "cumm_rewards": s_cumm_generic("block_reward", "cumm_rewards"),
+            "cumm_storage_fees_to_farmers": s_cumm_generic("storage_fee_volume", "cumm_storage_fees_to_farmers"),
+            "cumm_compute_fees_to_farmers": s_cumm_compute_fee_to_farmers,
+            "cumm_block_reward": s_cumm_block_reward,
+            "cumm_storage_fee_volume": s_cumm_storage_fee_volume,
+            "cumm_compute_fee_volume": s_cumm_compute_fee_volume,
+        },
+    },
+]
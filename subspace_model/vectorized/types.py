@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Mapping
+from numbers import Number
+
+import numpy as np
+
+## Types
+
+# A state variable holds one value per trajectory
+VectorizedState = Mapping[str, np.ndarray]
+
+# Policy and state update function signatures for the vectorized engine
+VectorizedSignal = dict[str, np.ndarray]
+VectorizedPolicy = Callable[['VectorizedParams', VectorizedState], VectorizedSignal]
+VectorizedSUF = Callable[['VectorizedParams', VectorizedState, VectorizedSignal], tuple[str, np.ndarray]]
+
+
+class StateFrame(Mapping):
+    """
+    Working state of the vectorized engine: one contiguous row per state
+    variable, with one value per trajectory.
+
+    Partial state updates are written in place, so a timestep costs no dict
+    or array materialization beyond the values the model computes.
+    """
+
+    def __init__(self, state: Mapping[str, Any], size: int):
+        self._index = {k: i for i, k in enumerate(state)}
+        self.values = np.empty((len(self._index), size))
+        for k, v in state.items():
+            self.values[self._index[k]] = v
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.values[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def update(self, updates: Mapping[str, Any]):
+        """
+        Write all updates at once. Values that alias the frame are copied
+        first so that every update sees the pre-update state.
+        """
+        updates = {k: v.copy() if isinstance(v, np.ndarray) and np.may_share_memory(v, self.values) else v
+                   for k, v in updates.items()}
+        new_keys = [k for k in updates if k not in self._index]
+        if new_keys:
+            for k in new_keys:
+                self._index[k] = len(self._index)
+            self.values = np.vstack([self.values, np.full((len(new_keys), self.values.shape[1]), np.nan)])
+        for k, v in updates.items():
+            self.values[self._index[k]] = v
+
+
+@dataclass
+class Checkpoint:
+    """
+    The state of every trajectory of a vectorized run after `timestep`, as
+    one row per state variable and one column per trajectory, from which
+    the run can be resumed.
+    """
+    timestep: int
+    keys: list[str]
+    values: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return self.values.shape[1]
+
+    def state(self) -> dict[str, np.ndarray]:
+        return dict(zip(self.keys, self.values))
+
+    def take(self, trajectories) -> 'Checkpoint':
+        """The checkpoint of some of the trajectories, by position or mask."""
+        return Checkpoint(self.timestep, self.keys, self.values[:, trajectories])
+
+    @classmethod
+    def concat(cls, checkpoints: Iterable['Checkpoint']) -> 'Checkpoint':
+        checkpoints = list(checkpoints)
+        first = checkpoints[0]
+        if any(c.timestep != first.timestep or c.keys != first.keys for c in checkpoints):
+            raise ValueError("Only checkpoints of the same timestep and state variables can be joined")
+        return cls(first.timestep, first.keys, np.hstack([c.values for c in checkpoints]))
+
+
+class StateTable:
+    """
+    Preallocated record of a vectorized run as a structured array with one
+    fixed-width row per (trajectory, timestep).
+
+    Every field is a float64 so that the table can also be viewed as a
+    single (rows, fields) matrix without copying.
+    """
+
+    def __init__(self, keys: list[str], size: int, timesteps: int):
+        self.data = np.empty((size, timesteps + 1), dtype=[(k, np.float64) for k in keys])
+        self.matrix[:] = np.nan
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return self.data.dtype.names  # type: ignore
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.data.reshape(-1).view(np.float64).reshape(-1, len(self.keys))
+
+    def record(self, timestep: int, state: Mapping[str, np.ndarray]):
+        for k in self.keys:
+            if k in state:
+                self.data[k][:, timestep] = state[k]
+
+
+class TrajectoryRow(Mapping):
+    """
+    Read-only view over a single trajectory of a vectorized state, so that
+    scalar parameter functions can be evaluated on it.
+    """
+
+    def __init__(self, state: Mapping, i: int):
+        self._state = state
+        self._i = i
+
+    def __getitem__(self, key: str) -> Any:
+        return self._state[key][self._i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+
+class TrajectorySubset(Mapping):
+    """
+    Lazy view over a subset of trajectories of a vectorized state or params.
+    """
+
+    def __init__(self, data: Mapping, idx: np.ndarray):
+        self._data = data
+        self._idx = idx
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._data[key]
+        if isinstance(value, np.ndarray):
+            return value[self._idx]
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class VectorizedParams(Mapping):
+    """
+    Per-trajectory view over a cadCAD parameter sweep.
+
+    Numeric parameters are exposed as arrays with one entry per trajectory.
+    Any other parameter (functions, subsidy components, labels) is evaluated
+    per group of trajectories that share the same value.
+    """
+
+    def __init__(self, sweep_params: dict[str, list], samples: int):
+        n_subsets = max(len(v) for v in sweep_params.values())
+        for k, v in sweep_params.items():
+            if len(v) not in (1, n_subsets):
+                raise ValueError(
+                    f"Parameter '{k}' has {len(v)} values, expected 1 or {n_subsets}")
+
+        self.subsets: list[dict] = [
+            {k: v[i] if len(v) > 1 else v[0] for k, v in sweep_params.items()}
+            for i in range(n_subsets)]
+        self.samples = samples
+        self.subset = np.repeat(np.arange(n_subsets), samples)
+        self.run = np.tile(np.arange(1, samples + 1), n_subsets)
+        self.size = len(self.subset)
+        self._arrays: dict[str, np.ndarray] = {}
+        self._groups: dict[str, list[tuple[Any, np.ndarray]]] = {}
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self._arrays:
+            values = [subset[key] for subset in self.subsets]
+            if all(isinstance(v, Number) for v in values):
+                array = np.asarray(values, dtype=float)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            self._arrays[key] = array[self.subset]
+        return self._arrays[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.subsets[0])
+
+    def __len__(self) -> int:
+        return len(self.subsets[0])
+
+    def groups(self, key: str) -> list[tuple[Any, np.ndarray]]:
+        """
+        Distinct values of a parameter (by identity) along with the
+        trajectories that use them.
+        """
+        if key not in self._groups:
+            by_id: dict[int, tuple[Any, list[int]]] = {}
+            for i, subset in enumerate(self.subsets):
+                value = subset[key]
+                by_id.setdefault(id(value), (value, []))[1].append(i)
+            self._groups[key] = [
+                (value, np.flatnonzero(np.isin(self.subset, subsets)))
+                for value, subsets in by_id.values()]
+        return self._groups[key]
+
+    def call(self, key: str, state: VectorizedState, with_params: bool = True) -> np.ndarray:
+        """
+        Evaluate a functional parameter for every trajectory.
+
+        Functions that expose a `vectorized` attribute are called once per
+        group on array views of the params and state. Any other function is
+        called once per trajectory on a scalar view of its state.
+        `with_params=False` is for functions of the state alone, such as
+        `credit_supply_definition`.
+        """
+        out = np.empty(self.size)
+        for f, idx in self.groups(key):
+            vectorized = getattr(f, 'vectorized', None)
+            if vectorized is not None:
+                if len(idx) == self.size:
+                    args = (self, state)
+                else:
+                    args = (TrajectorySubset(self, idx), TrajectorySubset(state, idx))
+                out[idx] = vectorized(*args) if with_params else vectorized(args[1])
+            else:
+                for i in idx:
+                    row = TrajectoryRow(state, i)
+                    if with_params:
+                        out[i] = f(self.subsets[self.subset[i]], row)
+                    else:
+                        out[i] = f(row)
+        return out
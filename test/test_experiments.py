@@ -1,10 +1,17 @@
+import pytest
+
 from subspace_model.experiments.experiment import (
     reward_split_sweep,
     sanity_check_run,
+    seed_sweep,
+    simulate,
     standard_stochastic_run,
     sweep_credit_supply,
     reference_subsidy_sweep,
 )
+from subspace_model.params import DEFAULT_PARAMS, SPECIAL_ENVIRONMENTAL_SCENARIOS
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
 
 
 def test_sanity_check_run():
@@ -31,3 +38,53 @@ def test_reference_subsidy_sweep():
 #     sim_df = sweep_over_single_component_and_credit_supply(
 #         SIMULATION_DAYS=1, TIMESTEP_IN_DAYS=1, SAMPLES=1
 #     )
+
+
+def test_seeded_runs_are_reproducible():
+    sim_df_1 = standard_stochastic_run(SIMULATION_DAYS=70, TIMESTEP_IN_DAYS=1, SAMPLES=2, SEED=42)
+    sim_df_2 = standard_stochastic_run(SIMULATION_DAYS=70, TIMESTEP_IN_DAYS=1, SAMPLES=2, SEED=42)
+    assert sim_df_1.total_supply.equals(sim_df_2.total_supply)
+    assert sim_df_1.query("run == 1").total_supply.values.tolist() != sim_df_1.query("run == 2").total_supply.values.tolist()
+
+
+def test_seeded_runs_do_not_depend_on_chunking():
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    sweep_params.update({k: [v] for k, v in SPECIAL_ENVIRONMENTAL_SCENARIOS["stochastic"].items()})
+    sweep_params["reward_proposer_share"] = [0.1, 0.3]
+    sweep_params = seed_sweep(sweep_params, 42)
+
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 30, 2)
+    full_df = simulate(*args)
+    chunk = {k: v[1:] if len(v) > 1 else v for k, v in sweep_params.items()}
+    chunk_df = simulate(INITIAL_STATE, chunk, SUBSPACE_MODEL_BLOCKS, 30, 2)
+
+    expected = full_df.query("subset == 1").total_supply.values
+    assert (chunk_df.total_supply.values == expected).all()
+
+
+@pytest.mark.parametrize("engine", ["cadcad", "vectorized"])
+def test_recorded_variables_and_stride(engine):
+    args = (INITIAL_STATE, {k: [v] for k, v in DEFAULT_PARAMS.items()}, SUBSPACE_MODEL_BLOCKS, 30, 2)
+    full_df = simulate(*args, assign_params={"label"}, engine=engine, seed=1)
+    sim_df = simulate(*args, assign_params={"label"}, engine=engine, seed=1,
+                      record=["total_supply", "block_reward"], stride=7)
+
+    assert set(sim_df.columns) == {"simulation", "subset", "run", "timestep", "total_supply", "block_reward", "label"}
+    assert sorted(sim_df.timestep.unique()) == [0, 7, 14, 21, 28, 30]
+    expected = full_df[full_df.timestep.isin([0, 7, 14, 21, 28, 30])]
+    assert sim_df.total_supply.tolist() == expected.total_supply.tolist()
+
+
+def test_recording_unknown_variable():
+    with pytest.raises(ValueError):
+        sanity_check_run(SIMULATION_DAYS=10, RECORDED_VARIABLES=["not_a_variable"])
+
+
+def test_cli_runs_experiments_with_their_default_engine(tmp_path, monkeypatch):
+    testing = pytest.importorskip("click.testing")
+    from subspace_model.__main__ import main
+
+    monkeypatch.chdir(tmp_path)
+    result = testing.CliRunner().invoke(main, ["-e", "psuu_halving", "-d", "20", "-s", "1", "-sw", "3"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "data/simulations").exists()
@@ -1,5 +1,16 @@
+import numpy as np
+
 from subspace_model.const import BLOCKS_PER_MONTH, BLOCKS_PER_YEAR
 from subspace_model.experiments.logic import SubsidyComponent, NORMAL_GENERATOR, POISSON_GENERATOR, POSITIVE_INTEGER, MAGNITUDE
+from subspace_model.experiments.logic import MAINNET_REFERENCE_SUBSIDY_COMPONENTS
+from subspace_model.logic import (
+    s_cumm_block_reward,
+    s_cumm_compute_fee_to_farmers,
+    s_cumm_compute_fee_volume,
+    s_cumm_generic,
+)
+from subspace_model.types import SubsidySchedule
+from subspace_model.vectorized import logic as vectorized_logic
 
 
 # def test_reference_subsidy():
@@ -23,3 +34,89 @@ def test_generators():
 
 
 
+
+
+def test_generator_streams():
+    generator = POSITIVE_INTEGER(NORMAL_GENERATOR(1000, 500))
+    state = dict(simulation=0, subset=0, run=1, timestep=3, days_passed=3)
+    value = generator(None, state)
+    assert value >= 0
+    assert generator(None, state) == value
+
+    vectorized = POISSON_GENERATOR(10).vectorized
+    values = vectorized(None, dict(timestep=np.full(50, 7.0)))
+    assert values.shape == (50,)
+    assert (vectorized(None, dict(timestep=np.full(50, 7.0))) == values).all()
+
+
+def test_seeded_streams_do_not_depend_on_other_streams():
+    params = dict(rng_seed=7, rng_subset=3)
+    states = [dict(simulation=0, subset=0, run=1, timestep=t, days_passed=t) for t in range(200)]
+
+    def draws(generator):
+        return [generator(params, s) for s in states]
+
+    expected = draws(NORMAL_GENERATOR(1.0, 2.0))
+    # Unrelated streams created first leave the draws unchanged
+    NORMAL_GENERATOR(5.0, 5.0)
+    POISSON_GENERATOR(3.0)
+    assert draws(NORMAL_GENERATOR(1.0, 2.0)) == expected
+    # Generators with the same arguments are told apart by their keys
+    assert draws(NORMAL_GENERATOR(1.0, 2.0, key="other")) != expected
+
+
+def test_subsidy_schedule():
+    components = MAINNET_REFERENCE_SUBSIDY_COMPONENTS()[-1]
+    schedule = SubsidySchedule.compile(components, 14_400.0)
+    assert SubsidySchedule.compile(list(components), 14_400.0) is schedule
+
+    blocks = np.cumsum(np.r_[0.0, np.full(3_000, 14_400.0)])
+    expected = [sum((c(t) for c in components), 0.0) for t in blocks]
+    assert [schedule(t) for t in blocks] == expected
+    assert schedule.values(blocks).tolist() == expected
+    assert schedule(1234.5) == sum(c(1234.5) for c in components)
+
+    constant = SubsidySchedule.compile([SubsidyComponent(0, 10_000, 1e9, 2.0)], 100.0)
+    assert constant(5_000.0) == 2.0
+    assert constant.cumulative[50] == 2.0 * 5_000
+
+
+def test_cumm_compute_fees_keep_nan_like_history_sums():
+    # A NaN fee volume leaves cumm_compute_fees_to_farmers NaN for the rest
+    # of the trajectory, as summing the fee volume over the history did
+    volumes = [1.0, 2.0, float("nan"), 3.0, 4.0]
+    params = {"compute_fees_to_farmers": 0.5}
+    expected = [0.5 * sum(volumes[:t + 1]) for t in range(len(volumes))]
+
+    state = {"cumm_compute_fee_volume": 0.0}
+    vectorized_state = {"cumm_compute_fee_volume": np.zeros(1)}
+    for t, volume in enumerate(volumes):
+        state["compute_fee_volume"] = volume
+        vectorized_state["compute_fee_volume"] = np.array([volume])
+        _, fees = s_cumm_compute_fee_to_farmers(params, None, None, state, None)
+        _, vectorized_fees = vectorized_logic.s_cumm_compute_fee_to_farmers(params, vectorized_state, None)
+        np.testing.assert_equal([fees, vectorized_fees[0]], [expected[t]] * 2)
+        state["cumm_compute_fee_volume"] = s_cumm_compute_fee_volume(params, None, None, state, None)[1]
+        vectorized_state["cumm_compute_fee_volume"] = vectorized_logic.s_cumm_compute_fee_volume(
+            params, vectorized_state, None)[1]
+
+
+def test_cumm_rewards_skip_nan_after_its_timestep_like_history_sums():
+    # A NaN reward makes its own timestep NaN and counts as 0.0 afterwards,
+    # as summing the rewards over the history did
+    rewards = [1.0, 2.0, float("nan"), 3.0, 4.0]
+    expected = [1.0, 3.0, float("nan"), 6.0, 10.0]
+    cumm_rewards = s_cumm_generic("block_reward", "cumm_rewards")
+    vectorized_cumm_rewards = vectorized_logic.s_cumm_generic("block_reward", "cumm_rewards")
+
+    state = {"cumm_block_reward": 0.0}
+    vectorized_state = {"cumm_block_reward": np.zeros(1)}
+    for t, reward in enumerate(rewards):
+        state["block_reward"] = reward
+        vectorized_state["block_reward"] = np.array([reward])
+        _, value = cumm_rewards(None, None, None, state, None)
+        _, vectorized_value = vectorized_cumm_rewards(None, vectorized_state, None)
+        np.testing.assert_equal([value, vectorized_value[0]], [expected[t]] * 2)
+        state["cumm_block_reward"] = s_cumm_block_reward(None, None, None, state, None)[1]
+        vectorized_state["cumm_block_reward"] = vectorized_logic.s_cumm_block_reward(
+            None, vectorized_state, None)[1]
@@ -0,0 +1,48 @@
+from copy import deepcopy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from subspace_model.experiments.experiment import simulate
+from subspace_model.fusion import dependency_graph, fuse_blocks, merge_blocks
+from subspace_model.params import DEFAULT_PARAMS
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
+
+
+def test_dependency_graph():
+    accesses, dependencies = dependency_graph(SUBSPACE_MODEL_BLOCKS, DEFAULT_PARAMS)
+    labels = [access.label for access in accesses]
+    issuance = labels.index("Issuance Rewards")
+    allocations = labels.index("Direct Allocations")
+    storage = labels.index("Storage Fees")
+    assert "farmers_balance" in accesses[issuance].writes
+    assert "reference_subsidy" in accesses[issuance].reads
+    assert labels.index("Reference Subsidy") in dependencies[issuance]
+    assert storage not in dependencies[allocations]
+
+
+def test_refuses_read_after_write():
+    accesses, _ = dependency_graph(SUBSPACE_MODEL_BLOCKS, DEFAULT_PARAMS)
+    labels = [access.label for access in accesses]
+    first, second = labels.index("Reference Subsidy"), labels.index("Issuance Rewards")
+    with pytest.raises(ValueError, match="read-after-write"):
+        merge_blocks(SUBSPACE_MODEL_BLOCKS[first], SUBSPACE_MODEL_BLOCKS[second],
+                     accesses[first], accesses[second])
+
+
+def test_fused_blocks_match():
+    params = deepcopy(DEFAULT_PARAMS)
+    params["rng_seed"] = 7
+    sweep_params = {k: [v] for k, v in params.items()}
+    fused = fuse_blocks(SUBSPACE_MODEL_BLOCKS, params)
+    assert len(fused) < len(SUBSPACE_MODEL_BLOCKS)
+    assert fused[0] is SUBSPACE_MODEL_BLOCKS[0]
+
+    expected = simulate(INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 90, 2)
+    sim_df = simulate(INITIAL_STATE, sweep_params, fused, 90, 2)
+    assert expected.shape == sim_df.shape
+    for column in expected.columns:
+        if pd.api.types.is_numeric_dtype(expected[column]):
+            np.testing.assert_array_equal(sim_df[column], expected[column], err_msg=column)
@@ -0,0 +1,100 @@
+import json
+import sqlite3
+from dataclasses import replace
+from itertools import count
+
+import pandas as pd
+
+from subspace_model.experiments import experiment, kpi_cache
+from subspace_model.experiments.experiment import (
+    partition_cached_subsets,
+    psuu,
+    psuu_chunk_bounds,
+    psuu_sweep_space,
+)
+from subspace_model.experiments.kpi_cache import KPICache, model_sources
+from subspace_model.experiments.sweep import SweepSpace
+
+
+def test_kpi_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = count()
+    monkeypatch.setattr(kpi_cache.time, "time", lambda: next(clock))
+    rows = {key: {"kpi": float(i)} for i, key in enumerate("abcd")}
+    row_bytes = 1 + len(json.dumps(rows["a"]))
+    with KPICache(tmp_path, max_bytes=3 * row_bytes) as cache:
+        for k in "abc":
+            cache.put_many({k: rows[k]})
+        assert cache.get_many(["a", "x"]) == {"a": rows["a"]}
+        cache.put_many({"d": rows["d"]})
+        assert len(cache) == 3 and cache.size == 3 * row_bytes
+
+    with KPICache(tmp_path, max_bytes=3 * row_bytes) as cache:
+        assert cache.get_many("abcd") == {k: rows[k] for k in "acd"}
+
+
+def test_cached_subsets_are_planned_as_one_last_chunk(tmp_path):
+    sweep_space = SweepSpace({"a": [0, 1, 2, 3], "b": ["x"]})
+    trajectory_keys = [[f"{subset}-{run}" for run in (1, 2)] for subset in range(4)]
+    with KPICache(tmp_path) as cache:
+        cache.put_many({key: {"kpi": 1.0} for key in ["0-1", "0-2", "2-1", "3-1", "3-2"]})
+        sample, keys, cached_rows, n_simulated = partition_cached_subsets(cache, sweep_space, None, trajectory_keys)
+
+    assert sample == {"a": [1, 2, 0, 3], "b": [1, 2, 0, 3]} and n_simulated == 2
+    assert keys == [trajectory_keys[i] for i in sample["a"]] and len(cached_rows) == 5
+    assert psuu_chunk_bounds([1.0] * 4, n_simulated, 1, 1, balanced=False) == [(0, 1), (1, 2), (2, 4)]
+
+
+def test_psuu_simulates_only_uncached_subsets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def run():
+        psuu(SIMULATION_DAYS=10, SAMPLES=2, N_SWEEP_SAMPLES=6, SWEEPS_PER_PROCESS=2, PROCESSES=1,
+             USE_JOBLIB=False, ENGINE="vectorized", SEED=5, KPI_CACHE=str(tmp_path / "cache"))
+        run_dir = sorted((tmp_path / "data/simulations").iterdir())[-1]
+        chunks = json.loads((run_dir / "manifest.json").read_text())["chunks"]
+        agg_df = pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz").drop(columns=["index", "subset"])
+        return chunks, agg_df.sort_values(list(agg_df.columns[:11])).reset_index(drop=True)
+
+    chunks, expected = run()
+    assert len(KPICache(tmp_path / "cache")) == 12
+
+    # Every subset is cached, and taken from the cache as one finished chunk
+    chunks, agg_df = run()
+    assert [(c["start"], c["stop"], c["started_at"]) for c in chunks] == [(0, 6, None)]
+    pd.testing.assert_frame_equal(agg_df, expected)
+
+    # Subsets that lost a trajectory are simulated again, with the same draws
+    with sqlite3.connect(tmp_path / "cache/kpis.sqlite") as db:
+        db.execute("DELETE FROM rows WHERE rowid IN (1, 4, 12)")
+    chunks, agg_df = run()
+    simulated = sum(c["stop"] - c["start"] for c in chunks if c["started_at"] is not None)
+    assert 1 <= simulated <= 3 and chunks[-1]["started_at"] is None
+    pd.testing.assert_frame_equal(agg_df, expected)
+
+
+def test_model_sources_cover_the_model():
+    sources = model_sources()
+    assert {"const.py", "metrics.py", "units.py", "experiments/recording.py", "psuu/kpis.py"} <= set(sources)
+    assert "experiments/experiment.py" not in sources
+
+
+def test_changed_grid_values_miss_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def run():
+        psuu(SIMULATION_DAYS=10, SAMPLES=1, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=3, PROCESSES=1,
+             USE_JOBLIB=False, ENGINE="vectorized", SEED=5, KPI_CACHE=str(tmp_path / "cache"))
+        run_dir = sorted((tmp_path / "data/simulations").iterdir())[-1]
+        return json.loads((run_dir / "manifest.json").read_text())["chunks"]
+
+    run()
+    assert [c["started_at"] is None for c in run()] == [True]
+
+    # The same grid positions with other values are simulated again
+    space = psuu_sweep_space()
+    grid = [tuple(replace(c, max_reference_subsidy=2 * c.max_reference_subsidy) for c in components)
+            for components in space.axes["reference_subsidy_components"]]
+    monkeypatch.setattr(experiment, "psuu_sweep_space", lambda: SweepSpace(
+        {**space.axes, "reference_subsidy_components": grid}, space.factors))
+    assert [c["started_at"] is None for c in run()] == [False]
+    assert len(KPICache(tmp_path / "cache")) == 6
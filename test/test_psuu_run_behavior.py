@@ -1,8 +1,27 @@
+import json
+from random import Random
+
 import pandas as pd
 import pytest as pt
 
-from subspace_model.experiments.experiment import psuu
-from subspace_model.psuu import timestep_tensor_to_trajectory_tensor
+from subspace_model.experiments.experiment import (
+    PSUU_ASSIGN_PARAMS,
+    psuu,
+    psuu_successive_halving,
+    psuu_sweep_params,
+    psuu_sweep_space,
+    simulate,
+)
+from subspace_model.experiments.manifest import FAILED, RunManifest
+from subspace_model.psuu import (
+    create_latest_trajectory_tensor,
+    expand_governance_columns,
+    timestep_tensor_to_trajectory_tensor,
+    trajectory_tensor_keys,
+)
+from subspace_model.psuu.kpis import KPI_functions, KPIAccumulator
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
 from subspace_model.const import MAX_CREDIT_ISSUANCE
 
 @pt.fixture(scope="module", params=[(100, 50, 1), (1000, 2, 1)])
@@ -50,6 +69,38 @@ def test_kpi_values(sim_df):
     ) >= agg_df['cumm_rewards_before_1yr'].mean()
 
 
+def test_segment_kpis_match_kpi_functions(sim_df):
+    agg_df = timestep_tensor_to_trajectory_tensor(sim_df.copy())
+    assert list(agg_df.columns) == list(KPI_functions)
+    # Trajectories are grouped by the float governance parameters too
+    float_keys = [name for name, level in zip(agg_df.index.names, agg_df.index.levels)
+                  if pd.api.types.is_float_dtype(level)]
+    assert 'component_1_max_reference_subsidy' in float_keys and 'weight_to_fee' in float_keys
+
+    full_df = expand_governance_columns(sim_df.copy())
+    groups = full_df.groupby(list(agg_df.index.names))
+    for kpi, (kpi_f, _) in KPI_functions.items():
+        expected = groups.apply(kpi_f, include_groups=False).rename(kpi)
+        pd.testing.assert_series_equal(agg_df[kpi], expected, rtol=1e-12)
+
+
+def test_online_kpis_match_kpi_functions():
+    sweep_space = psuu_sweep_space()
+    sweep_params = psuu_sweep_params(sweep_space, sweep_space.sample(4, Random(1)), 0, 4, 1)
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 400, 2)
+    kwargs = dict(assign_params=PSUU_ASSIGN_PARAMS, engine="vectorized", seed=1)
+    full_df = expand_governance_columns(simulate(*args, **kwargs))
+    groups = full_df.groupby(trajectory_tensor_keys(full_df))
+    expected = pd.DataFrame({kpi: groups.apply(kpi_f, include_groups=False)
+                             for kpi, (kpi_f, _) in KPI_functions.items()})
+
+    kpis = KPIAccumulator()
+    sim_df = simulate(*args, **kwargs, record=[], stride=400, kpis=kpis)
+    assert len(sim_df) == 2 * 4 * 2
+    assert list(kpis.kpis) == list(KPI_functions)
+    pd.testing.assert_frame_equal(kpis.trajectory_tensor(), expected, rtol=1e-12)
+
+
 def test_state_variables(sim_df):
     for i_traj, df in sim_df.groupby(['simulation', 'subset', 'run']):
         for i_row, row in df.iterrows():
@@ -96,3 +147,114 @@ def test_state_variables(sim_df):
         assert df.sum_of_stocks.max() == pt.approx(MAX_CREDIT_ISSUANCE)
                 
 
+
+def test_resume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    psuu(SIMULATION_DAYS=10,
+         SAMPLES=1,
+         N_SWEEP_SAMPLES=3,
+         SWEEPS_PER_PROCESS=1,
+         USE_JOBLIB=False,
+         ENGINE="vectorized",
+         SEED=1)
+    (run_dir,) = (tmp_path / "data/simulations").iterdir()
+    manifest = RunManifest.load(run_dir)
+    assert manifest.finalized and manifest.pending() == []
+    expected = pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz")
+
+    # Lose one chunk's output and fail another
+    manifest.output_path(1).unlink()
+    manifest.mark(2, FAILED, "interrupted")
+    kept_mtime = manifest.output_path(0).stat().st_mtime_ns
+    assert RunManifest.load(run_dir).pending() == [1, 2]
+
+    psuu(SWEEPS_PER_PROCESS=5, USE_JOBLIB=False, RESUME=str(run_dir))
+    manifest = RunManifest.load(run_dir)
+    assert manifest.pending() == []
+    assert manifest.output_path(0).stat().st_mtime_ns == kept_mtime
+    pd.testing.assert_frame_equal(pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz"), expected)
+
+
+def test_kpi_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    kwargs = dict(SIMULATION_DAYS=30, SAMPLES=2, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=2,
+                  USE_JOBLIB=False, ENGINE="vectorized", SEED=1)
+    psuu(**kwargs)
+    sample_df = psuu(**kwargs, KPI_ONLY=True, SAMPLE_TRAJECTORIES=0.5, RETURN_SIM_DF=True)
+
+    full_run, kpi_run = sorted((tmp_path / "data/simulations").iterdir())
+    assert not list(kpi_run.glob("timestep_tensor*"))
+    expected = pd.read_pickle(full_run / "trajectory_tensor.pkl.gz")
+    agg_df = pd.read_pickle(kpi_run / "trajectory_tensor.pkl.gz")[expected.columns]
+    pd.testing.assert_frame_equal(agg_df.reset_index(drop=True), expected.reset_index(drop=True))
+    # Sampled trajectories are kept whole, timesteps 0 to 31
+    assert 0 < len(sample_df) < 6 * 32
+    assert sample_df.groupby(["subset", "run"]).size().eq(32).all()
+
+    # The same trajectories are sampled however the sweep is chunked
+    rechunked_df = psuu(**{**kwargs, "SWEEPS_PER_PROCESS": 3}, KPI_ONLY=True, SAMPLE_TRAJECTORIES=0.5,
+                        RETURN_SIM_DF=True)
+    order = ["subset", "run", "timestep"]
+    pd.testing.assert_frame_equal(rechunked_df.sort_values(order, ignore_index=True),
+                                  sample_df.sort_values(order, ignore_index=True))
+
+
+def test_normalized(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    kwargs = dict(SIMULATION_DAYS=30, SAMPLES=2, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=2,
+                  USE_JOBLIB=False, ENGINE="vectorized", SEED=1, RETURN_SIM_DF=True)
+    wide_df = psuu(**kwargs)
+    sim_df = psuu(**kwargs, NORMALIZED=True)
+
+    wide_run, normalized_run = sorted((tmp_path / "data/simulations").iterdir())
+    parameters = pd.read_pickle(normalized_run / "parameters.pkl.gz")
+    assert parameters.index.names == ["simulation", "subset"] and len(parameters) == 3
+    part = pd.read_pickle(normalized_run / "timestep_tensor-0.pkl.gz")
+    assert not set(parameters.columns) & set(part.columns)
+    pd.testing.assert_frame_equal(pd.read_pickle(normalized_run / "trajectory_tensor.pkl.gz"),
+                                  pd.read_pickle(wide_run / "trajectory_tensor.pkl.gz"), check_like=True)
+    pd.testing.assert_frame_equal(sim_df, wide_df, check_like=True)
+
+
+def test_create_latest_trajectory_tensor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    psuu(SIMULATION_DAYS=30, SAMPLES=1, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=1,
+         USE_JOBLIB=False, ENGINE="vectorized", SEED=1)
+    (run_dir,) = (tmp_path / "data/simulations").iterdir()
+    expected = pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz").drop(columns="index")
+    (run_dir / "trajectory_tensor-1.pkl.gz").unlink()
+
+    agg_df = create_latest_trajectory_tensor("data/simulations/", processes=1)
+    assert (run_dir / "trajectory_tensor-1.pkl.gz").exists()
+    pd.testing.assert_frame_equal(agg_df[expected.columns], expected.reset_index(drop=True))
+
+    subset_df = create_latest_trajectory_tensor("data/simulations/", columns=["subset", "cumm_rewards"],
+                                                filters=[("subset", "=", 2)], processes=1)
+    assert subset_df.subset.tolist() == [2]
+
+    (run_dir / "trajectory_tensor-1.pkl.gz").unlink()
+    (run_dir / "timestep_tensor-1.pkl.gz").unlink()
+    with pt.raises(ValueError, match="trajectory_tensor-1"):
+        create_latest_trajectory_tensor("data/simulations/", processes=1)
+
+
+def test_successive_halving(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    kwargs = dict(SIMULATION_DAYS=30, SAMPLES=1, N_SWEEP_SAMPLES=6, SWEEPS_PER_PROCESS=4,
+                  PROCESSES=1, SEED=1)
+    psuu_successive_halving(**kwargs, RUNG_DAYS=(10,), KEEP_FRACTION=1 / 3)
+    psuu_successive_halving(**kwargs, RUNG_DAYS=())
+
+    halving_run, exhaustive_run = sorted((tmp_path / "data/simulations").iterdir())
+    summary = json.loads((halving_run / "halving.json").read_text())
+    assert [rung["subsets"] for rung in summary["rungs"]] == [6, 2]
+    assert summary["trajectory_timesteps"] == 6 * 11 + 2 * 20
+    assert summary["exhaustive_trajectory_timesteps"] == 6 * 31
+
+    # The resumed survivors end up where an uninterrupted run does
+    agg_df = pd.read_pickle(halving_run / "trajectory_tensor.pkl.gz")
+    assert agg_df.simulated_days.value_counts().to_dict() == {10: 4, 30: 2}
+    survivors = agg_df.query("simulated_days == 30").set_index("subset")
+    expected = pd.read_pickle(exhaustive_run / "trajectory_tensor.pkl.gz").set_index("subset")
+    pd.testing.assert_frame_equal(survivors[list(KPI_functions)],
+                                  expected.loc[survivors.index, list(KPI_functions)])
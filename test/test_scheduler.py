@@ -0,0 +1,45 @@
+from subspace_model.experiments.manifest import DONE, ChunkRecord, RunManifest
+from subspace_model.experiments.scheduler import (
+    CostModel,
+    dispatch_order,
+    plan_chunks,
+    worker_utilization,
+)
+from subspace_model.experiments.sweep import SweepSpace
+
+
+def test_plan_chunks_balances_cost():
+    costs = [10.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 10.0]
+    chunks = plan_chunks(costs, n_workers=2, max_size=4, tasks_per_worker=2)
+
+    # Contiguous, covering every subset once
+    assert [start for start, _ in chunks][1:] == [stop for _, stop in chunks][:-1]
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(costs)
+    assert all(stop - start <= 4 for start, stop in chunks)
+    # Expensive subsets get chunks of their own and are dispatched first
+    assert chunks[0] == (0, 1)
+    assert set(dispatch_order(chunks, costs)[:2]) == {0, len(chunks) - 1}
+
+
+def test_cost_model_learns_from_history(tmp_path):
+    sweep_space = SweepSpace({"environmental_label": ["calm", "volatile"], "label": ["a", "b"]})
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    RunManifest(
+        run_dir=str(run_dir),
+        config={"SIMULATION_DAYS": 9, "TIMESTEP_IN_DAYS": 1, "SAMPLES": 1, "ENGINE": "cadcad"},
+        n_combinations=4,
+        sample={"label": [0, 2], "environmental_label": [0, 2]},
+        chunks=[ChunkRecord(0, 1, DONE, "2024-01-01T00:00:00", "2024-01-01T00:00:10", worker=1),
+                ChunkRecord(1, 2, DONE, "2024-01-01T00:00:00", "2024-01-01T00:00:30", worker=2)],
+    ).save()
+
+    model = CostModel.from_manifests([run_dir], sweep_space)
+    assert model.rate("cadcad", {"environmental_label": "calm"}) == 1.0
+    assert model.rate("cadcad", {"environmental_label": "volatile"}) == 3.0
+    assert model.rate("cadcad", {"environmental_label": "unseen"}) == 2.0
+    assert model.rate("vectorized", {"environmental_label": "calm"}) == 1.0
+
+    workers = worker_utilization(RunManifest.load(run_dir))
+    assert workers.loc[2, "utilization"] == 1.0
+    assert workers.loc[1, "tail_idle_s"] == 20.0
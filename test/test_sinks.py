@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from subspace_model.experiments.experiment import simulate
+from subspace_model.experiments.sinks import ArrowIPCSink, MemorySink, ParquetDatasetSink, ParquetSink, read_sink
+from subspace_model.params import DEFAULT_PARAMS
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
+
+
+@pytest.mark.parametrize("engine", ["cadcad", "vectorized"])
+def test_sink_matches_dataframe(engine):
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    sweep_params["reward_proposer_share"] = [0.1, 0.3]
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 100, 2)
+    expected = simulate(*args, assign_params={"label", "reward_proposer_share"}, engine=engine, seed=1)
+
+    sink = MemorySink()
+    assert simulate(*args, assign_params={"label", "reward_proposer_share"}, engine=engine, seed=1, sink=sink) is None
+    assert len(sink.batches) > 1
+    sim_df = sink.to_dataframe()
+    assert list(sim_df.columns) == list(expected.columns)
+    for column in ["subset", "run", "timestep", "total_supply", "reward_proposer_share"]:
+        np.testing.assert_array_equal(sim_df[column], expected[column], err_msg=column)
+
+
+@pytest.mark.parametrize("sink_class", [ParquetSink, ArrowIPCSink])
+def test_file_sinks(tmp_path, sink_class):
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    path = tmp_path / f"timestep_tensor{'.parquet' if sink_class is ParquetSink else '.arrow'}"
+    with sink_class(path) as sink:
+        simulate(INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 100, 2,
+                 assign_params={"label", "reference_subsidy_components"},
+                 engine="vectorized", seed=1, sink=sink)
+
+    sim_df = read_sink(path)
+    assert len(sim_df) == sink.rows == 2 * 101
+    assert sim_df.reference_subsidy_components.map(lambda v: isinstance(v, str)).all()
+    assert list(read_sink(path, columns=["run", "total_supply"]).columns) == ["run", "total_supply"]
+
+
+@pytest.mark.parametrize("engine", ["cadcad", "vectorized"])
+def test_dataset_sink(tmp_path, engine):
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    sweep_params["reward_proposer_share"] = [0.1, 0.2, 0.3]
+    path = tmp_path / "timestep_tensor" / "chunk=0"
+    with ParquetDatasetSink(path) as sink:
+        simulate(INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 30, 1,
+                 assign_params={"label"}, engine=engine, seed=1, sink=sink)
+
+    sim_df = read_sink(tmp_path / "timestep_tensor")
+    assert len(sim_df) == sink.rows == 3 * 31
+    assert (sim_df.chunk == 0).all()
+    # Typed from the state type hints whatever the engine computed
+    assert sim_df.blockchain_history_size.dtype == np.float64
+    assert sim_df.timestep.dtype == np.int64
+
+    subset_df = read_sink(tmp_path / "timestep_tensor", columns=["subset", "total_supply"],
+                          filters=[("subset", "in", [1, 2])])
+    assert list(subset_df.columns) == ["subset", "total_supply"]
+    assert sorted(subset_df.subset.unique()) == [1, 2]
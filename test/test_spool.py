@@ -0,0 +1,43 @@
+import os
+import threading
+
+import pandas as pd
+
+from subspace_model.experiments.experiment import psuu
+from subspace_model.experiments.manifest import RunManifest
+from subspace_model.experiments.spool import ChunkSpec, Spool, work
+
+
+def test_spool_claims_once_and_requeues_lost_chunks(tmp_path):
+    spool = Spool(tmp_path / "queue")
+    spool.publish(ChunkSpec("runs/a", i) for i in range(2))
+
+    spec, claim = spool.claim("host-1")
+    assert spec.chunk == 0
+    spec_2, claim_2 = spool.claim("host-2")
+    assert spec_2.chunk == 1
+    assert spool.claim("host-3") is None
+
+    # host-1 stops responding: its chunk goes back to the queue
+    assert spool.requeue_stale(timeout=0) == []
+    os.utime(claim_2, (0, 0))  # host-2 is still beating
+    assert [spec.chunk for spec in spool.requeue_stale(timeout=0)] == [0]
+    spec, claim = spool.claim("host-3")
+    spool.complete(claim, spec, {"error": None, "worker": "host-3"})
+    assert [r["chunk"] for r in spool.collect("runs/a")] == [0]
+    assert list(spool.collect("runs/a")) == []
+
+
+def test_queued_psuu(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    worker = threading.Thread(target=work, args=("queue",), kwargs=dict(idle_timeout=5, poll_interval=0.1))
+    worker.start()
+    psuu(SIMULATION_DAYS=10, SAMPLES=1, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=1, PROCESSES=0,
+         ENGINE="vectorized", SEED=1, QUEUE="queue")
+    worker.join()
+
+    (run_dir,) = (tmp_path / "data/simulations").iterdir()
+    manifest = RunManifest.load(run_dir)
+    assert manifest.finalized and manifest.pending() == []
+    assert all(isinstance(chunk.worker, str) for chunk in manifest.chunks)
+    assert len(pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz")) == 3
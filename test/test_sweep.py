@@ -0,0 +1,48 @@
+from collections import Counter
+from random import Random
+
+import pytest
+from cadCAD.tools.preparation import sweep_cartesian_product  # type: ignore
+
+from subspace_model.experiments.designs import sample_design
+from subspace_model.experiments.sweep import SweepSpace
+
+AXES = {"a": [1, 2], "b": ["x"], "c": [0.1, 0.2, 0.3], "d": [True, False]}
+
+
+def test_sweep_space_matches_cartesian_product():
+    space = SweepSpace(AXES)
+    product = sweep_cartesian_product(AXES)
+
+    assert len(space) == len(product["a"]) == 12
+    assert [space[i] for i in range(len(space))] == [
+        {k: v[i] for k, v in product.items()} for i in range(len(space))]
+    assert space.take(range(3, 7)) == {k: v[3:7] for k, v in product.items()}
+    with pytest.raises(IndexError):
+        space[12]
+
+
+def test_sweep_space_sample():
+    space = SweepSpace(AXES)
+    sample = space.sample(5, Random(1))
+    # The same draws as sampling every column of the materialized product
+    rng = Random(1)
+    expected = {k: rng.sample(v, 5) for k, v in sweep_cartesian_product(AXES).items()}
+    assert space.take(sample) == expected
+
+
+@pytest.mark.parametrize("design", ["lhs", "sobol", "stratified"])
+def test_sample_design_balances_levels(design):
+    axes = {"env": ["calm", "volatile", "wild"], "grid": list(range(12)), "share": [0.1, 0.3], "fixed": [1]}
+    space = SweepSpace(axes, factors={"grid": (3, 4)})
+    sample = sample_design(space, 24, design, seed=3, strata=["env"])
+
+    indices = sample["env"]
+    assert all(sample[k] == indices for k in axes)
+    params = space.take(indices)
+    counts = Counter(params["env"])
+    assert len(counts) == 3 and max(counts.values()) - min(counts.values()) <= (design == "sobol") * 2
+    # Every factor of the grid is spread over its levels
+    assert Counter(g // 4 for g in params["grid"]).keys() == {0, 1, 2}
+    assert Counter(g % 4 for g in params["grid"]).keys() == {0, 1, 2, 3}
+    assert sample == sample_design(space, 24, design, seed=3, strata=["env"])
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from subspace_model.experiments.experiment import psuu
+from subspace_model.experiments.upload import FileSystemBackend, Uploader
+
+
+class FlakyBackend(FileSystemBackend):
+    """Fails the first `failures` puts of every key."""
+
+    def __init__(self, root, failures):
+        super().__init__(root)
+        self.failures = failures
+        self.attempts = {}
+
+    def put(self, path, key):
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if self.attempts[key] <= self.failures:
+            raise ConnectionError("connection reset")
+        super().put(path, key)
+
+
+def test_uploader_retries_and_removes(tmp_path):
+    (tmp_path / "out/part").mkdir(parents=True)
+    (tmp_path / "out/a.txt").write_text("a")
+    (tmp_path / "out/part/b.txt").write_text("bb")
+    backend = FlakyBackend(tmp_path / "bucket", failures=1)
+    with Uploader(backend, workers=2, max_pending=1, backoff_s=0) as uploader:
+        uploader.submit(tmp_path / "out/a.txt", "run/a.txt")
+        uploader.submit(tmp_path / "out/part", "run/part", remove=True)
+
+    assert (tmp_path / "bucket/run/a.txt").read_text() == "a"
+    assert (tmp_path / "bucket/run/part/b.txt").read_text() == "bb"
+    assert backend.attempts == {"run/a.txt": 2, "run/part/b.txt": 2}
+    assert uploader.uploaded_bytes == 3
+    assert (tmp_path / "out/a.txt").exists() and not (tmp_path / "out/part").exists()
+
+    uploader = Uploader(FlakyBackend(tmp_path / "bucket", failures=9), retries=2, backoff_s=0)
+    uploader.submit(tmp_path / "out/a.txt", "run/c.txt", remove=True)
+    with pytest.raises(RuntimeError, match="1 uploads failed"):
+        uploader.close()
+    assert (tmp_path / "out/a.txt").exists()
+
+
+def test_psuu_uploads_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    psuu(SIMULATION_DAYS=10, SAMPLES=1, N_SWEEP_SAMPLES=3, SWEEPS_PER_PROCESS=1, PROCESSES=1,
+         USE_JOBLIB=False, ENGINE="vectorized", SEED=1, UPLOAD_TO=str(tmp_path / "bucket"))
+
+    (run_dir,) = (tmp_path / "data/simulations").iterdir()
+    uploaded = tmp_path / "bucket" / run_dir.name
+    for i in range(3):
+        assert (uploaded / f"timestep_tensor-{i}.pkl.gz").exists()
+        assert not (run_dir / f"timestep_tensor-{i}.pkl.gz").exists()
+        assert (run_dir / f"trajectory_tensor-{i}.pkl.gz").exists()
+    pd.testing.assert_frame_equal(pd.read_pickle(uploaded / "trajectory_tensor.pkl.gz"),
+                                  pd.read_pickle(run_dir / "trajectory_tensor.pkl.gz"))
@@ -0,0 +1,158 @@
+from copy import deepcopy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from subspace_model.experiments.experiment import (
+    sanity_check_run,
+    simulate,
+    standard_stochastic_run,
+)
+from subspace_model.experiments.logic import (
+    CONSTANT,
+    MAGNITUDE,
+    MAINNET_REFERENCE_SUBSIDY_COMPONENTS,
+    POSITIVE_INTEGER,
+)
+from subspace_model.params import DEFAULT_PARAMS
+from subspace_model.psuu import GOVERNANCE_PARAM_COLUMNS, expand_governance_columns
+from subspace_model.state import INITIAL_STATE
+from subspace_model.structure import SUBSPACE_MODEL_BLOCKS
+from subspace_model.vectorized.structure import VECTORIZED_MODEL_BLOCKS
+from subspace_model.vectorized.types import StateFrame, StateTable
+
+
+def test_vectorized_structure_mirrors_model():
+    assert len(VECTORIZED_MODEL_BLOCKS) == len(SUBSPACE_MODEL_BLOCKS)
+    for vectorized, block in zip(VECTORIZED_MODEL_BLOCKS, SUBSPACE_MODEL_BLOCKS):
+        assert vectorized["label"] == block["label"]
+        assert vectorized["policies"].keys() == block["policies"].keys()
+        assert vectorized["variables"].keys() == block["variables"].keys()
+
+
+def test_vectorized_matches_cadcad():
+    params = deepcopy(DEFAULT_PARAMS)
+    params["utilization_ratio_function"] = CONSTANT(0.01)
+    sweep_params = {k: [v] for k, v in params.items()}
+    sweep_params["reward_proposer_share"] = [0.1, 0.3]
+    sweep_params["utilization_ratio_function"] = [CONSTANT(0.01), CONSTANT(0.05)]
+
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 90, 2)
+    cadcad_df = simulate(*args, engine="cadcad")
+    vectorized_df = simulate(*args, engine="vectorized")
+
+    assert cadcad_df.shape == vectorized_df.shape
+    assert set(cadcad_df.columns) == set(vectorized_df.columns)
+    for column in cadcad_df.columns:
+        expected = cadcad_df[column]
+        if pd.api.types.is_numeric_dtype(expected):
+            np.testing.assert_allclose(
+                vectorized_df[column].astype(float),
+                expected.astype(float),
+                rtol=1e-9,
+                err_msg=column,
+            )
+
+
+def test_clipped_scalar_generators_run_per_trajectory():
+    generator = lambda p, s: 0.05 * s["days_passed"] - 1
+    assert not hasattr(MAGNITUDE(generator), "vectorized")
+    assert not hasattr(POSITIVE_INTEGER(generator), "vectorized")
+
+    params = deepcopy(DEFAULT_PARAMS)
+    sweep_params = {k: [v] for k, v in params.items()}
+    sweep_params["utilization_ratio_function"] = [MAGNITUDE(generator)]
+    sweep_params["new_sectors_per_day_function"] = [POSITIVE_INTEGER(lambda p, s: 50 * s["days_passed"] - 100)]
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 60, 1)
+    cadcad_df = simulate(*args, engine="cadcad")
+    vectorized_df = simulate(*args, engine="vectorized")
+    for column in ["block_utilization", "total_space_pledged", "total_supply"]:
+        np.testing.assert_allclose(vectorized_df[column].astype(float), cadcad_df[column].astype(float),
+                                   rtol=1e-9, err_msg=column)
+
+
+def test_vectorized_stochastic_run():
+    sim_df = standard_stochastic_run(
+        SIMULATION_DAYS=70, TIMESTEP_IN_DAYS=1, SAMPLES=3, ENGINE="vectorized"
+    )
+    assert len(sim_df) == 3 * (70 + 2)
+    assert sim_df.groupby("run").total_supply.last().notna().all()
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        sanity_check_run(SIMULATION_DAYS=10, ENGINE="unknown")
+
+
+def test_seeded_vectorized_matches_cadcad():
+    cadcad_df = standard_stochastic_run(SIMULATION_DAYS=70, SAMPLES=2, SEED=42)
+    vectorized_df = standard_stochastic_run(
+        SIMULATION_DAYS=70, SAMPLES=2, SEED=42, ENGINE="vectorized"
+    )
+    for column in ["total_supply", "block_utilization", "operators_balance"]:
+        np.testing.assert_allclose(
+            vectorized_df[column], cadcad_df[column], rtol=1e-9, err_msg=column
+        )
+
+
+@pytest.mark.parametrize("engine", ["cadcad", "vectorized"])
+def test_subsidy_components_attached_as_flat_columns(engine):
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    sweep_params["reference_subsidy_components"] = MAINNET_REFERENCE_SUBSIDY_COMPONENTS()[:2]
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 10, 1)
+    expected = expand_governance_columns(
+        simulate(*args, assign_params={"reference_subsidy_components"}, engine=engine))
+
+    sim_df = simulate(*args, assign_params=set(GOVERNANCE_PARAM_COLUMNS), engine=engine)
+    assert "reference_subsidy_components" not in sim_df.columns
+    for column in GOVERNANCE_PARAM_COLUMNS:
+        assert sim_df[column].dtype == np.float64
+        np.testing.assert_array_equal(sim_df[column], expected[column], err_msg=column)
+
+
+def test_state_frame_updates_see_pre_update_state():
+    state = StateFrame({"a": 1.0, "b": 2.0}, 3)
+    state.update({"a": state["b"], "b": state["a"], "c": state["a"] + 1})
+    assert state["a"].tolist() == [2.0] * 3
+    assert state["b"].tolist() == [1.0] * 3
+    assert state["c"].tolist() == [2.0] * 3
+
+
+def test_state_table_records_fixed_width_rows():
+    table = StateTable(["timestep", "a"], size=2, timesteps=3)
+    for t in range(4):
+        table.record(t, {"timestep": np.full(2, t), "a": np.arange(2) * t})
+    assert table.data.shape == (2, 4)
+    assert table.matrix.shape == (8, 2)
+    assert table.matrix[:, 0].tolist() == [0, 1, 2, 3] * 2
+    assert np.shares_memory(table.matrix, table.data)
+
+
+def test_numba_matches_cadcad():
+    pytest.importorskip("numba")
+    cadcad_df = standard_stochastic_run(SIMULATION_DAYS=70, SAMPLES=2, SEED=42)
+    numba_df = standard_stochastic_run(SIMULATION_DAYS=70, SAMPLES=2, SEED=42, ENGINE="numba")
+    for column in cadcad_df.columns:
+        if pd.api.types.is_numeric_dtype(cadcad_df[column]):
+            np.testing.assert_allclose(
+                numba_df[column].astype(float), cadcad_df[column].astype(float), rtol=1e-9, err_msg=column
+            )
+
+
+def test_numba_matches_cadcad_on_a_sweep():
+    pytest.importorskip("numba")
+    sweep_params = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    sweep_params["reward_proposer_share"] = [0.1, 0.3]
+    sweep_params["utilization_ratio_function"] = [CONSTANT(0.01), CONSTANT(0.05)]
+    sweep_params["reference_subsidy_components"] = MAINNET_REFERENCE_SUBSIDY_COMPONENTS()[:2]
+
+    args = (INITIAL_STATE, sweep_params, SUBSPACE_MODEL_BLOCKS, 365, 2)
+    cadcad_df = simulate(*args, engine="cadcad")
+    numba_df = simulate(*args, engine="numba")
+    assert cadcad_df.shape == numba_df.shape
+    for column in cadcad_df.columns:
+        if pd.api.types.is_numeric_dtype(cadcad_df[column]):
+            np.testing.assert_allclose(
+                numba_df[column].astype(float), cadcad_df[column].astype(float), rtol=1e-9, err_msg=column
+            )